@@ -4,347 +4,191 @@ CoinEx WebSocket Custom Callback Example - FIXED VERSION
 This example shows how to use custom callbacks to handle different
 types of WebSocket messages for more complex applications.
 
-This is a standalone version with the WebSocket client included.
+The WebSocket client comes from the coinex_ws package.
 """
 
 import asyncio
 import json
-import websockets
-import hashlib
-import hmac
+import os
+import sys
 import time
-import gzip
-from typing import Optional, Dict, Callable
+from typing import List
 
+from coinex_ws import CoinExWebSocket, Deal, DepthUpdate, MessageDispatcher, Ticker
+from coinex_ws.dispatch import to_float
+from coinex_ws.fanout import FanoutConsumer
+from coinex_ws.ingest import IngestPipeline
+from coinex_ws.recorder import replay
+from order_book import OrderBookManager
+from output_sink import OutputSink
+from ring_buffer import MarketHistory
 
-class CoinExWebSocket:
-    """CoinEx WebSocket API client with authentication"""
-    
-    def __init__(self, access_id: Optional[str] = None, secret_key: Optional[str] = None):
-        self.access_id = access_id
-        self.secret_key = secret_key
-        self.ws_url = "wss://socket.coinex.com/v2/spot"
-        self.websocket = None
-        self.authenticated = False
+
+class TradingBot:
+    """Example trading bot that processes WebSocket data"""
+    
+    def __init__(self, verbose=True, depth_limit=None, history_capacity=100_000, output=None):
+        self.last_price = None
+        # Local order books per market (resync hook set by the example once a client exists)
+        self.books = OrderBookManager(depth_limit=depth_limit)
+        self.verbose = verbose  # Control detailed vs simple output
+        # Per-market tick and trade history in fixed-size ring buffers
+        self.history = MarketHistory(tick_capacity=history_capacity, trade_capacity=history_capacity)
+        # Newest deal id per market, to skip deals replayed after a resubscribe
+        self.last_deal_id = {}
+        self.duplicate_trades = 0
+        # Display goes through a batched sink so the receive loop never waits on stdout
+        # (latest ticker/book per market every 250ms; trades are queued in order)
+        self.output = output or OutputSink(interval=0.25)
         
-    def _generate_signature(self, timestamp: int) -> str:
-        message = str(timestamp)
-        signature = hmac.new(
-            self.secret_key.encode('utf-8'),
-            message.encode('utf-8'),
-            hashlib.sha256
-        ).hexdigest()
-        return signature
-    
-    async def connect(self):
-        """Establish WebSocket connection with deflate compression"""
-        print("Connecting to CoinEx WebSocket...")
-        # CoinEx v2 requires deflate compression
-        self.websocket = await websockets.connect(
-            self.ws_url,
-            compression='deflate'
-        )
-        print("Connected successfully!")
+        # Route messages by method. Tickers stay raw (only the last price is read per
+        # update); the order book and trade history use every field, so they get structs
+        self.dispatcher = MessageDispatcher(fallback=self.handle_reply, on_error=self.handle_error)
+        self.dispatcher.register("state.update", self.handle_state_update)
+        self.dispatcher.register("depth.update", self.handle_depth, typed=True)
+        self.dispatcher.register("deals.update", self.handle_trades, typed=True)
+        self.dispatcher.register("server.pong", lambda data: None)  # Ignore pong messages
         
-    async def authenticate(self):
-        if not self.access_id or not self.secret_key:
-            raise ValueError("API credentials required for authentication")
+    def handle_state_update(self, data):
+        """Handle a raw state.update (one update can carry several markets when subscribed in batches)"""
+        for entry in (data.get("data") or {}).get("state_list") or ():
+            self.handle_ticker_entry(entry.get("market") or "Unknown", to_float(entry.get("last")), entry)
+    
+    def handle_ticker(self, tickers: List[Ticker]):
+        """Handle typed tickers (e.g. from a fan-out consumer)"""
+        for ticker in tickers:
+            self.handle_ticker_entry(ticker.market or "Unknown", ticker.last, ticker)
+    
+    def handle_ticker_entry(self, market, last_price, ticker):
+        """
+        Record one market's last traded price and queue it for display
         
-        timestamp = int(time.time() * 1000)
-        signature = self._generate_signature(timestamp)
+        ticker is a Ticker or the raw state_list entry; a raw entry is only
+        converted if the update is displayed.
+        """
+        if last_price <= 0:
+            self.output.emit(None, f"⚠️  Invalid price for {market}: {last_price}")
+            return
         
-        auth_message = {
-            "method": "server.sign",
-            "params": {
-                "access_id": self.access_id,
-                "timestamp": timestamp,
-                "signature": signature
-            },
-            "id": 1
-        }
+        # Add to price history
+        self.history.add_tick(market, time.time_ns() // 1_000_000, last_price)
         
-        print("Authenticating...")
-        await self.websocket.send(json.dumps(auth_message))
+        # Formatting happens in the sink's writer thread (and only for the update it shows)
+        formatter = self.format_ticker if self.verbose else self.format_ticker_compact
+        self.output.emit(("ticker", market), formatter, ticker, self.last_price, time.time())
         
-        response = await self.websocket.recv()
-        result = json.loads(response)
+        self.last_price = last_price
+    
+    @staticmethod
+    def format_ticker(ticker, previous_price, received_at):
+        """Detailed ticker display"""
+        if isinstance(ticker, dict):
+            ticker = Ticker.from_dict(ticker)
+        lines = [
+            f"\n{'='*60}",
+            f"💰 LAST TRADED PRICE - {ticker.market or 'Unknown'}",
+            f"{'='*60}",
+            f"   Price:     ${ticker.last:,.2f}",
+        ]
         
-        if result.get("error") is None and result.get("result", {}).get("status") == "success":
-            self.authenticated = True
-            print("✓ Authentication successful!")
-        else:
-            print(f"✗ Authentication failed: {result}")
-            raise Exception("Authentication failed")
-    
-    async def subscribe_ticker(self, market: str):
-        subscribe_message = {
-            "method": "state.subscribe",
-            "params": {
-                "market_list": [market]
-            },
-            "id": 2
-        }
-        await self.websocket.send(json.dumps(subscribe_message))
-    
-    async def subscribe_depth(self, market: str, limit: int = 20, interval: str = "0"):
-        subscribe_message = {
-            "method": "depth.subscribe",
-            "params": {
-                "market_list": [market],
-                "limit": limit,
-                "interval": interval
-            },
-            "id": 3
-        }
-        await self.websocket.send(json.dumps(subscribe_message))
-    
-    async def subscribe_trades(self, market: str):
-        subscribe_message = {
-            "method": "deals.subscribe",
-            "params": {
-                "market_list": [market]
-            },
-            "id": 4
-        }
-        await self.websocket.send(json.dumps(subscribe_message))
-    
-    async def ping(self):
-        ping_message = {
-            "method": "server.ping",
-            "params": {},
-            "id": 100
-        }
-        await self.websocket.send(json.dumps(ping_message))
-    
-    async def listen(self, callback: Optional[Callable] = None):
-        """Listen for messages with improved error handling and compression support"""
-        try:
-            while True:
-                message = await self.websocket.recv()
-                
-                # Handle compression - CoinEx sends gzip despite deflate connection
-                if isinstance(message, bytes):
-                    # Check if it's gzip compressed (starts with 0x1f 0x8b)
-                    if len(message) > 1 and message[0] == 0x1f and message[1] == 0x8b:
-                        try:
-                            message = gzip.decompress(message).decode('utf-8')
-                        except Exception as e:
-                            print(f"⚠️  Error decompressing message: {e}")
-                            continue
-                    else:
-                        try:
-                            message = message.decode('utf-8')
-                        except Exception as e:
-                            print(f"⚠️  Error decoding message: {e}")
-                            continue
-                
-                # Parse JSON
-                try:
-                    data = json.loads(message)
-                except json.JSONDecodeError as e:
-                    print(f"⚠️  Error parsing JSON: {e}")
-                    print(f"   Raw message: {message[:200]}")
-                    continue
-                
-                if callback:
-                    try:
-                        callback(data)
-                    except Exception as e:
-                        print(f"⚠️  Error in callback: {e}")
-                        import traceback
-                        traceback.print_exc()
-                        
-        except websockets.exceptions.ConnectionClosed:
-            print("Connection closed")
-        except Exception as e:
-            print(f"Error in listen: {e}")
-            import traceback
-            traceback.print_exc()
-    
-    async def close(self):
-        if self.websocket:
-            await self.websocket.close()
-            print("Connection closed")
-
-
-class TradingBot:
-    """Example trading bot that processes WebSocket data"""
+        # Show change from previous update if available
+        if previous_price and previous_price > 0:
+            change = ((ticker.last - previous_price) / previous_price) * 100
+            direction = "📈" if change > 0 else "📉"
+            lines.append(f"   Change:    {direction} {change:+.2f}% (from last update)")
+        
+        # Show 24h statistics
+        lines.append(f"   24h Change: {ticker.change_pct:+.2f}%")
+        lines.append(f"   24h High:   ${ticker.high:,.2f}")
+        lines.append(f"   24h Low:    ${ticker.low:,.2f}")
+        lines.append(f"   24h Volume: {ticker.volume:,.2f}")
+        lines.append(f"{'='*60}\n")
+        return "\n".join(lines)
     
-    def __init__(self, verbose=True):
-        self.last_price = None
-        self.order_book = {"asks": [], "bids": []}
-        self.recent_trades = []
-        self.verbose = verbose  # Control detailed vs simple output
-        self.price_history = []  # Track price history
+    @staticmethod
+    def format_ticker_compact(ticker, previous_price, received_at):
+        """Simple one-line ticker display"""
+        if isinstance(ticker, dict):
+            ticker = Ticker.from_dict(ticker)
+        timestamp = time.strftime("%H:%M:%S", time.localtime(received_at))
+        change_indicator = ""
+        if previous_price and previous_price > 0:
+            change = ((ticker.last - previous_price) / previous_price) * 100
+            if abs(change) > 0.001:  # Only show if changed
+                direction = "▲" if change > 0 else "▼"
+                change_indicator = f" {direction} {abs(change):.2f}%"
         
-    def handle_ticker(self, data):
-        """Handle ticker updates with error checking and display last traded price"""
-        try:
-            # CoinEx v2 uses data.state_list, not params
-            state_list = data.get("data", {}).get("state_list", [])
-            if not state_list or not isinstance(state_list, list):
-                return
-                
-            ticker = state_list[0]
-            market = ticker.get("market", "Unknown")
-            last_price_str = ticker.get("last", "0")
-            
-            # Handle both string and numeric values
-            try:
-                last_price = float(last_price_str)
-            except (ValueError, TypeError):
-                print(f"⚠️  Invalid price format: {last_price_str}")
-                return
-            
-            # Get additional ticker data
-            volume = ticker.get("volume", "0")
-            open_price_str = ticker.get("open", "0")
-            high_24h = ticker.get("high", "0")
-            low_24h = ticker.get("low", "0")
-            
-            # Calculate 24h change
-            try:
-                open_price = float(open_price_str)
-                if open_price > 0:
-                    change_24h = ((last_price - open_price) / open_price) * 100
-                else:
-                    change_24h = 0
-            except (ValueError, TypeError):
-                change_24h = 0
-            
-            # Add to price history
-            self.price_history.append(last_price)
-            if len(self.price_history) > 100:
-                self.price_history.pop(0)
-            
-            if self.verbose:
-                # Detailed display
-                print(f"\n{'='*60}")
-                print(f"💰 LAST TRADED PRICE - {market}")
-                print(f"{'='*60}")
-                print(f"   Price:     ${last_price:,.2f}")
-                
-                # Show change from previous update if available
-                if self.last_price and self.last_price > 0:
-                    change = ((last_price - self.last_price) / self.last_price) * 100
-                    direction = "📈" if change > 0 else "📉"
-                    print(f"   Change:    {direction} {change:+.2f}% (from last update)")
-                
-                # Show 24h statistics
-                try:
-                    print(f"   24h Change: {change_24h:+.2f}%")
-                    print(f"   24h High:   ${float(high_24h):,.2f}")
-                    print(f"   24h Low:    ${float(low_24h):,.2f}")
-                    print(f"   24h Volume: {float(volume):,.2f}")
-                except (ValueError, TypeError):
-                    pass
-                
-                print(f"{'='*60}\n")
-            else:
-                # Simple compact display
-                timestamp = time.strftime("%H:%M:%S")
-                change_indicator = ""
-                if self.last_price and self.last_price > 0:
-                    change = ((last_price - self.last_price) / self.last_price) * 100
-                    if abs(change) > 0.001:  # Only show if changed
-                        direction = "▲" if change > 0 else "▼"
-                        change_indicator = f" {direction} {abs(change):.2f}%"
-                
-                print(f"[{timestamp}] 💰 {market}: ${last_price:,.2f}{change_indicator}")
-                
-            self.last_price = last_price
-            
-        except Exception as e:
-            print(f"⚠️  Error handling ticker: {e}")
-    
-    def handle_depth(self, data):
-        """Handle order book depth updates with error checking"""
-        try:
-            # CoinEx v2 uses data structure, not params
-            depth_data = data.get("data", {})
-            if not isinstance(depth_data, dict):
-                return
-            
-            market = depth_data.get("market", "Unknown")
-            
-            self.order_book["asks"] = depth_data.get("asks", [])
-            self.order_book["bids"] = depth_data.get("bids", [])
-            
-            if self.order_book["asks"] and self.order_book["bids"]:
-                try:
-                    best_ask = float(self.order_book["asks"][0][0])
-                    best_bid = float(self.order_book["bids"][0][0])
-                    spread = best_ask - best_bid
-                    spread_pct = (spread / best_bid) * 100
-                    
-                    print(f"📖 {market} - Spread: ${spread:.2f} ({spread_pct:.3f}%)")
-                    print(f"   Ask: ${best_ask:,.2f} | Bid: ${best_bid:,.2f}")
-                except (ValueError, TypeError, IndexError) as e:
-                    print(f"⚠️  Error parsing order book: {e}")
-                    
-        except Exception as e:
-            print(f"⚠️  Error handling depth: {e}")
-    
-    def handle_trades(self, data):
-        """Handle trade updates with error checking"""
-        try:
-            # CoinEx v2 uses data structure, not params
-            deals_data = data.get("data", {})
-            if not isinstance(deals_data, dict):
-                return
-            
-            market = deals_data.get("market", "Unknown")
-            deals = deals_data.get("deals", [])
-            
-            if not isinstance(deals, list):
-                return
+        return f"[{timestamp}] 💰 {ticker.market or 'Unknown'}: ${ticker.last:,.2f}{change_indicator}"
+    
+    def handle_depth(self, depth: DepthUpdate):
+        """Apply order book depth updates (snapshots and diffs) to the local book"""
+        book = self.books.handle_depth(depth)
+        if book is None:
+            return  # Out of sync; waiting for a new snapshot
+        
+        best_bid, best_ask = book.best_bid(), book.best_ask()
+        if best_bid and best_ask and best_bid[0] > 0:
+            self.output.emit(("depth", depth.market), self.format_depth,
+                             depth.market, best_bid[0], best_ask[0], len(book.bids), len(book.asks))
+    
+    @staticmethod
+    def format_depth(market, best_bid, best_ask, bid_levels, ask_levels):
+        spread = best_ask - best_bid
+        spread_pct = (spread / best_bid) * 100
+        return (f"📖 {market or 'Unknown'} - Spread: ${spread:.2f} ({spread_pct:.3f}%)\n"
+                f"   Ask: ${best_ask:,.2f} | Bid: ${best_bid:,.2f} | "
+                f"Depth: {bid_levels}/{ask_levels} levels")
+    
+    def handle_trades(self, deals: List[Deal]):
+        """Handle trade updates (deals replayed by a resubscribe are skipped)"""
+        # History is kept in time order (a deals.update lists the newest deal first)
+        for trade in sorted(deals, key=lambda deal: (deal.created_at, deal.deal_id)):
+            # A reconnect or resubscribe sends the recent deals snapshot again
+            if trade.deal_id and trade.deal_id <= self.last_deal_id.get(trade.market, 0):
+                self.duplicate_trades += 1
+                continue
+            if trade.deal_id:
+                self.last_deal_id[trade.market] = trade.deal_id
             
-            for trade in deals:
-                try:
-                    price = float(trade.get("price", 0))
-                    amount = float(trade.get("amount", 0))
-                    trade_type = trade.get("type", "unknown")
-                    volume = price * amount
-                    
-                    emoji = "🟢" if trade_type == "buy" else "🔴"
-                    print(f"{emoji} {market} {trade_type.upper()}: {amount:.6f} @ ${price:,.2f} (${volume:,.2f})")
-                    
-                    self.recent_trades.append(trade)
-                    # Keep only last 10 trades
-                    if len(self.recent_trades) > 10:
-                        self.recent_trades.pop(0)
-                        
-                except (ValueError, TypeError) as e:
-                    print(f"⚠️  Error parsing trade: {e}")
-                    
-        except Exception as e:
-            print(f"⚠️  Error handling trades: {e}")
+            # Trades are events: written in order (oldest dropped if output falls behind)
+            self.output.emit(None, self.format_trade, trade)
+            self.history.add_trade(trade.market, trade.created_at, trade.price, trade.amount, trade.side)
+    
+    @staticmethod
+    def format_trade(trade: Deal):
+        emoji = "🟢" if trade.side == "buy" else "🔴"
+        return (f"{emoji} {trade.market or 'Unknown'} {trade.side.upper()}: "
+                f"{trade.amount:.6f} @ ${trade.price:,.2f} (${trade.notional:,.2f})")
+    
+    def trade_stats(self, market, seconds=3600):
+        """VWAP, buy/sell volume and range of the market's trades over the last seconds"""
+        return self.history.trade_stats(market, since_ts=time.time_ns() // 1_000_000 - seconds * 1000)
+    
+    def price_stats(self, market, seconds=3600):
+        """Mean, standard deviation and range of the market's ticker prices over the last seconds"""
+        return self.history.tick_stats(market, since_ts=time.time_ns() // 1_000_000 - seconds * 1000)
+    
+    def handle_reply(self, data):
+        """Handle subscription confirmations and other messages without a handler"""
+        if "result" in data:
+            result = data.get("result") or {}
+            if isinstance(result, dict) and result.get("status") == "success":
+                self.output.emit(None, f"✓ Subscription successful")
+        elif data.get("error"):
+            self.output.emit(None, f"⚠️  Error: {data.get('error')}")
+    
+    def handle_error(self, method, error, data):
+        """Report a handler failure without stopping the stream"""
+        self.output.emit(None, f"⚠️  Error handling {method}: {error}\n"
+                               f"   Message was: {json.dumps(data, indent=2)[:500]}")
+    
+    def close(self):
+        """Write out any pending display output"""
+        self.output.close()
     
     def handle_message(self, data):
         """Main message handler that routes to specific handlers"""
-        try:
-            method = data.get("method", "")
-            
-            if method == "state.update":
-                self.handle_ticker(data)
-            elif method == "depth.update":
-                self.handle_depth(data)
-            elif method == "deals.update":
-                self.handle_trades(data)
-            elif method == "server.pong":
-                pass  # Ignore pong messages
-            else:
-                # Handle subscription confirmations and other messages
-                if "result" in data:
-                    result = data.get("result", {})
-                    if result.get("status") == "success":
-                        print(f"✓ Subscription successful")
-                elif "error" in data:
-                    print(f"⚠️  Error: {data.get('error')}")
-                    
-        except Exception as e:
-            print(f"⚠️  Error in message handler: {e}")
-            print(f"   Message was: {json.dumps(data, indent=2)}")
+        self.dispatcher.dispatch(data)
 
 
 async def example_with_bot():
@@ -353,12 +197,18 @@ async def example_with_bot():
     print("Trading Bot with Custom Callbacks")
     print("=" * 60 + "\n")
     
+    DEPTH_LIMIT = 5
+    
     # Create bot instance
-    bot = TradingBot()
+    bot = TradingBot(depth_limit=DEPTH_LIMIT)
     
     # Create WebSocket client
     client = CoinExWebSocket()
     
+    # A book that fails its checksum is resubscribed to get a fresh snapshot
+    bot.books.on_resync = lambda market: asyncio.ensure_future(
+        client.subscribe_depths([market], limit=DEPTH_LIMIT))
+    
     try:
         # Connect
         await client.connect()
@@ -366,20 +216,17 @@ async def example_with_bot():
         # Wait a moment for connection to establish
         await asyncio.sleep(1)
         
-        # Subscribe to multiple markets
+        # Subscribe to multiple markets (one message per channel for all markets)
         markets = ["BTCUSDT", "ETHUSDT"]
         
-        for market in markets:
-            await client.subscribe_ticker(market)
-            await asyncio.sleep(0.5)  # Small delay between subscriptions
-            
-            await client.subscribe_depth(market, limit=5)
-            await asyncio.sleep(0.5)
-            
-            await client.subscribe_trades(market)
-            await asyncio.sleep(0.5)
-            
-            print(f"✓ Subscribed to {market}")
+        await client.subscribe_tickers(markets)
+        await client.subscribe_depths(markets, limit=DEPTH_LIMIT)
+        await client.subscribe_trades_batch(markets)
+        
+        print(f"✓ Subscribed to {', '.join(markets)}")
+        
+        # Keep the socket alive and resubscribe markets whose feed goes quiet
+        client.start_heartbeat()
         
         print("\n" + "-" * 60)
         print("Monitoring markets... (Press Ctrl+C to stop)")
@@ -396,6 +243,7 @@ async def example_with_bot():
         traceback.print_exc()
     finally:
         await client.close()
+        bot.close()
 
 
 async def example_price_alert():
@@ -414,36 +262,29 @@ async def example_price_alert():
     def price_alert_handler(data):
         nonlocal alerted_high, alerted_low
         
-        try:
-            method = data.get("method", "")
-            if method == "state.update":
-                params = data.get("params", [])
-                if params and isinstance(params, list):
-                    ticker = params[0]
-                    market = ticker.get("market", "")
-                    
-                    try:
-                        price = float(ticker.get("last", 0))
-                    except (ValueError, TypeError):
-                        return
-                    
-                    print(f"Current {market} price: ${price:,.2f}")
-                    
-                    # Check alerts
-                    if price >= ALERT_HIGH and not alerted_high:
-                        print(f"\n🚨 ALERT! {market} reached ${price:,.2f} (above ${ALERT_HIGH:,.2f})")
-                        alerted_high = True
-                    elif price <= ALERT_LOW and not alerted_low:
-                        print(f"\n🚨 ALERT! {market} dropped to ${price:,.2f} (below ${ALERT_LOW:,.2f})")
-                        alerted_low = True
-                    
-                    # Reset alerts if price moves back
-                    if ALERT_LOW < price < ALERT_HIGH:
-                        alerted_high = False
-                        alerted_low = False
-                        
-        except Exception as e:
-            print(f"⚠️  Error in price alert handler: {e}")
+        for ticker in (data.get("data") or {}).get("state_list") or ():
+            market = ticker.get("market", "")
+            price = to_float(ticker.get("last"))
+            if price <= 0:
+                continue
+            
+            print(f"Current {market} price: ${price:,.2f}")
+            
+            # Check alerts
+            if price >= ALERT_HIGH and not alerted_high:
+                print(f"\n🚨 ALERT! {market} reached ${price:,.2f} (above ${ALERT_HIGH:,.2f})")
+                alerted_high = True
+            elif price <= ALERT_LOW and not alerted_low:
+                print(f"\n🚨 ALERT! {market} dropped to ${price:,.2f} (below ${ALERT_LOW:,.2f})")
+                alerted_low = True
+            
+            # Reset alerts if price moves back
+            if ALERT_LOW < price < ALERT_HIGH:
+                alerted_high = False
+                alerted_low = False
+    
+    dispatcher = MessageDispatcher()
+    dispatcher.register("state.update", price_alert_handler)
     
     client = CoinExWebSocket()
     
@@ -456,10 +297,11 @@ async def example_price_alert():
         print(f"Alert thresholds:")
         print(f"  High: ${ALERT_HIGH:,.2f}")
         print(f"  Low:  ${ALERT_LOW:,.2f}")
+        client.start_heartbeat()
         print("\nMonitoring price...\n")
         
         await asyncio.wait_for(
-            client.listen(callback=price_alert_handler),
+            client.listen(callback=dispatcher.dispatch),
             timeout=300.0  # Run for 5 minutes
         )
         
@@ -494,10 +336,10 @@ async def example_simple_price_monitor():
         # Subscribe to ticker only
         markets = ["BTCUSDT", "ETHUSDT", "BNBUSDT"]
         
+        await client.subscribe_tickers(markets)
         for market in markets:
-            await client.subscribe_ticker(market)
-            await asyncio.sleep(0.5)
             print(f"✓ Monitoring {market}")
+        client.start_heartbeat()
         
         print("\n" + "-" * 60)
         print("Displaying last traded prices (Press Ctrl+C to stop)")
@@ -514,6 +356,76 @@ async def example_simple_price_monitor():
         traceback.print_exc()
     finally:
         await client.close()
+        bot.close()
+
+
+async def example_ingest_queues():
+    """Example: run TradingBot behind per-channel queues and print queue stats"""
+    MARKETS = ["BTCUSDT", "ETHUSDT", "SOLUSDT", "XRPUSDT", "DOGEUSDT"]
+    RUN_SECONDS = 60
+    
+    bot = TradingBot(verbose=False, depth_limit=20)
+    pipeline = IngestPipeline(bot.handle_message, maxsize=500)
+    client = CoinExWebSocket()
+    bot.books.on_resync = lambda market: asyncio.ensure_future(client.subscribe_depths([market], limit=20))
+    
+    try:
+        await client.connect()
+        await client.subscribe_tickers(MARKETS)
+        await client.subscribe_depths(MARKETS, limit=20)
+        await client.subscribe_trades_batch(MARKETS)
+        await asyncio.wait_for(client.listen(callback=pipeline.submit), timeout=RUN_SECONDS)
+    except asyncio.TimeoutError:
+        pass
+    except KeyboardInterrupt:
+        print("\n\nShutting down...")
+    finally:
+        await client.close()
+        await pipeline.close()
+        bot.close()
+    
+    print("\nIngest queues:")
+    print(pipeline.render_stats())
+
+
+async def example_replay(source, speed=None):
+    """Example: replay a coinex_ws.recorder capture through TradingBot (display discarded)"""
+    with open(os.devnull, 'w') as devnull:
+        bot = TradingBot(verbose=False, output=OutputSink(stream=devnull))
+        await replay(source, speed=speed, callback=bot.handle_message)
+        bot.close()
+
+
+def example_fanout_bot(prefix="coinex", seconds=None):
+    """Example: TradingBot fed from a coinex_ws.fanout daemon's shared-memory rings"""
+    bot = TradingBot(verbose=False)
+    consumer = None
+    
+    def on_gap(channel, lost):
+        print(f"⚠️  Lost {lost} {channel} records (consumer too slow)")
+        if channel == 'depth':
+            # Diffs were missed: every book needs a new snapshot
+            for market, book in bot.books.books.items():
+                book.synced = False
+                consumer.request_resync(market)
+    
+    try:
+        consumer = FanoutConsumer(prefix, on_tickers=bot.handle_ticker, on_depth=bot.handle_depth,
+                                  on_trades=bot.handle_trades, on_gap=on_gap)
+    except FileNotFoundError:
+        print(f"❌ No fan-out daemon running for '{prefix}' (start: python -m coinex_ws.fanout daemon)")
+        bot.close()
+        return
+    bot.books.on_resync = consumer.request_resync
+    print(f"✓ Attached to '{prefix}-*'")
+    try:
+        consumer.run(duration=seconds)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        bot.close()
+        print(f"\n{consumer.stats()}")
+        consumer.close()
 
 
 async def main():
@@ -541,4 +453,13 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    # python Callbacks.py [ingest | replay DIR [speed|max] | fanout [PREFIX]]
+    args = sys.argv[1:]
+    if args[:1] == ["ingest"]:
+        asyncio.run(example_ingest_queues())
+    elif args[:1] == ["replay"] and len(args) > 1:
+        asyncio.run(example_replay(args[1], None if len(args) < 3 or args[2] == 'max' else float(args[2])))
+    elif args[:1] == ["fanout"]:
+        example_fanout_bot(*args[1:2])
+    else:
+        asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,141 @@
+"""
+CoinExWebSocket.listen() hot-path benchmark
+
+Every script now goes through the one listen() loop in coinex_ws.client, so
+this benchmark drives that loop directly: frames are served from memory by
+a stand-in websocket, and listen() decodes, routes and dispatches them as
+it would on a live connection. Scenarios add the optional per-frame
+features one at a time, so the cost of each is visible:
+
+- decode_frame loop: codec only, the floor for any client
+- listen, no-op callback: decode plus reply routing
+- listen + dispatcher: typed Ticker/DepthUpdate structs to handlers (typed=True)
+- + heartbeat: per-market feed tracking (HeartbeatManager.observe)
+- + latency: per-stage IngestLatency histograms
+- + recorder: raw frames appended to a segment file
+
+Frames are synthetic depth-50 / ticker updates (see bench_ws_decode), or a
+coinex_ws.recorder recording.
+
+Usage:
+    python benchmarks/bench_client.py [num_frames] [recording_dir]
+"""
+
+import asyncio
+import gzip
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from websockets.exceptions import ConnectionClosedOK  # noqa: E402
+
+from bench_ws_decode import best_of, make_messages  # noqa: E402
+from coinex_ws import CoinExWebSocket, HeartbeatManager, MessageDispatcher, codec  # noqa: E402
+from coinex_ws.latency import IngestLatency  # noqa: E402
+from coinex_ws.recorder import FrameRecorder, load_frames  # noqa: E402
+
+
+class MemoryConnection:
+    """Websocket stand-in that returns a list of frames, then closes"""
+
+    def __init__(self, frames):
+        self._frames = iter(frames)
+
+    async def recv(self):
+        for frame in self._frames:
+            return frame
+        raise ConnectionClosedOK(None, None)
+
+    async def send(self, message):
+        pass
+
+    async def close(self):
+        pass
+
+
+def make_dispatcher(counts):
+    """Handlers that touch the typed structs the way a display would"""
+    def on_tickers(tickers):
+        for ticker in tickers:
+            counts['tickers'] += ticker.last > 0
+
+    def on_depth(depth):
+        if depth.asks and depth.bids:
+            counts['depth'] += 1
+
+    dispatcher = MessageDispatcher(fallback=lambda data: None)
+    dispatcher.register('state.update', on_tickers, typed=True)
+    dispatcher.register('depth.update', on_depth, typed=True)
+    return dispatcher
+
+
+async def run_listen(frames, dispatch=False, heartbeat=False, latency=False, recorder_dir=None):
+    client = CoinExWebSocket(verbose=False)
+    client.websocket = MemoryConnection(frames)
+    client.subscriptions.subscribe('ticker', [f"COIN{i}USDT" for i in range(100)])
+    counts = {'tickers': 0, 'depth': 0}
+    callback = make_dispatcher(counts).dispatch if dispatch else (lambda data: None)
+    if heartbeat:
+        # Observing only; the ping and staleness tasks are not started
+        client.heartbeat = HeartbeatManager(client)
+    if latency:
+        client.latency = IngestLatency()
+    if recorder_dir is not None:
+        client.recorder = FrameRecorder(recorder_dir, segment_bytes=1 << 30)
+    start = time.perf_counter()
+    await client.listen(callback=callback)
+    elapsed = time.perf_counter() - start
+    if client.recorder is not None:
+        client.recorder.close()
+    return elapsed
+
+
+def best_of_async(loop, factory, repeat: int = 5) -> float:
+    return min(loop.run_until_complete(factory()) for _ in range(repeat))
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    source = sys.argv[2] if len(sys.argv) > 2 else None
+    if source:
+        frames = load_frames(source)
+    else:
+        frames = [gzip.compress(json.dumps(m).encode('utf-8')) for m in make_messages(count)]
+        source = "synthetic depth-50 x 100 markets"
+
+    print(f"CoinExWebSocket.listen() benchmark ({len(frames):,} frames, {source})")
+    print(f"JSON backend: {codec.JSON_BACKEND}")
+    print("=" * 70)
+    print(f"{'Path':<34} {'Total':>10} {'Per frame':>11} {'Frames/s':>12}")
+    print("-" * 70)
+
+    def decode_only():
+        for frame in frames:
+            codec.decode_frame(frame)
+
+    loop = asyncio.new_event_loop()
+    with tempfile.TemporaryDirectory() as tmp:
+        rows = [
+            ("decode_frame loop", best_of(decode_only)),
+            ("listen, no-op callback", best_of_async(loop, lambda: run_listen(frames))),
+            ("listen + dispatcher", best_of_async(loop, lambda: run_listen(frames, dispatch=True))),
+            ("  + heartbeat", best_of_async(loop, lambda: run_listen(frames, True, heartbeat=True))),
+            ("  + latency", best_of_async(loop, lambda: run_listen(frames, True, True, latency=True))),
+            ("  + recorder", best_of_async(loop, lambda: run_listen(frames, True, True, True, recorder_dir=tmp))),
+        ]
+    loop.close()
+
+    for label, elapsed in rows:
+        print(f"{label:<34} {elapsed * 1000:>8.1f}ms {elapsed / len(frames) * 1e6:>9.1f}us "
+              f"{len(frames) / elapsed:>12,.0f}")
+    print("-" * 70)
+    print(f"listen() overhead over bare decode: "
+          f"{(rows[1][1] - rows[0][1]) / len(frames) * 1e6:.2f}us per frame")
+
+
+if __name__ == "__main__":
+    main()
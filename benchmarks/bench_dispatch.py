@@ -0,0 +1,211 @@
+"""
+Message dispatch micro-benchmark
+
+Compares the original if/elif routing with per-field .get()/float() handling
+(as in TradingBot.handle_message before the dispatcher) against
+coinex_ws.dispatch.MessageDispatcher, with the default raw-dict handlers and
+with typed Ticker/DepthUpdate/Deal handlers (typed=True). All paths do the
+same work per message: 24h change, range and volume per ticker, spread per
+depth update and notional per trade.
+
+Each scenario runs with 1 and with 3 consumers per method (e.g. bot,
+display and alerting on one stream). The legacy and raw paths re-read and
+re-convert the fields in every consumer; the typed path decodes each message
+once (every field) and shares the structs.
+
+Usage:
+    python benchmarks/bench_dispatch.py [num_messages]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coinex_ws.dispatch import MessageDispatcher  # noqa: E402
+
+
+def make_messages(count: int, num_markets: int = 100, depth: int = 50, tickers_per_update: int = 10):
+    """Parsed state/depth/deals updates in the v2 message format"""
+    random.seed(42)
+    markets = [f"COIN{i}USDT" for i in range(num_markets)]
+    messages = []
+    for i in range(count):
+        market = markets[i % num_markets]
+        mid = random.uniform(1, 70000)
+        kind = i % 3
+        if kind == 0:
+            messages.append({"method": "state.update", "data": {"state_list": [{
+                "market": markets[(i + k) % num_markets], "last": f"{mid:.4f}", "open": f"{mid * 0.99:.4f}",
+                "close": f"{mid:.4f}", "high": f"{mid * 1.02:.4f}", "low": f"{mid * 0.97:.4f}",
+                "volume": f"{random.random() * 1e6:.4f}", "value": f"{random.random() * 1e8:.2f}", "period": 86400,
+            } for k in range(tickers_per_update)]}, "id": None})
+        elif kind == 1:
+            messages.append({"method": "depth.update", "data": {
+                "market": market, "is_full": False,
+                "depth": {
+                    "asks": [[f"{mid * (1 + 0.0001 * (k + 1)):.4f}", f"{random.random():.6f}"] for k in range(depth)],
+                    "bids": [[f"{mid * (1 - 0.0001 * (k + 1)):.4f}", f"{random.random():.6f}"] for k in range(depth)],
+                    "last": f"{mid:.4f}", "updated_at": 1700000000000 + i, "checksum": 1,
+                }}, "id": None})
+        else:
+            messages.append({"method": "deals.update", "data": {"market": market, "deal_list": [{
+                "deal_id": i * 10 + k, "created_at": 1700000000000 + i, "side": random.choice(("buy", "sell")),
+                "price": f"{mid:.4f}", "amount": f"{random.random():.6f}",
+            } for k in range(5)]}, "id": None})
+    return messages
+
+
+class LegacyHandler:
+    """if/elif routing with nested .get() and float() per field"""
+
+    def __init__(self):
+        self.total = 0.0
+
+    def handle_message(self, data):
+        method = data.get("method", "")
+        if method == "state.update":
+            state_list = data.get("data", {}).get("state_list", [])
+            for ticker in state_list:
+                try:
+                    last_price = float(ticker.get("last", "0"))
+                    open_price = float(ticker.get("open", "0"))
+                    change_24h = ((last_price - open_price) / open_price) * 100 if open_price > 0 else 0
+                    self.total += (change_24h + float(ticker.get("high", "0")) - float(ticker.get("low", "0"))
+                                   + float(ticker.get("volume", "0")))
+                except (ValueError, TypeError):
+                    pass
+        elif method == "depth.update":
+            depth_data = data.get("data", {}).get("depth", {})
+            asks = depth_data.get("asks", [])
+            bids = depth_data.get("bids", [])
+            if asks and bids:
+                try:
+                    self.total += float(asks[0][0]) - float(bids[0][0])
+                except (ValueError, TypeError, IndexError):
+                    pass
+        elif method == "deals.update":
+            for trade in data.get("data", {}).get("deal_list", []):
+                try:
+                    self.total += float(trade.get("price", 0)) * float(trade.get("amount", 0))
+                except (ValueError, TypeError):
+                    pass
+        elif method == "server.pong":
+            pass
+
+
+class RawHandler:
+    """Handlers registered on a MessageDispatcher, reading the message dicts"""
+
+    def __init__(self, dispatcher: MessageDispatcher):
+        self.total = 0.0
+        dispatcher.register("state.update", self.on_tickers)
+        dispatcher.register("depth.update", self.on_depth)
+        dispatcher.register("deals.update", self.on_deals)
+
+    def on_tickers(self, data):
+        for ticker in data["data"]["state_list"]:
+            try:
+                last_price = float(ticker["last"])
+                open_price = float(ticker["open"])
+                change_24h = ((last_price - open_price) / open_price) * 100 if open_price > 0 else 0
+                self.total += change_24h + float(ticker["high"]) - float(ticker["low"]) + float(ticker["volume"])
+            except (KeyError, ValueError, TypeError):
+                pass
+
+    def on_depth(self, data):
+        depth = data["data"]["depth"]
+        asks, bids = depth["asks"], depth["bids"]
+        if asks and bids:
+            try:
+                self.total += float(asks[0][0]) - float(bids[0][0])
+            except (ValueError, TypeError, IndexError):
+                pass
+
+    def on_deals(self, data):
+        for trade in data["data"]["deal_list"]:
+            try:
+                self.total += float(trade["price"]) * float(trade["amount"])
+            except (KeyError, ValueError, TypeError):
+                pass
+
+
+class TypedHandler:
+    """Handlers registered on a MessageDispatcher, reading typed structs"""
+
+    def __init__(self, dispatcher: MessageDispatcher):
+        self.total = 0.0
+        dispatcher.register("state.update", self.on_tickers, typed=True)
+        dispatcher.register("depth.update", self.on_depth, typed=True)
+        dispatcher.register("deals.update", self.on_deals, typed=True)
+
+    def on_tickers(self, tickers):
+        for ticker in tickers:
+            self.total += ticker.change_pct + ticker.high - ticker.low + ticker.volume
+
+    def on_depth(self, depth):
+        if depth.best_ask is not None and depth.best_bid is not None:
+            self.total += depth.best_ask - depth.best_bid
+
+    def on_deals(self, deals):
+        for deal in deals:
+            self.total += deal.price * deal.amount
+
+
+def best_of(func, repeat: int = 5) -> float:
+    """Best wall-clock time of several runs"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 60_000
+    messages = make_messages(count)
+
+    print(f"Dispatch benchmark ({count:,} messages: tickers x10, depth-50, 5 deals)")
+    print("=" * 72)
+    print(f"{'Path':<28} {'Consumers':>9} {'Total':>10} {'Messages/s':>12} {'Ratio':>8}")
+    print("-" * 72)
+
+    for consumers in (1, 3):
+        legacy = [LegacyHandler() for _ in range(consumers)]
+        raw_dispatcher = MessageDispatcher()
+        raw = [RawHandler(raw_dispatcher) for _ in range(consumers)]
+        typed_dispatcher = MessageDispatcher()
+        typed = [TypedHandler(typed_dispatcher) for _ in range(consumers)]
+
+        def run_legacy():
+            handlers = [handler.handle_message for handler in legacy]
+            for message in messages:
+                for handle in handlers:
+                    handle(message)
+
+        def run_dispatcher(dispatcher):
+            dispatch = dispatcher.dispatch
+            for message in messages:
+                dispatch(message)
+
+        legacy_time = best_of(run_legacy)
+        raw_time = best_of(lambda: run_dispatcher(raw_dispatcher))
+        typed_time = best_of(lambda: run_dispatcher(typed_dispatcher))
+        # All paths saw the same messages the same number of times
+        for handlers in (raw, typed):
+            assert abs(legacy[0].total - handlers[0].total) <= 1e-6 * abs(legacy[0].total)
+
+        print(f"{'if/elif + .get()/float()':<28} {consumers:>9} {legacy_time * 1000:>8.1f}ms "
+              f"{count / legacy_time:>12,.0f} {'':>8}")
+        for name, elapsed in (("MessageDispatcher (raw)", raw_time), ("MessageDispatcher (typed)", typed_time)):
+            print(f"{name:<28} {consumers:>9} {elapsed * 1000:>8.1f}ms "
+                  f"{count / elapsed:>12,.0f} {legacy_time / elapsed:>7.2f}x")
+    print("-" * 72)
+    print("Ratio = legacy time / dispatcher time (above 1 means the dispatcher is faster)")
+
+
+if __name__ == "__main__":
+    main()
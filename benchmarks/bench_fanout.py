@@ -0,0 +1,190 @@
+"""
+Shared-memory fan-out benchmark
+
+Compares K strategies each decoding the whole feed themselves (one
+connection per strategy) with one ingest process decoding once and
+publishing to coinex_ws.fanout rings that K consumer processes read.
+
+Part 1 measures the per-message cost of each stage in this process:
+decode (inflate + JSON), typed decode (Ticker/DepthUpdate/Deal), publish
+to the rings, and read + convert back to structs in a consumer. The CPU
+total for K strategies follows from those.
+
+Part 2 runs it for real: the frames are decoded and published here while
+K consumer processes poll the rings; each reports how many records it got,
+how many it lost, and its rate.
+
+Usage:
+    python benchmarks/bench_fanout.py [num_frames] [consumers]
+"""
+
+import gc
+import gzip
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_ws_decode import best_of, make_messages  # noqa: E402
+from coinex_ws import codec  # noqa: E402
+from coinex_ws.dispatch import DECODERS  # noqa: E402
+from coinex_ws.fanout import FanoutConsumer, FanoutPublisher  # noqa: E402
+
+PREFIX = "bench-fanout"
+
+
+def make_frames(count: int):
+    """Synthetic ticker/depth frames plus one deals.update every 10 messages"""
+    messages = make_messages(count)
+    for i in range(0, len(messages), 10):
+        messages[i] = {"method": "deals.update", "data": {"market": f"COIN{i % 100}USDT", "deal_list": [
+            {"deal_id": i * 10 + k, "created_at": 1700000000000 + i, "side": "buy" if k % 2 else "sell",
+             "price": f"{100 + k:.2f}", "amount": "0.5"} for k in range(5)]}, "id": None}
+    return [gzip.compress(json.dumps(m).encode('utf-8')) for m in messages]
+
+
+def consume(ready, results):
+    """Consumer process: count every record until the publisher closes the rings"""
+    counts = {'tickers': 0, 'depth': 0, 'trades': 0}
+
+    def on_tickers(tickers):
+        counts['tickers'] += len(tickers)
+
+    def on_depth(depth):
+        counts['depth'] += depth.best_bid is not None
+
+    def on_trades(deals):
+        counts['trades'] += len(deals)
+
+    consumer = FanoutConsumer(PREFIX, on_tickers=on_tickers, on_depth=on_depth, on_trades=on_trades)
+    ready.set()
+    start = None
+    while not consumer.closed:
+        if consumer.poll():
+            start = start or time.perf_counter()
+        else:
+            time.sleep(0.0005)
+    consumer.poll()
+    elapsed = time.perf_counter() - start if start else 0.0
+    stats = consumer.stats()
+    results.put({'records': sum(s['delivered'] for s in stats.values()),
+                 'lost': sum(s['lost'] for s in stats.values()), 'seconds': elapsed})
+    consumer.close()
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    consumers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    frames = make_frames(count)
+    messages = [codec.decode_frame(frame) for frame in frames]
+    capacity = {'ticker': 1 << 16, 'depth': 1 << 15, 'trades': 1 << 16}
+    # The decoded messages kept for the stages below are millions of objects
+    # a real consumer process would not hold; keep the collector off them
+    gc.freeze()
+
+    print(f"Shared-memory fan-out benchmark ({len(frames):,} frames, depth-50 x 100 markets)")
+    print("=" * 70)
+
+    def decode():
+        for frame in frames:
+            codec.decode_frame(frame)
+
+    def typed():
+        for message in messages:
+            DECODERS[message['method']](message)
+
+    publisher = FanoutPublisher(PREFIX, capacity=capacity, max_levels=50)
+
+    def publish():
+        for message in messages:
+            publisher.publish(message)
+
+    consumer = FanoutConsumer(PREFIX, on_tickers=lambda t: None, on_depth=lambda d: None,
+                              on_trades=lambda d: None, from_start=True)
+
+    publish()
+    per_run = dict(publisher.published)
+
+    def rewind():
+        # Back to the records of one publish run
+        for channel, reader in consumer.readers.items():
+            reader.next_seq = reader.ring.write_seq - per_run[channel] + 1
+
+    def read():
+        rewind()
+        while consumer.poll():
+            pass
+
+    def read_views():
+        # Zero-copy record views, e.g. a strategy that only needs last prices and best levels
+        rewind()
+        for channel, reader in consumer.readers.items():
+            while True:
+                records = reader.read()
+                if not len(records):
+                    break
+                records['seq'].max()
+                reader.check()
+
+    stages = [
+        ("decode (inflate + JSON)", best_of(decode)),
+        ("typed decode (structs)", best_of(typed)),
+        ("publish to rings", best_of(publish)),
+        ("consumer read + structs", best_of(read)),
+        ("consumer read, raw views", best_of(read_views)),
+    ]
+    consumer.close()
+    publisher.close()
+
+    print(f"{'Stage':<34} {'Total':>10} {'Per message':>13}")
+    print("-" * 70)
+    for label, elapsed in stages:
+        print(f"{label:<34} {elapsed * 1000:>8.1f}ms {elapsed / len(frames) * 1e6:>11.1f}us")
+    per = {label: elapsed / len(frames) * 1e6 for label, elapsed in stages}
+    own = per["decode (inflate + JSON)"] + per["typed decode (structs)"]
+    ingest = per["decode (inflate + JSON)"] + per["typed decode (structs)"] + per["publish to rings"]
+    read_structs = per["consumer read + structs"]
+    read_views = per["consumer read, raw views"]
+    print("-" * 70)
+    print("Total CPU per message (us) for K strategies")
+    print(f"{'K':<6} {'Own decode':>16} {'Fan-out, structs':>20} {'Fan-out, raw views':>22}")
+    for k in (1, 2, 4, 8):
+        print(f"{k:<6} {k * own:>16.1f} {ingest + k * read_structs:>20.1f} {ingest + k * read_views:>22.1f}")
+
+    # Part 2: live run with consumer processes
+    print("=" * 70)
+    print(f"Live run: 1 ingest process, {consumers} consumer processes, {os.cpu_count()} CPUs")
+    publisher = FanoutPublisher(PREFIX, capacity=capacity, max_levels=50)
+    ctx = multiprocessing.get_context('spawn')
+    results = ctx.Queue()
+    workers = []
+    for _ in range(consumers):
+        ready = ctx.Event()
+        worker = ctx.Process(target=consume, args=(ready, results))
+        worker.start()
+        ready.wait(30)
+        workers.append(worker)
+
+    start = time.perf_counter()
+    for frame in frames:
+        publisher.publish(codec.decode_frame(frame))
+    ingest_seconds = time.perf_counter() - start
+    published = sum(publisher.published.values())
+    time.sleep(0.5)
+    publisher.close()
+    reports = [results.get(timeout=60) for _ in workers]
+    for worker in workers:
+        worker.join()
+
+    print(f"Ingest: {len(frames):,} frames -> {published:,} records in {ingest_seconds * 1000:.0f}ms "
+          f"({len(frames) / ingest_seconds:,.0f} frames/s, decoded once)")
+    for i, report in enumerate(reports):
+        rate = report['records'] / report['seconds'] if report['seconds'] else 0.0
+        print(f"  consumer {i}: {report['records']:,} records, {report['lost']} lost, {rate:,.0f} records/s")
+
+
+if __name__ == "__main__":
+    main()
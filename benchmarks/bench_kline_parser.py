@@ -0,0 +1,84 @@
+"""
+Kline parser micro-benchmark
+
+Compares CoinExDailyData.parse_kline_data (per-row dicts with formatted
+dates) against the bulk column parser used by parse_kline_series, on
+synthetic payloads in both the array and dictionary response formats.
+
+Usage:
+    python benchmarks/bench_kline_parser.py [num_klines]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from candles import parse_klines  # noqa: E402
+from get_ohlcv import CoinExDailyData  # noqa: E402
+
+
+def make_klines(count: int, as_dict: bool):
+    """Synthetic daily klines in the API's array or dictionary format"""
+    random.seed(42)
+    price = 100.0
+    klines = []
+    for i in range(count):
+        price *= 1 + random.gauss(0, 0.02)
+        timestamp_ms = (1600000000 + i * 86400) * 1000
+        fields = [f"{price:.4f}", f"{price * 1.01:.4f}", f"{price * 1.02:.4f}",
+                  f"{price * 0.98:.4f}", f"{random.random() * 1000:.2f}", f"{random.random() * 1e5:.2f}"]
+        if as_dict:
+            klines.append({
+                'created_at': timestamp_ms,
+                'open': fields[0], 'close': fields[1], 'high': fields[2], 'low': fields[3],
+                'volume': fields[4], 'value': fields[5], 'market': 'BTCUSDT'
+            })
+        else:
+            klines.append([timestamp_ms] + fields + ['BTCUSDT'])
+    return klines
+
+
+def best_of(func, repeat: int = 5) -> float:
+    """Best wall-clock time of several runs"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    fetcher = CoinExDailyData(max_workers=1)
+
+    print(f"Kline parser benchmark ({count:,} klines)")
+    print("=" * 70)
+    print(f"{'Format':<8} {'parse_kline_data':>18} {'parse_klines':>14} {'series':>10} {'Speedup':>9}")
+    print("-" * 70)
+
+    for as_dict in (False, True):
+        klines = make_klines(count, as_dict)
+
+        rows_time = best_of(lambda: fetcher.parse_kline_data(klines), repeat=3)
+        bulk_time = best_of(lambda: parse_klines(klines))
+        series_time = best_of(lambda: fetcher.parse_kline_series(klines, 'BTCUSDT'))
+
+        label = 'dict' if as_dict else 'array'
+        print(f"{label:<8} {rows_time * 1000:>16.1f}ms {bulk_time * 1000:>12.1f}ms "
+              f"{series_time * 1000:>8.1f}ms {rows_time / bulk_time:>8.1f}x")
+
+    # Malformed rows go to the rejection report instead of per-row prints
+    klines = make_klines(1000, as_dict=False)
+    klines[10] = klines[10][:3]
+    klines[20][2] = 'n/a'
+    _, rejected = parse_klines(klines)
+    print("-" * 70)
+    print(f"Rejections on a payload with 2 bad rows: {[(r['index'], r['reason']) for r in rejected]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+WebSocket frame decode micro-benchmark
+
+Compares the original per-script decode path (gzip.decompress -> str ->
+json.loads) with coinex_ws.codec.decode_frame on gzip frames shaped like a
+depth-50 real-time feed on 100 markets, mixed with ticker updates.
+
+Frames can also be taken from a capture: a coinex_ws.recorder recording (a
+directory or .cxrec segment, replayed byte for byte), or a file with one
+JSON message per line (each message is gzip compressed the way CoinEx
+sends it).
+
+Usage:
+    python benchmarks/bench_ws_decode.py [num_frames] [recording_dir | capture.jsonl]
+"""
+
+import gzip
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coinex_ws import codec  # noqa: E402
+from coinex_ws.recorder import SEGMENT_SUFFIX, load_frames  # noqa: E402
+
+
+def legacy_decode(frame):
+    """Decode path previously copied into each WebSocket script"""
+    if isinstance(frame, bytes):
+        if len(frame) > 1 and frame[0] == 0x1f and frame[1] == 0x8b:
+            frame = gzip.decompress(frame).decode('utf-8')
+        else:
+            frame = frame.decode('utf-8')
+    return json.loads(frame)
+
+
+def make_messages(count: int, num_markets: int = 100, depth: int = 50):
+    """Synthetic depth.update (full depth-50 book) and state.update messages"""
+    random.seed(42)
+    markets = [f"COIN{i}USDT" for i in range(num_markets)]
+    messages = []
+    for i in range(count):
+        market = markets[i % num_markets]
+        mid = random.uniform(1, 70000)
+        if i % 10 == 9:
+            messages.append({
+                "method": "state.update",
+                "data": {"state_list": [{
+                    "market": market, "last": f"{mid:.4f}", "open": f"{mid * 0.99:.4f}",
+                    "close": f"{mid:.4f}", "high": f"{mid * 1.02:.4f}", "low": f"{mid * 0.97:.4f}",
+                    "volume": f"{random.random() * 1e6:.4f}", "value": f"{random.random() * 1e8:.2f}",
+                    "period": 86400,
+                }]},
+                "id": None
+            })
+            continue
+        asks = [[f"{mid * (1 + 0.0001 * (k + 1)):.4f}", f"{random.random() * 10:.6f}"] for k in range(depth)]
+        bids = [[f"{mid * (1 - 0.0001 * (k + 1)):.4f}", f"{random.random() * 10:.6f}"] for k in range(depth)]
+        messages.append({
+            "method": "depth.update",
+            "data": {
+                "market": market,
+                "is_full": True,
+                "depth": {
+                    "asks": asks, "bids": bids, "last": f"{mid:.4f}",
+                    "updated_at": 1700000000000 + i, "checksum": random.getrandbits(31),
+                },
+            },
+            "id": None
+        })
+    return messages
+
+
+def load_capture(path: str):
+    """Messages from a file with one JSON message per line"""
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def best_of(func, repeat: int = 5) -> float:
+    """Best wall-clock time of several runs"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    source = sys.argv[2] if len(sys.argv) > 2 else None
+    if source and (os.path.isdir(source) or source.endswith(SEGMENT_SUFFIX)):
+        frames = load_frames(source)
+    else:
+        if source:
+            messages = load_capture(source)
+        else:
+            messages = make_messages(count)
+            source = "synthetic depth-50 x 100 markets"
+        frames = [gzip.compress(json.dumps(m).encode('utf-8')) for m in messages]
+    assert all(codec.decode_frame(f) == legacy_decode(f) for f in frames[:200])
+
+    compressed = sum(len(f) for f in frames)
+    print(f"WebSocket frame decode benchmark ({len(frames):,} frames, {source})")
+    print(f"Average frame: {compressed / len(frames):,.0f} bytes compressed, JSON backend: {codec.JSON_BACKEND}")
+    print("=" * 70)
+    print(f"{'Path':<34} {'Total':>10} {'Per frame':>11} {'Frames/s':>12}")
+    print("-" * 70)
+
+    def run(decode):
+        for frame in frames:
+            decode(frame)
+
+    def inflate_only():
+        for frame in frames:
+            codec.decompress_frame(frame)
+
+    rows = [
+        ("gzip.decompress + str + json", best_of(lambda: run(legacy_decode))),
+        ("zlib inflate only", best_of(inflate_only)),
+        (f"decode_frame ({codec.JSON_BACKEND})", best_of(lambda: run(codec.decode_frame))),
+    ]
+    for label, elapsed in rows:
+        print(f"{label:<34} {elapsed * 1000:>8.1f}ms {elapsed / len(frames) * 1e6:>9.1f}us "
+              f"{len(frames) / elapsed:>12,.0f}")
+    print("-" * 70)
+    print(f"Speedup decode_frame vs original: {rows[0][1] / rows[2][1]:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+"""
+CoinEx Streaming Candle Aggregator
+
+Builds live OHLCV bars from the deals.update WebSocket feed instead of
+polling the REST kline endpoint:
+
+- Every deal updates the open bar of each interval (1s, 1m, 5m, 1h, 1d by
+  default) for its market.
+- A bar closes when a deal lands in a later bucket, or when the feed's
+  clock (the newest deal time seen on any market) passes the bar's end;
+  call close_due() periodically if the feed can be quiet.
+- Closed bars are kept per market and interval in RingBuffer columns
+  (ts, open, high, low, close, volume, value, trades) and handed to sinks,
+  e.g. StoreSink writing CSV/Parquet files through ohlcv_store.
+
+Intervals without any deal produce no bar. Deals are de-duplicated by
+deal_id, so the recent-deals snapshot sent on (re)subscribe is not counted
+twice.
+"""
+
+import asyncio
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+from candles import format_date, format_timestamp
+from ohlcv_store import open_store
+from ring_buffer import RingBuffer
+from coinex_ws.dispatch import Deal
+
+
+# Interval name -> length in seconds
+INTERVALS = {
+    '1s': 1,
+    '1m': 60,
+    '5m': 300,
+    '1h': 3600,
+    '1d': 86400,
+}
+
+BAR_FIELDS = (('ts', 'int64'), ('open', 'float64'), ('high', 'float64'), ('low', 'float64'),
+              ('close', 'float64'), ('volume', 'float64'), ('value', 'float64'), ('trades', 'int64'))
+
+
+class LiveBar:
+    """The open (not yet closed) bar of one market and interval"""
+
+    __slots__ = ('start', 'open', 'high', 'low', 'close', 'volume', 'value', 'trades')
+
+    def __init__(self, start: int, price: float, amount: float):
+        self.start = start
+        self.open = self.high = self.low = self.close = price
+        self.volume = amount
+        self.value = price * amount
+        self.trades = 1
+
+    def add(self, price: float, amount: float):
+        if price > self.high:
+            self.high = price
+        elif price < self.low:
+            self.low = price
+        self.close = price
+        self.volume += amount
+        self.value += price * amount
+        self.trades += 1
+
+    def as_tuple(self):
+        return (self.start, self.open, self.high, self.low, self.close, self.volume, self.value, self.trades)
+
+
+def bar_row(market: str, bar: LiveBar) -> Dict:
+    """Closed bar as a parse_kline_data-style row (for ohlcv_store)"""
+    return {
+        'Date': format_date(bar.start),
+        'Timestamp': format_timestamp(bar.start),
+        'Unix_Timestamp': bar.start,
+        'Open': bar.open,
+        'Close': bar.close,
+        'High': bar.high,
+        'Low': bar.low,
+        'Volume': bar.volume,
+        'Value': bar.value,
+        'Market': market,
+    }
+
+
+class CandleAggregator:
+    """Live multi-interval OHLCV bars per market from trade deals"""
+
+    def __init__(self, intervals: Iterable[str] = tuple(INTERVALS), history: int = 10_000,
+                 sinks: Optional[List[Callable]] = None):
+        """
+        Initialize the aggregator
+
+        Args:
+            intervals: Interval names from INTERVALS
+            history: Closed bars kept per market and interval
+            sinks: Callables receiving (market, interval, bar_row) for every closed bar
+        """
+        unknown = [name for name in intervals if name not in INTERVALS]
+        if unknown:
+            raise ValueError(f"Unknown intervals {unknown} (expected some of {list(INTERVALS)})")
+
+        self.intervals = [(name, INTERVALS[name]) for name in intervals]
+        self.history = history
+        self.sinks = list(sinks or [])
+        self.live = {}        # market -> {interval: LiveBar}
+        self.closed_end = {}  # market -> {interval: end of the newest closed bar}
+        self.closed = {}      # (market, interval) -> RingBuffer of closed bars
+        self.last_deal_id = {}
+        self.clock = 0        # Newest deal time seen (seconds)
+        self._next_sweep = 0
+        self.deals = 0
+        self.duplicates = 0
+        self.late = 0
+        self.bars_closed = 0
+
+    def add_sink(self, sink: Callable):
+        self.sinks.append(sink)
+
+    def _close(self, market: str, interval: str, bar: LiveBar):
+        key = (market, interval)
+        buffer = self.closed.get(key)
+        if buffer is None:
+            buffer = self.closed[key] = RingBuffer(self.history, BAR_FIELDS)
+        buffer.append(*bar.as_tuple())
+        self.closed_end.setdefault(market, {})[interval] = bar.start + INTERVALS[interval]
+        self.bars_closed += 1
+        if self.sinks:
+            row = bar_row(market, bar)
+            for sink in self.sinks:
+                sink(market, interval, row)
+
+    def add_deal(self, market: str, ts: float, price: float, amount: float):
+        """
+        Add one trade to every interval's open bar
+
+        Args:
+            market: Market pair
+            ts: Trade time in seconds
+            price, amount: Trade price and base amount
+        """
+        bars = self.live.get(market)
+        if bars is None:
+            bars = self.live[market] = {}
+        second = int(ts)
+        for name, length in self.intervals:
+            start = second - second % length
+            bar = bars.get(name)
+            if bar is None:
+                if start < self.closed_end.get(market, {}).get(name, 0):
+                    self.late += 1
+                else:
+                    bars[name] = LiveBar(start, price, amount)
+            elif start == bar.start:
+                bar.add(price, amount)
+            elif start > bar.start:
+                self._close(market, name, bar)
+                bars[name] = LiveBar(start, price, amount)
+            else:
+                # Older than the open bar (already closed); can't be applied
+                self.late += 1
+        self.deals += 1
+        if second > self.clock:
+            self.clock = second
+
+    def handle_deals(self, deals: List[Deal]):
+        """Dispatcher handler for deals.update (deal times are in milliseconds)"""
+        # Oldest first (a deals.update lists the newest deal first)
+        for deal in sorted(deals, key=lambda d: (d.created_at, d.deal_id)):
+            last_id = self.last_deal_id.get(deal.market, 0)
+            if deal.deal_id and deal.deal_id <= last_id:
+                self.duplicates += 1
+                continue
+            self.last_deal_id[deal.market] = deal.deal_id
+            self.add_deal(deal.market, deal.created_at / 1000, deal.price, deal.amount)
+
+        # Close bars on quiet markets at most once per second of feed time
+        if self.clock >= self._next_sweep:
+            self.close_due(self.clock)
+            self._next_sweep = self.clock + 1
+
+    def close_due(self, now: Optional[float] = None) -> int:
+        """
+        Close every open bar whose interval has ended
+
+        Args:
+            now: Current time in seconds (defaults to the feed clock, or wall
+                 time if no deal has been seen)
+
+        Returns:
+            Number of bars closed
+        """
+        if now is None:
+            now = self.clock or time.time()
+        closed = 0
+        for market, bars in self.live.items():
+            for name, length in self.intervals:
+                bar = bars.get(name)
+                if bar is not None and bar.start + length <= now:
+                    self._close(market, name, bar)
+                    del bars[name]
+                    closed += 1
+        return closed
+
+    def bars(self, market: str, interval: str, n: Optional[int] = None) -> Dict:
+        """
+        Closed bars of a market and interval as zero-copy column views
+
+        Returns:
+            Column name -> NumPy array (oldest first); empty dict if none yet
+        """
+        buffer = self.closed.get((market, interval))
+        return buffer.view(n) if buffer is not None else {}
+
+    def live_bar(self, market: str, interval: str) -> Optional[LiveBar]:
+        """The currently open bar (None if no deal in the current bucket)"""
+        return self.live.get(market, {}).get(interval)
+
+    def stats(self) -> Dict:
+        return {'deals': self.deals, 'duplicates': self.duplicates, 'late': self.late,
+                'bars_closed': self.bars_closed, 'markets': len(self.live)}
+
+    async def run_closer(self, period: float = 1.0):
+        """Close bars on wall-clock time so quiet markets still emit their bars"""
+        while True:
+            await asyncio.sleep(period)
+            self.close_due(max(self.clock, time.time()))
+
+
+class StoreSink:
+    """Buffer closed bars and write them to one ohlcv_store file per interval"""
+
+    def __init__(self, filename_pattern: str = "live_{interval}.csv", flush_every: int = 500,
+                 intervals: Optional[Iterable[str]] = None):
+        """
+        Initialize the sink
+
+        Args:
+            filename_pattern: File per interval, e.g. "live_{interval}.parquet"
+                              (the extension picks the store backend)
+            flush_every: Buffered bars per interval before writing
+            intervals: Intervals to store (default: all)
+        """
+        self.filename_pattern = filename_pattern
+        self.flush_every = flush_every
+        self.intervals = set(intervals) if intervals is not None else None
+        self.stores = {}
+        self.pending = {}
+
+    def __call__(self, market: str, interval: str, row: Dict):
+        if self.intervals is not None and interval not in self.intervals:
+            return
+        rows = self.pending.setdefault(interval, [])
+        rows.append(row)
+        if len(rows) >= self.flush_every:
+            self.flush(interval)
+
+    def flush(self, interval: Optional[str] = None):
+        """Write buffered bars (one interval, or all)"""
+        for name in ([interval] if interval else list(self.pending)):
+            rows = self.pending.get(name)
+            if not rows:
+                continue
+            store = self.stores.get(name)
+            if store is None:
+                store = self.stores[name] = open_store(self.filename_pattern.format(interval=name))
+            store.write(rows, append=True)
+            store.flush()
+            self.pending[name] = []
+
+
+async def main():
+    """Example: build live candles for a few markets and save them to CSV"""
+    from coinex_ws import CoinExWebSocket, MessageDispatcher
+
+    MARKETS = ["BTCUSDT", "ETHUSDT", "SOLUSDT"]
+    RUN_SECONDS = 180
+
+    sink = StoreSink("live_{interval}.csv", flush_every=50, intervals=['1m', '5m'])
+    aggregator = CandleAggregator(sinks=[sink])
+
+    dispatcher = MessageDispatcher()
+    dispatcher.register("deals.update", aggregator.handle_deals, typed=True)
+
+    client = CoinExWebSocket()
+    closer = asyncio.ensure_future(aggregator.run_closer())
+    try:
+        await client.connect()
+        await client.subscribe_trades_batch(MARKETS)
+        print(f"✓ Aggregating trades for {', '.join(MARKETS)} ({RUN_SECONDS}s)")
+        await asyncio.wait_for(client.listen(callback=dispatcher.dispatch), timeout=RUN_SECONDS)
+    except asyncio.TimeoutError:
+        pass
+    except KeyboardInterrupt:
+        print("\n\nShutting down...")
+    finally:
+        closer.cancel()
+        await client.close()
+        sink.flush()
+
+    print(f"\n{aggregator.stats()}")
+    for market in MARKETS:
+        bars = aggregator.bars(market, '1m')
+        if bars and len(bars['ts']):
+            print(f"{market}: {len(bars['ts'])} 1m bars, last close {bars['close'][-1]:,.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,296 @@
+"""
+Candle Series
+
+Array-backed candle storage for one market. Instead of one dict per candle
+with pre-formatted date strings, a CandleSeries keeps contiguous columns:
+
+- ts:      int64 Unix timestamps (seconds)
+- open, high, low, close, volume, value: float64
+
+Slicing returns views that share the parent's memory, so rolling windows
+cost nothing to create. Dates are only formatted when a row is read or the
+series is written out.
+"""
+
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+
+PRICE_FIELDS = ('open', 'high', 'low', 'close', 'volume', 'value')
+
+# Column names used by parse_kline_data rows and ohlcv_store files
+ROW_NAMES = {
+    'open': 'Open',
+    'high': 'High',
+    'low': 'Low',
+    'close': 'Close',
+    'volume': 'Volume',
+    'value': 'Value',
+}
+
+
+# Array-form kline layout: [timestamp, open, close, high, low, volume, value, market]
+ARRAY_POSITIONS = {'open': 1, 'close': 2, 'high': 3, 'low': 4, 'volume': 5, 'value': 6}
+
+
+def _columns_from_arrays(klines: List) -> Dict:
+    """Fast path: every kline is a list/tuple with at least 7 numeric fields"""
+    ts = np.array([k[0] for k in klines], dtype=np.int64)
+    ts = np.where(ts > 4000000000, ts // 1000, ts)
+    columns = {'ts': ts}
+    for name, position in ARRAY_POSITIONS.items():
+        columns[name] = np.array([k[position] for k in klines], dtype=np.float64)
+    last = klines[-1]
+    columns['market'] = last[7] if len(last) > 7 else ''
+    return columns
+
+
+def _columns_from_dicts(klines: List) -> Dict:
+    """Fast path: every kline is a dict"""
+    ts = np.array([k.get('created_at', k.get('timestamp', 0)) for k in klines], dtype=np.int64) // 1000
+    columns = {'ts': ts}
+    for name in PRICE_FIELDS:
+        if name == 'value':
+            raw = [k.get('value', k.get('amount', 0)) for k in klines]
+        else:
+            raw = [k.get(name, 0) for k in klines]
+        columns[name] = np.array(raw, dtype=np.float64)
+    columns['market'] = klines[-1].get('market', '')
+    return columns
+
+
+def _parse_one(kline) -> Tuple:
+    """Slow path for a single kline: (ts, values by PRICE_FIELDS, market)"""
+    if isinstance(kline, dict):
+        ts = int(kline.get('created_at', kline.get('timestamp', 0))) // 1000
+        values = tuple(float(kline.get(name, 0)) if name != 'value'
+                       else float(kline.get('value', kline.get('amount', 0))) for name in PRICE_FIELDS)
+        return ts, values, kline.get('market', '')
+    if isinstance(kline, (list, tuple)):
+        if len(kline) < 7:
+            raise IndexError("too short")
+        ts = int(kline[0])
+        ts = ts // 1000 if ts > 4000000000 else ts
+        values = tuple(float(kline[ARRAY_POSITIONS[name]]) for name in PRICE_FIELDS)
+        return ts, values, kline[7] if len(kline) > 7 else ''
+    raise TypeError(f"unknown kline format {type(kline).__name__}")
+
+
+def parse_klines(klines: List) -> Tuple[Dict, List[Dict]]:
+    """
+    Parse a whole klines payload into typed columns in one pass
+
+    Uniform payloads (all arrays or all dicts) are converted column-wise by
+    NumPy. If that fails, rows are parsed one at a time and malformed ones
+    are collected instead of printed.
+
+    Args:
+        klines: Kline data as returned by the API (dictionary or array form)
+
+    Returns:
+        Tuple of (columns, rejected):
+        - columns: 'ts' int64 seconds, 'open'...'value' float64 arrays, 'market' symbol
+        - rejected: list of {'index', 'reason', 'kline'} for dropped klines
+    """
+    if not HAS_NUMPY:
+        raise ImportError("numpy is required for parse_klines (pip install numpy)")
+
+    if klines:
+        try:
+            if all(isinstance(k, (list, tuple)) and len(k) >= 7 for k in klines):
+                columns = _columns_from_arrays(klines)
+            elif all(isinstance(k, dict) for k in klines):
+                columns = _columns_from_dicts(klines)
+            else:
+                columns = None
+
+            # Missing values (None) become NaN in the bulk conversion
+            if columns is not None and not any(np.isnan(columns[name]).any() for name in PRICE_FIELDS):
+                return columns, []
+        except (ValueError, TypeError, OverflowError):
+            pass
+
+    # Row-by-row fallback with a rejection report
+    rows = []
+    rejected = []
+    market = ''
+    for i, kline in enumerate(klines):
+        try:
+            ts, values, row_market = _parse_one(kline)
+        except (IndexError, ValueError, TypeError, KeyError, OverflowError) as e:
+            rejected.append({'index': i, 'reason': str(e) or type(e).__name__, 'kline': kline})
+            continue
+        rows.append((ts,) + values)
+        market = row_market or market
+
+    table = np.array(rows, dtype=np.float64).reshape(-1, 1 + len(PRICE_FIELDS))
+    columns = {'ts': np.array([row[0] for row in rows], dtype=np.int64)}
+    for position, name in enumerate(PRICE_FIELDS, 1):
+        columns[name] = table[:, position]
+    columns['market'] = market
+    return columns, rejected
+
+
+def rejection_summary(rejected: List[Dict], total: int) -> str:
+    """One-line summary of parse_klines rejections, grouped by reason"""
+    reasons = {}
+    for item in rejected:
+        reasons[item['reason']] = reasons.get(item['reason'], 0) + 1
+    details = ", ".join(f"{reason} x{count}" for reason, count in sorted(reasons.items(), key=lambda r: -r[1]))
+    return f"Rejected {len(rejected)} of {total} klines ({details})"
+
+
+def format_date(ts: int) -> str:
+    """Local calendar date of a Unix timestamp, as in parse_kline_data"""
+    return datetime.fromtimestamp(ts).strftime('%Y-%m-%d')
+
+
+def format_timestamp(ts: int) -> str:
+    """Local date and time of a Unix timestamp, as in parse_kline_data"""
+    return datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M:%S')
+
+
+class CandleSeries:
+    """Contiguous OHLCV arrays for a single market"""
+
+    __slots__ = ('market', 'ts') + PRICE_FIELDS
+
+    def __init__(self, market: str, ts, open, high, low, close, volume, value):
+        """
+        Initialize the series (arrays are used as-is when already typed)
+
+        Args:
+            market: Market symbol (e.g., 'BTCUSDT')
+            ts: Unix timestamps in seconds
+            open, high, low, close, volume, value: Per-candle values
+        """
+        if not HAS_NUMPY:
+            raise ImportError("numpy is required for CandleSeries (pip install numpy)")
+
+        self.market = market
+        self.ts = np.asarray(ts, dtype=np.int64)
+        self.open = np.asarray(open, dtype=np.float64)
+        self.high = np.asarray(high, dtype=np.float64)
+        self.low = np.asarray(low, dtype=np.float64)
+        self.close = np.asarray(close, dtype=np.float64)
+        self.volume = np.asarray(volume, dtype=np.float64)
+        self.value = np.asarray(value, dtype=np.float64)
+
+    @classmethod
+    def from_rows(cls, rows: List[Dict], market: str = '') -> 'CandleSeries':
+        """
+        Build a series from parse_kline_data-style row dicts
+
+        Args:
+            rows: Parsed kline rows
+            market: Market symbol (defaults to the first row's 'Market')
+        """
+        if not market and rows:
+            market = rows[0].get('Market', '')
+        return cls(
+            market,
+            [r.get('Unix_Timestamp', 0) for r in rows],
+            *([r.get(ROW_NAMES[name], 0) for r in rows] for name in PRICE_FIELDS)
+        )
+
+    @classmethod
+    def from_columns(cls, market: str, columns: Dict) -> 'CandleSeries':
+        """
+        Build a series from ohlcv_store.read_markets() columns
+
+        Args:
+            market: Market symbol
+            columns: Column name -> values (NumPy arrays are not copied)
+        """
+        return cls(
+            market,
+            columns['Unix_Timestamp'],
+            *(columns[ROW_NAMES[name]] for name in PRICE_FIELDS)
+        )
+
+    @classmethod
+    def from_klines(cls, klines: List, market: str = '') -> 'CandleSeries':
+        """
+        Parse raw CoinEx klines (dictionary or array form) into a series
+
+        Malformed klines are dropped; use parse_klines() directly to get
+        the rejection report.
+
+        Args:
+            klines: Kline data as returned by the API
+            market: Market symbol (defaults to the one in the klines)
+        """
+        columns, _ = parse_klines(klines)
+        return cls(market or columns['market'], columns['ts'],
+                   *(columns[name] for name in PRICE_FIELDS))
+
+    def __len__(self) -> int:
+        return len(self.ts)
+
+    def __getitem__(self, key):
+        """
+        Slice to a zero-copy view, or index to a single row dict
+
+        Args:
+            key: slice (returns CandleSeries sharing memory) or int (returns row dict)
+        """
+        if isinstance(key, slice):
+            return CandleSeries(self.market, self.ts[key],
+                                *(getattr(self, name)[key] for name in PRICE_FIELDS))
+        return self.row(key)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.row(i)
+
+    def row(self, i: int) -> Dict:
+        """Candle i as a parse_kline_data-style dict (dates formatted here)"""
+        ts = int(self.ts[i])
+        row = {
+            'Date': format_date(ts),
+            'Timestamp': format_timestamp(ts),
+            'Unix_Timestamp': ts,
+        }
+        for name in ('open', 'close', 'high', 'low', 'volume', 'value'):
+            row[ROW_NAMES[name]] = float(getattr(self, name)[i])
+        row['Market'] = self.market
+        return row
+
+    def date(self, i: int) -> str:
+        """Date string of candle i"""
+        return format_date(int(self.ts[i]))
+
+    def dates(self) -> List[str]:
+        """Date strings for every candle"""
+        return [format_date(ts) for ts in self.ts.tolist()]
+
+    def windows(self, window_size: int):
+        """Yield every rolling window as a zero-copy view"""
+        for start in range(len(self) - window_size + 1):
+            yield self[start:start + window_size]
+
+    def sorted(self) -> 'CandleSeries':
+        """Series in timestamp order (self if already sorted)"""
+        if len(self) < 2 or bool(np.all(self.ts[1:] >= self.ts[:-1])):
+            return self
+        order = np.argsort(self.ts, kind='stable')
+        return CandleSeries(self.market, self.ts[order],
+                            *(getattr(self, name)[order] for name in PRICE_FIELDS))
+
+    def to_rows(self) -> List[Dict]:
+        """Row dicts for writing out (CSV/Parquet stores)"""
+        return [self.row(i) for i in range(len(self))]
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the arrays (views report their parent's slice)"""
+        return self.ts.nbytes + sum(getattr(self, name).nbytes for name in PRICE_FIELDS)
+
+    def __repr__(self) -> str:
+        return f"CandleSeries({self.market!r}, {len(self)} candles)"
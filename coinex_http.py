@@ -0,0 +1,141 @@
+"""
+CoinEx REST Helpers
+
+Shared plumbing for the REST scripts: a pooled keep-alive HTTP session
+and a thread-safe token-bucket rate limiter used to pace concurrent
+requests to the CoinEx API.
+"""
+
+import threading
+import time
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import LatencyHistogram
+
+
+DEFAULT_HEADERS = {
+    "Accept": "application/json",
+    "Accept-Encoding": "gzip, deflate",
+    "Connection": "keep-alive",
+}
+
+_shared_session = None
+_shared_session_lock = threading.Lock()
+
+
+def create_session(pool_size: int = 16) -> requests.Session:
+    """
+    Create a pooled HTTP session with keep-alive and gzip enabled
+
+    Args:
+        pool_size: Maximum number of open connections kept per host
+
+    Returns:
+        Configured requests.Session
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update(DEFAULT_HEADERS)
+    return session
+
+
+def get_shared_session(pool_size: int = 16) -> requests.Session:
+    """
+    Get the process-wide CoinEx session, creating it on first use
+
+    Every script that talks to api.coinex.com shares this session, so
+    TCP/TLS connections are reused across calls instead of re-handshaking.
+
+    Args:
+        pool_size: Pool size used if the session does not exist yet
+    """
+    global _shared_session
+    with _shared_session_lock:
+        if _shared_session is None:
+            _shared_session = create_session(pool_size)
+        return _shared_session
+
+
+def timed_get(session: requests.Session, url: str,
+              histogram: Optional[LatencyHistogram] = None, **kwargs) -> requests.Response:
+    """
+    Issue a GET and record its wall-clock latency
+
+    Args:
+        session: Session to send the request on
+        url: Request URL
+        histogram: Histogram to record the latency into (optional)
+        **kwargs: Passed through to session.get (params, timeout, ...)
+
+    Returns:
+        The response
+    """
+    start = time.perf_counter()
+    try:
+        return session.get(url, **kwargs)
+    finally:
+        if histogram is not None:
+            histogram.record(time.perf_counter() - start)
+
+
+class TokenBucket:
+    """Thread-safe token-bucket rate limiter"""
+
+    def __init__(self, rate: float, capacity: float = None):
+        """
+        Initialize the token bucket
+
+        Args:
+            rate: Tokens added per second (sustained requests per second)
+            capacity: Maximum burst size (defaults to rate)
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+
+        self.rate = float(rate)
+        self.capacity = float(capacity) if capacity else float(rate)
+        self.tokens = self.capacity
+        self.last_refill = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        """Add the tokens accrued since the last refill (lock must be held)"""
+        now = time.monotonic()
+        elapsed = now - self.last_refill
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.last_refill = now
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """
+        Take tokens without waiting
+
+        Returns:
+            True if the tokens were taken, False if the bucket is short
+        """
+        with self.lock:
+            self._refill()
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens: float = 1.0):
+        """
+        Block until tokens are available, then take them
+
+        Args:
+            tokens: Number of tokens to take (usually 1 per request)
+        """
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / self.rate
+            time.sleep(wait)
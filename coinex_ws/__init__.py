@@ -0,0 +1,41 @@
+"""
+CoinEx WebSocket client package
+
+    from coinex_ws import CoinExWebSocket, MessageDispatcher
+
+    dispatcher = MessageDispatcher()
+    dispatcher.register('state.update', lambda tickers: print(tickers[0].last), typed=True)
+    client = CoinExWebSocket()
+    await client.connect()
+    await client.subscribe_tickers(["BTCUSDT", "ETHUSDT"])
+    await client.listen(callback=dispatcher.dispatch)
+
+Modules:
+    client         CoinExWebSocket: connection, auth, subscriptions, listen() loop
+    codec          Frame decoding (gzip inflate + JSON parse)
+    dispatch       Per-method handler routing, optionally with typed Ticker/DepthUpdate/Deal
+    subscriptions  Batched subscribe messages and the per-connection registry
+    rpc            Request/reply correlation by id
+    heartbeat      Scheduled pings, RTT and stale-feed resubscription
+    latency        Per-stage ingest latency histograms and exporters
+    ingest         Bounded per-channel queues between receive and handlers
+    pool           Subscriptions sharded over several self-healing connections
+    recorder       Raw frame capture and replay
+    fanout         Shared-memory rings from one ingest daemon to consumer processes
+"""
+
+from .client import WS_URL, CoinExWebSocket
+from .codec import JSON_BACKEND, FrameDecodeError, decode_frame
+from .dispatch import Deal, DepthUpdate, MessageDispatcher, Ticker
+from .heartbeat import HeartbeatManager
+from .rpc import RequestTracker, RpcError, RpcTimeout
+from .subscriptions import SubscriptionRegistry
+
+__all__ = [
+    'WS_URL', 'CoinExWebSocket',
+    'JSON_BACKEND', 'FrameDecodeError', 'decode_frame',
+    'Deal', 'DepthUpdate', 'MessageDispatcher', 'Ticker',
+    'HeartbeatManager',
+    'RequestTracker', 'RpcError', 'RpcTimeout',
+    'SubscriptionRegistry',
+]
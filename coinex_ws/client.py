@@ -0,0 +1,472 @@
+"""
+CoinEx WebSocket Client
+
+The one CoinExWebSocket used by every script in this repo: connection,
+authentication, batch subscriptions, request/reply correlation, heartbeat,
+and the listen() loop that decodes frames and hands messages to a callback.
+
+listen() is the hot path: per frame it records the raw frame (if a recorder
+is set), inflates and parses it, routes replies to pending requests and the
+subscription registry, runs the callback and records stage latencies (if an
+IngestLatency is set). Optional features cost one attribute check per frame
+when they are off.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import inspect
+import json
+import time
+import traceback
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional
+
+import websockets
+
+from .codec import FrameDecodeError, decode_frame, decompress_frame, loads
+from .dispatch import MessageDispatcher
+from .heartbeat import HeartbeatManager
+from .rpc import RequestTracker, RpcError, RpcTimeout
+from .subscriptions import SubscriptionRegistry
+
+WS_URL = "wss://socket.coinex.com/v2/spot"
+
+
+class CoinExWebSocket:
+    """CoinEx WebSocket API client with authentication"""
+
+    def __init__(self, access_id: Optional[str] = None, secret_key: Optional[str] = None,
+                 ws_url: str = WS_URL, verbose: bool = True):
+        """
+        Initialize the CoinEx WebSocket client
+
+        Args:
+            access_id: Your CoinEx API access ID (optional for public data)
+            secret_key: Your CoinEx API secret key (optional for public data)
+            ws_url: WebSocket endpoint
+            verbose: Print connection and subscription progress
+        """
+        self.access_id = access_id
+        self.secret_key = secret_key
+        self.ws_url = ws_url
+        self.verbose = verbose
+        self.websocket = None
+        self.authenticated = False
+        self.subscriptions = SubscriptionRegistry()
+        self.recorder = None   # Anything with record(frame, received_ns), e.g. recorder.FrameRecorder
+        self.latency = None    # latency.IngestLatency: per-stage latency histograms
+        self.heartbeat = None  # heartbeat.HeartbeatManager: see start_heartbeat()
+        # Pending requests by id; replies are routed to them from listen()
+        self.rpc = RequestTracker()
+        self._backlog = deque()  # Frames read by requests before listen() started
+
+        # Default (printing) handlers, routed by method; used when listen() has no callback
+        self.dispatcher = MessageDispatcher(fallback=self._print_other)
+        self.dispatcher.register("state.update", self._print_tickers)
+        self.dispatcher.register("depth.update", self._print_depth)
+        self.dispatcher.register("deals.update", self._print_deals)
+        self.dispatcher.register("order.update", self._print_order)
+        self.dispatcher.register("asset.update", self._print_balance)
+        self.dispatcher.register("server.pong", lambda data: None)
+
+    def _log(self, text: str):
+        if self.verbose:
+            print(text)
+
+    def _generate_signature(self, timestamp: int) -> str:
+        """
+        Generate signature for WebSocket authentication
+
+        Args:
+            timestamp: Unix timestamp in milliseconds
+
+        Returns:
+            Hexadecimal HMAC-SHA256 signature of the timestamp
+        """
+        return hmac.new(
+            self.secret_key.encode('utf-8'),
+            str(timestamp).encode('utf-8'),
+            hashlib.sha256
+        ).hexdigest()
+
+    async def connect(self):
+        """Establish WebSocket connection with deflate compression"""
+        self._log("Connecting to CoinEx WebSocket...")
+        # CoinEx v2 requires deflate compression
+        self.websocket = await websockets.connect(
+            self.ws_url,
+            compression='deflate'
+        )
+        self._backlog.clear()
+        self._log("Connected successfully!")
+
+    async def authenticate(self):
+        """
+        Authenticate the WebSocket connection
+        Requires access_id and secret_key to be set
+        """
+        if not self.access_id or not self.secret_key:
+            raise ValueError("API credentials required for authentication")
+
+        timestamp = int(time.time() * 1000)
+        signature = self._generate_signature(timestamp)
+
+        self._log("Authenticating...")
+        try:
+            await self.request("server.sign", {
+                "access_id": self.access_id,
+                "timestamp": timestamp,
+                "signature": signature
+            })
+        except (RpcError, RpcTimeout) as e:
+            print(f"✗ Authentication failed: {e}")
+            raise Exception("Authentication failed") from e
+
+        self.authenticated = True
+        self._log("✓ Authentication successful!")
+
+    async def request(self, method: str, params: Optional[Dict] = None,
+                      timeout: Optional[float] = None) -> Dict:
+        """
+        Send a request and wait for its reply
+
+        The request gets a unique id and its reply is matched by id in listen().
+        Before listen() runs, the reply is read here instead; other messages
+        read meanwhile are kept and handled by listen() later.
+
+        Args:
+            method: Request method (e.g. 'server.sign', 'server.ping')
+            params: Request params
+            timeout: Seconds to wait (default self.rpc.default_timeout)
+
+        Returns:
+            The reply message
+
+        Raises:
+            RpcError: The server answered with an error code
+            RpcTimeout: No reply within the timeout
+        """
+        message = {"method": method, "params": params or {}, "id": self.subscriptions.next_id()}
+        future = self.rpc.track(message)
+        try:
+            await self.websocket.send(json.dumps(message))
+        except Exception:
+            self.rpc.discard(message["id"])
+            raise
+        return await self.rpc.wait(message["id"], future, timeout, pump=self._receive_early)
+
+    async def _receive_early(self):
+        """Read one frame for a request waiting before listen() runs"""
+        message = await self.websocket.recv()
+        received_ns = time.time_ns()
+        try:
+            data = decode_frame(message)
+        except FrameDecodeError:
+            data = {}
+        if "id" in data:
+            self.rpc.resolve(data)
+        # Every frame (the reply too) still goes through listen() later
+        self._backlog.append((message, received_ns))
+
+    async def subscribe_markets(self, channel: str, markets: Iterable[str],
+                                send_interval: float = 0.1, wait: bool = False,
+                                timeout: Optional[float] = None, **params) -> Optional[Dict[str, List[str]]]:
+        """
+        Subscribe to a channel for many markets at once
+
+        Markets are sent in chunks (several markets per message) and tracked
+        in self.subscriptions, which records what the server confirms.
+
+        Args:
+            channel: 'ticker', 'depth' or 'trades'
+            markets: Market pairs (e.g., all USDT markets)
+            send_interval: Pause between chunk messages in seconds
+            wait: Wait for the replies (all chunks are sent first, then
+                  awaited together)
+            timeout: Seconds to wait for the replies
+            **params: Channel params (depth: limit, interval)
+
+        Returns:
+            With wait: markets by outcome ('confirmed', 'failed', 'timed_out')
+        """
+        messages = self.subscriptions.subscribe(channel, markets, **params)
+        futures = []
+        for i, message in enumerate(messages):
+            if i and send_interval:
+                await asyncio.sleep(send_interval)
+            if wait:
+                futures.append(self.rpc.track(message))
+            await self.websocket.send(json.dumps(message))
+        if not wait:
+            return None
+
+        results = await asyncio.gather(
+            *(self.rpc.wait(message["id"], future, timeout, pump=self._receive_early)
+              for message, future in zip(messages, futures)),
+            return_exceptions=True)
+        outcome = {'confirmed': [], 'failed': [], 'timed_out': []}
+        for message, result in zip(messages, results):
+            if isinstance(result, RpcTimeout):
+                key = 'timed_out'
+            elif isinstance(result, BaseException):
+                key = 'failed'
+            else:
+                key = 'confirmed'
+            outcome[key].extend(message["params"]["market_list"])
+        return outcome
+
+    async def resubscribe(self):
+        """Send every registered subscription again (after a reconnect)"""
+        messages = self.subscriptions.replay()
+        for message in messages:
+            await self.websocket.send(json.dumps(message))
+        if messages:
+            self._log(f"Resubscribed {self.subscriptions.count()} subscriptions in {len(messages)} messages")
+
+    async def resubscribe_markets(self, channel: str, markets: Iterable[str]):
+        """
+        Subscribe registered markets again with their params
+
+        The server answers with fresh state (a new depth snapshot), e.g. for
+        a local book that went out of sync.
+        """
+        for message in self.subscriptions.resubscribe(channel, markets):
+            await self.websocket.send(json.dumps(message))
+
+    async def unsubscribe_markets(self, channel: str, markets: Iterable[str]):
+        """
+        Unsubscribe a channel from many markets at once
+
+        Args:
+            channel: 'ticker', 'depth' or 'trades'
+            markets: Market pairs to drop
+        """
+        for message in self.subscriptions.unsubscribe(channel, markets):
+            await self.websocket.send(json.dumps(message))
+
+    async def subscribe_tickers(self, markets: Iterable[str]):
+        """
+        Subscribe to real-time ticker updates for many markets
+
+        Args:
+            markets: Market pairs (e.g., ['BTCUSDT', 'ETHUSDT', ...])
+        """
+        markets = list(markets)
+        self._log(f"Subscribing to tickers for {len(markets)} markets...")
+        await self.subscribe_markets('ticker', markets)
+
+    async def subscribe_depths(self, markets: Iterable[str], limit: int = 20, interval: str = "0"):
+        """
+        Subscribe to order book depth updates for many markets
+
+        Args:
+            markets: Market pairs
+            limit: Depth limit (5, 10, 20, 50, 100)
+            interval: Update interval ("0" for real-time, "0.1", "0.2", etc.)
+        """
+        markets = list(markets)
+        self._log(f"Subscribing to order book depth for {len(markets)} markets...")
+        await self.subscribe_markets('depth', markets, limit=limit, interval=interval)
+
+    async def subscribe_trades_batch(self, markets: Iterable[str]):
+        """
+        Subscribe to real-time trade updates for many markets
+
+        Args:
+            markets: Market pairs
+        """
+        markets = list(markets)
+        self._log(f"Subscribing to trades for {len(markets)} markets...")
+        await self.subscribe_markets('trades', markets)
+
+    async def subscribe_ticker(self, market: str):
+        """Subscribe to real-time ticker updates for a market (e.g., 'BTCUSDT')"""
+        await self.subscribe_tickers([market])
+
+    async def subscribe_depth(self, market: str, limit: int = 20, interval: str = "0"):
+        """Subscribe to order book depth updates for a market"""
+        await self.subscribe_depths([market], limit=limit, interval=interval)
+
+    async def subscribe_trades(self, market: str):
+        """Subscribe to real-time trade updates for a market"""
+        await self.subscribe_trades_batch([market])
+
+    async def _subscribe_private(self, method: str, label: str):
+        if not self.authenticated:
+            raise Exception(f"Authentication required for {label} subscription")
+        self._log(f"Subscribing to {label}...")
+        await self.request(method, {})
+
+    async def subscribe_user_deals(self):
+        """Subscribe to user's trade updates (requires authentication)"""
+        await self._subscribe_private("user_deals.subscribe", "user deals")
+
+    async def subscribe_user_order(self):
+        """Subscribe to user's order updates (requires authentication)"""
+        await self._subscribe_private("order.subscribe", "user orders")
+
+    async def subscribe_balance(self):
+        """Subscribe to balance updates (requires authentication)"""
+        await self._subscribe_private("asset.subscribe", "balance updates")
+
+    async def ping(self) -> float:
+        """
+        Send a ping and wait for the reply
+
+        Returns:
+            Round-trip time in seconds
+        """
+        start = time.perf_counter()
+        await self.request("server.ping")
+        return time.perf_counter() - start
+
+    def start_heartbeat(self, **kwargs) -> HeartbeatManager:
+        """
+        Ping on a schedule and watch subscribed markets for stale feeds
+
+        Args:
+            **kwargs: HeartbeatManager options (interval, pong_timeout, stale_after, ...)
+
+        Returns:
+            The running HeartbeatManager (also self.heartbeat)
+        """
+        if self.heartbeat is not None:
+            self.heartbeat.stop()
+        self.heartbeat = HeartbeatManager(self, **kwargs)
+        self.heartbeat.start()
+        return self.heartbeat
+
+    async def listen(self, callback: Optional[Callable] = None):
+        """
+        Listen for messages until the connection closes
+
+        Args:
+            callback: Called with every parsed message (default: print it via
+                      self.dispatcher); if it returns an awaitable, the next
+                      recv() waits for it. A callback error is reported and
+                      the loop goes on with the next message.
+        """
+        if callback is None:
+            callback = self._default_message_handler
+        async with self.rpc.recv_lock:
+            # Requests waiting from now on get their replies from this loop
+            self.rpc.listening = True
+
+        # Locals for the per-frame path
+        recv = self.websocket.recv
+        backlog = self._backlog
+        subscriptions = self.subscriptions
+        rpc = self.rpc
+        time_ns = time.time_ns
+        isawaitable = inspect.isawaitable
+        try:
+            while True:
+                if backlog:
+                    message, received_ns = backlog.popleft()
+                else:
+                    message = await recv()
+                    received_ns = time_ns()
+                if self.recorder is not None:
+                    self.recorder.record(message, received_ns)
+
+                # CoinEx sends gzip frames despite the deflate connection
+                try:
+                    payload = decompress_frame(message)
+                    decompressed_ns = time_ns()
+                    data = loads(payload)
+                    parsed_ns = time_ns()
+                except FrameDecodeError as e:
+                    print(f"⚠️  Error decoding message: {e}")
+                    print(f"   Raw message: {message[:200]}")
+                    continue
+
+                # Replies to our pings only feed the heartbeat
+                if self.heartbeat is not None and self.heartbeat.observe(data):
+                    continue
+
+                # Replies update the registry and complete their request (and still reach the callback)
+                if data.get("id") is not None:
+                    ack = subscriptions.acknowledge(data)
+                    if ack and not ack[2]:
+                        print(f"⚠️  {ack[0]} subscription failed for {len(ack[1])} markets: {data}")
+                    rpc.resolve(data)
+
+                try:
+                    # A queueing callback (ingest) returns an awaitable when it must block
+                    pending = callback(data)
+                    if pending is not None and isawaitable(pending):
+                        await pending
+                except Exception as e:
+                    print(f"⚠️  Error in callback: {e}")
+                    traceback.print_exc()
+
+                if self.latency is not None:
+                    self.latency.observe(data, received_ns, decompressed_ns, parsed_ns, time_ns())
+
+        except websockets.exceptions.ConnectionClosed:
+            self._log("Connection closed")
+        except Exception as e:
+            print(f"Error in listen: {e}")
+            traceback.print_exc()
+        finally:
+            rpc.listening = False
+            rpc.fail_all(ConnectionError("listen() stopped before the reply arrived"))
+
+    def _default_message_handler(self, data: Dict):
+        """Default message handler that prints received data"""
+        self.dispatcher.dispatch(data)
+
+    def _print_tickers(self, data: Dict):
+        # One update can carry several markets when subscribed in batches
+        for ticker in (data.get("data") or {}).get("state_list") or ():
+            print(f"\n📊 Ticker Update [{ticker.get('market', '')}]:")
+            print(f"   Last: {ticker.get('last')}")
+            print(f"   Volume: {ticker.get('volume')}")
+            print(f"   High: {ticker.get('high')}")
+            print(f"   Low: {ticker.get('low')}")
+
+    def _print_depth(self, data: Dict):
+        depth_data = data.get("data") or {}
+        # v2 nests the book under data.depth
+        depth = depth_data.get("depth", depth_data)
+        asks = depth.get("asks") or []
+        bids = depth.get("bids") or []
+        print(f"\n📖 Order Book Update [{depth_data.get('market', '')}]:")
+        print(f"   Asks: {len(asks)} levels")
+        print(f"   Bids: {len(bids)} levels")
+        if asks:
+            print(f"   Best Ask: {asks[0]}")
+        if bids:
+            print(f"   Best Bid: {bids[0]}")
+
+    def _print_deals(self, data: Dict):
+        deals_data = data.get("data") or {}
+        deals = deals_data.get("deal_list") or deals_data.get("deals") or []
+        if deals:
+            trade = deals[0]
+            print(f"\n💰 Trade [{deals_data.get('market', '')}]:")
+            print(f"   Price: {trade.get('price')}")
+            print(f"   Amount: {trade.get('amount')}")
+            print(f"   Type: {trade.get('side') or trade.get('type')}")
+
+    def _print_order(self, data: Dict):
+        print(f"\n📝 Order Update:")
+        print(json.dumps(data, indent=2))
+
+    def _print_balance(self, data: Dict):
+        print(f"\n💼 Balance Update:")
+        print(json.dumps(data, indent=2))
+
+    def _print_other(self, data: Dict):
+        print(f"\n📩 Received: {json.dumps(data, indent=2)}")
+
+    async def close(self):
+        """Close the WebSocket connection"""
+        if self.heartbeat is not None:
+            self.heartbeat.stop()
+        if self.websocket:
+            await self.websocket.close()
+            self._log("Connection closed")
+        if self.recorder is not None:
+            self.recorder.flush()
@@ -0,0 +1,107 @@
+"""
+CoinEx WebSocket Frame Decoding
+
+One decode path for every WebSocket client in this repo. CoinEx sends
+gzip-compressed binary frames even on a deflate connection; a frame may
+also arrive as plain bytes or text.
+
+- Gzip frames are inflated with a single zlib call (wbits=31 reads the gzip
+  header itself), skipping the Python-level header parsing in gzip.decompress.
+- The inflated bytes go straight to the JSON parser without an intermediate
+  str (the decode to str costs a full copy of the payload).
+- orjson or msgspec is used when installed; otherwise the standard library
+  json module, which also accepts bytes.
+
+Each gzip frame is a complete gzip member, so a streaming decompressobj
+cannot be carried from one frame to the next; the one-shot zlib call is
+the cheapest per-frame equivalent.
+"""
+
+import json
+import zlib
+from typing import Any, Dict, Union
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+try:
+    import msgspec
+    HAS_MSGSPEC = True
+except ImportError:
+    HAS_MSGSPEC = False
+
+
+GZIP_MAGIC = b'\x1f\x8b'
+
+# zlib window bits for "gzip header and trailer"
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+
+class FrameDecodeError(ValueError):
+    """A frame could not be decompressed or parsed"""
+
+
+def _select_backend():
+    """Fastest available bytes -> object JSON parser"""
+    if HAS_ORJSON:
+        return 'orjson', orjson.loads
+    if HAS_MSGSPEC:
+        return 'msgspec', msgspec.json.Decoder().decode
+    return 'json', json.loads
+
+
+JSON_BACKEND, _json_loads = _select_backend()
+
+
+def is_gzip(frame: bytes) -> bool:
+    """True if a binary frame starts with the gzip magic bytes"""
+    return frame[:2] == GZIP_MAGIC
+
+
+def decompress_frame(frame: Union[bytes, str]) -> Union[bytes, str]:
+    """
+    Inflate a gzip frame; other frames are returned unchanged
+
+    Raises:
+        FrameDecodeError: The frame looks like gzip but is corrupt
+    """
+    if isinstance(frame, (bytes, bytearray, memoryview)) and frame[:2] == GZIP_MAGIC:
+        try:
+            return zlib.decompress(frame, GZIP_WBITS)
+        except zlib.error as e:
+            raise FrameDecodeError(f"decompress: {e}") from e
+    return frame
+
+
+def loads(payload: Union[bytes, str]) -> Any:
+    """
+    Parse JSON from bytes or str with the selected backend
+
+    Raises:
+        FrameDecodeError: The payload is not valid JSON
+    """
+    try:
+        return _json_loads(payload)
+    except (ValueError, TypeError) as e:
+        # orjson/json/msgspec decode errors are all ValueError subclasses
+        raise FrameDecodeError(f"json: {e}") from e
+
+
+def decode_frame(frame: Union[bytes, str]) -> Dict:
+    """
+    Turn a received WebSocket frame into a message dict
+
+    Args:
+        frame: Text or binary frame as returned by websocket.recv()
+
+    Returns:
+        Parsed message
+
+    Raises:
+        FrameDecodeError: Decompression or JSON parsing failed
+    """
+    return loads(decompress_frame(frame))
+
@@ -0,0 +1,273 @@
+"""
+CoinEx WebSocket Message Dispatch
+
+Routes parsed messages to handlers registered per method. Handlers receive
+the message dict unchanged by default: a dict lookup replaces the if/elif
+chain, and each handler converts only the fields it reads.
+
+Handlers registered with typed=True receive structs for the market-data
+methods instead:
+
+    state.update  -> List[Ticker]
+    depth.update  -> DepthUpdate
+    deals.update  -> List[Deal]
+
+The structs are built once per message (every string price converted to
+float) and shared by all typed handlers of the method. That costs more
+than reading a few fields from the dict, so it pays off for handlers that
+use most fields (e.g. an order book applying every level) or when several
+consumers share one stream; see benchmarks/bench_dispatch.py.
+
+Example:
+    dispatcher = MessageDispatcher()
+    dispatcher.register('state.update', lambda tickers: print(tickers[0].last), typed=True)
+    await client.listen(callback=dispatcher.dispatch)
+"""
+
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+def to_float(value, default: Optional[float] = 0.0) -> Optional[float]:
+    """float() that maps missing or malformed values to a default"""
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return default
+
+
+class Ticker:
+    """One market's entry from a state.update"""
+
+    __slots__ = ('market', 'last', 'open', 'close', 'high', 'low', 'volume', 'value', 'period')
+
+    def __init__(self, market: str, last: float, open: float, close: float, high: float,
+                 low: float, volume: float, value: float, period: int = 86400):
+        self.market = market
+        self.last = last
+        self.open = open
+        self.close = close
+        self.high = high
+        self.low = low
+        self.volume = volume
+        self.value = value
+        self.period = period
+
+    @classmethod
+    def from_dict(cls, entry: Dict) -> 'Ticker':
+        try:
+            return cls(entry['market'], float(entry['last']), float(entry['open']),
+                       float(entry['close']), float(entry['high']), float(entry['low']),
+                       float(entry['volume']), float(entry['value']), entry.get('period', 86400))
+        except (KeyError, ValueError, TypeError):
+            # Partial or malformed entry: missing fields become 0
+            get = entry.get
+            return cls(get('market', ''), to_float(get('last')), to_float(get('open')),
+                       to_float(get('close')), to_float(get('high')), to_float(get('low')),
+                       to_float(get('volume')), to_float(get('value')), get('period', 86400))
+
+    @property
+    def change_pct(self) -> float:
+        """Change against the period open in percent (0 if there is no open)"""
+        return (self.last - self.open) / self.open * 100 if self.open > 0 else 0.0
+
+    def __repr__(self):
+        return f"Ticker({self.market} last={self.last})"
+
+
+class DepthUpdate:
+    """Order book update for one market
+
+    Levels stay as the exchange's [price, amount] string pairs (the checksum
+    is computed over the original strings); best bid/ask are converted once.
+    """
+
+    __slots__ = ('market', 'is_full', 'asks', 'bids', 'last', 'updated_at', 'checksum',
+                 'best_ask', 'best_bid')
+
+    def __init__(self, market: str, is_full: bool, asks: List, bids: List, last: float = 0.0,
+                 updated_at: int = 0, checksum: Optional[int] = None):
+        self.market = market
+        self.is_full = is_full
+        self.asks = asks
+        self.bids = bids
+        self.last = last
+        self.updated_at = updated_at
+        self.checksum = checksum
+        self.best_ask = to_float(asks[0][0], None) if asks else None
+        self.best_bid = to_float(bids[0][0], None) if bids else None
+
+    @classmethod
+    def from_data(cls, data: Dict) -> 'DepthUpdate':
+        # v2 nests the book under data.depth; older payloads put it on data
+        depth = data.get('depth', data)
+        return cls(data.get('market', ''), data.get('is_full', False),
+                   depth.get('asks') or [], depth.get('bids') or [],
+                   to_float(depth.get('last')), depth.get('updated_at', 0), depth.get('checksum'))
+
+    @property
+    def spread(self) -> Optional[float]:
+        if self.best_ask is None or self.best_bid is None:
+            return None
+        return self.best_ask - self.best_bid
+
+    def levels(self, side: str) -> List[Tuple[float, float]]:
+        """Float (price, amount) pairs for 'asks' or 'bids'"""
+        return [(float(price), float(amount)) for price, amount in getattr(self, side)]
+
+    def __repr__(self):
+        return f"DepthUpdate({self.market} bid={self.best_bid} ask={self.best_ask} full={self.is_full})"
+
+
+class Deal:
+    """One trade from a deals.update"""
+
+    __slots__ = ('market', 'deal_id', 'created_at', 'side', 'price', 'amount')
+
+    def __init__(self, market: str, deal_id: int, created_at: int, side: str, price: float, amount: float):
+        self.market = market
+        self.deal_id = deal_id
+        self.created_at = created_at
+        self.side = side
+        self.price = price
+        self.amount = amount
+
+    @classmethod
+    def from_dict(cls, market: str, entry: Dict) -> 'Deal':
+        try:
+            return cls(market, entry['deal_id'], entry['created_at'], entry['side'],
+                       float(entry['price']), float(entry['amount']))
+        except (KeyError, ValueError, TypeError):
+            get = entry.get
+            return cls(market, get('deal_id', 0), get('created_at', 0), get('side') or get('type', 'unknown'),
+                       to_float(get('price')), to_float(get('amount')))
+
+    @property
+    def notional(self) -> float:
+        return self.price * self.amount
+
+    def __repr__(self):
+        return f"Deal({self.market} {self.side} {self.amount}@{self.price})"
+
+
+def decode_tickers(message: Dict) -> List[Ticker]:
+    """Typed tickers from a state.update (one per market in state_list)"""
+    data = message.get('data') or {}
+    return [Ticker.from_dict(entry) for entry in data.get('state_list') or ()]
+
+
+def decode_depth(message: Dict) -> DepthUpdate:
+    """Typed order book update from a depth.update"""
+    return DepthUpdate.from_data(message.get('data') or {})
+
+
+def decode_deals(message: Dict) -> List[Deal]:
+    """Typed trades from a deals.update (v2 deal_list, or older deals)"""
+    data = message.get('data') or {}
+    market = data.get('market', '')
+    deals = data.get('deal_list')
+    if deals is None:
+        deals = data.get('deals') or ()
+    return [Deal.from_dict(market, entry) for entry in deals]
+
+
+# Method -> decoder building the typed payload for its handlers
+DECODERS = {
+    'state.update': decode_tickers,
+    'depth.update': decode_depth,
+    'deals.update': decode_deals,
+}
+
+
+class MessageDispatcher:
+    """Route messages by method to registered handlers"""
+
+    def __init__(self, fallback: Optional[Callable] = None, on_error: Optional[Callable] = None):
+        """
+        Initialize the dispatcher
+
+        Args:
+            fallback: Called with the raw message when no handler matches
+                      (subscription replies, pongs, errors)
+            on_error: Called as on_error(method, exception, message) when a
+                      decoder or handler raises (defaults to a warning print)
+        """
+        self.fallback = fallback
+        self.on_error = on_error or self._print_error
+        # method -> (decoder or None, [typed handlers], [raw handlers])
+        self.routes = {}
+        self.dispatched = 0
+        self.unhandled = 0
+        self.errors = 0
+
+    @staticmethod
+    def _print_error(method: str, error: Exception, message: Dict):
+        print(f"⚠️  Error handling {method or 'message'}: {error}")
+
+    def register(self, method: str, handler: Callable, typed: bool = False):
+        """
+        Register a handler for a method
+
+        Args:
+            method: Message method (e.g. 'state.update')
+            handler: Receives the message dict, or the typed payload (see
+                     DECODERS) when typed=True
+            typed: Pass the decoded structs (ignored for methods without a decoder)
+        """
+        route = self.routes.get(method)
+        if route is None:
+            route = self.routes[method] = (DECODERS.get(method), [], [])
+        decoder, typed_handlers, raw_handlers = route
+        if typed and decoder is not None:
+            typed_handlers.append(handler)
+        else:
+            raw_handlers.append(handler)
+
+    def on(self, method: str, typed: bool = False):
+        """Decorator form of register()"""
+        def decorator(handler):
+            self.register(method, handler, typed=typed)
+            return handler
+        return decorator
+
+    def dispatch(self, message: Dict) -> bool:
+        """
+        Hand a message to the handlers registered for its method
+
+        Returns:
+            True if a handler was registered for the method
+        """
+        method = message.get('method')
+        route = self.routes.get(method)
+        if route is None:
+            self.unhandled += 1
+            if self.fallback:
+                self.fallback(message)
+            return False
+
+        self.dispatched += 1
+        decoder, typed_handlers, raw_handlers = route
+        # Each handler is guarded on its own, so one consumer's bug does not
+        # starve the others of the message
+        for handler in raw_handlers:
+            try:
+                handler(message)
+            except Exception as e:
+                self._failed(method, e, message)
+        if typed_handlers:
+            try:
+                payload = decoder(message)
+            except Exception as e:
+                self._failed(method, e, message)
+                return True
+            for handler in typed_handlers:
+                try:
+                    handler(payload)
+                except Exception as e:
+                    self._failed(method, e, message)
+        return True
+
+    def _failed(self, method: str, error: Exception, message: Dict):
+        self.errors += 1
+        self.on_error(method, error, message)
+
+    __call__ = dispatch
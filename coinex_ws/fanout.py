@@ -0,0 +1,681 @@
+"""
+Shared-Memory Fan-out from One Ingest Process to Many Consumers
+
+Running several TradingBot-style strategies normally means several
+connections, each decoding the same frames. Here one ingest daemon owns the
+connections (a WebSocketPool), decodes every message once, and publishes
+fixed-size records into shared-memory ring buffers, one per channel:
+
+    <prefix>-ticker   one record per market of a state.update
+    <prefix>-depth    one record per depth.update (levels as the exchange's strings,
+                      packed "price amount price amount ..." per side)
+    <prefix>-trades   one record per deal of a deals.update
+    <prefix>-markets  market id -> name table, plus resync request flags
+
+Each ring starts with a header holding the sequence number of the newest
+record; record n lives in slot (n - 1) % capacity and carries n in its
+'seq' field. Before writing a batch the writer also publishes the last
+sequence number it is about to write (the reservation), so readers know
+which slots may be changing under them. There is a single writer; any
+number of local processes attach with FanoutConsumer and read without locks:
+
+- read() returns a zero-copy NumPy view of the new slots (up to the wrap
+  point), straight over the shared buffer.
+- A reader that falls more than a ring behind skips to the oldest record
+  the writer cannot be overwriting and counts the skipped records as lost.
+- check() tells whether the writer may have overwritten the last batch while
+  it was being handled (its reservation lapped the reader); that batch is
+  lost too.
+
+FanoutConsumer turns records back into Ticker / DepthUpdate / Deal structs
+for existing handlers, so a TradingBot runs unchanged in its own process.
+Depth records keep the price/amount strings, so local books still verify
+the exchange checksum. A consumer that lost depth records (or whose book
+failed its checksum) sets the market's resync flag; the daemon resubscribes
+the market and a new snapshot flows to every consumer.
+
+Start the daemon, then any number of consumers (python Callbacks.py fanout
+runs a TradingBot on the rings):
+
+    python -m coinex_ws.fanout daemon BTCUSDT ETHUSDT SOLUSDT
+
+Needs numpy. The daemon must be started before the consumers, and consumers
+stop when the daemon shuts down (the rings are marked closed).
+"""
+
+import asyncio
+import time
+from itertools import chain
+from multiprocessing import resource_tracker, shared_memory
+from typing import Callable, Dict, Iterable, List, Optional
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+from .dispatch import Deal, DepthUpdate, Ticker, decode_deals, decode_depth, decode_tickers
+
+FANOUT_MAGIC = b"CXFANOUT"
+HEADER_BYTES = 64
+
+# Room per price/amount string in depth records, and width of market names
+PRICE_WIDTH = 32
+NAME_WIDTH = 32
+
+SIDE_CODES = {'buy': 1, 'sell': -1}
+SIDE_NAMES = {1: 'buy', -1: 'sell', 0: 'unknown'}
+
+DEFAULT_CAPACITY = {
+    'ticker': 65536,
+    'depth': 8192,
+    'trades': 65536,
+}
+
+# Depth records converted per batch; each holds ~100 small lists, and large
+# batches of them make the garbage collector the main cost of a read
+DEPTH_BATCH = 64
+
+
+def _header_dtype():
+    # reserve_seq: last record of the batch being written (>= write_seq)
+    # levels: levels per side of depth records (0 for the other rings)
+    return np.dtype([('magic', 'S8'), ('write_seq', '<i8'), ('reserve_seq', '<i8'), ('capacity', '<i8'),
+                     ('itemsize', '<i8'), ('levels', '<i8'), ('closed', '<i8'), ('created_ns', '<i8')])
+
+
+def ticker_dtype():
+    return np.dtype([('seq', '<i8'), ('ts', '<i8'), ('market_id', '<i4'), ('period', '<i4'),
+                     ('last', '<f8'), ('open', '<f8'), ('close', '<f8'), ('high', '<f8'),
+                     ('low', '<f8'), ('volume', '<f8'), ('value', '<f8')])
+
+
+def trade_dtype():
+    return np.dtype([('seq', '<i8'), ('ts', '<i8'), ('deal_id', '<i8'), ('market_id', '<i4'),
+                     ('side', 'i1'), ('price', '<f8'), ('amount', '<f8')])
+
+
+def depth_dtype(max_levels: int):
+    return np.dtype([('seq', '<i8'), ('ts', '<i8'), ('checksum', '<i8'), ('last', '<f8'),
+                     ('market_id', '<i4'), ('n_asks', '<i2'), ('n_bids', '<i2'),
+                     ('is_full', 'u1'), ('has_checksum', 'u1'),
+                     ('asks', f'S{2 * PRICE_WIDTH * max_levels}'),
+                     ('bids', f'S{2 * PRICE_WIDTH * max_levels}')])
+
+
+def pack_levels(levels: List) -> bytes:
+    """[[price, amount], ...] -> b"price amount price amount ..." """
+    return ' '.join(chain.from_iterable(levels)).encode()
+
+
+def unpack_levels(packed: bytes) -> List[List[str]]:
+    """Inverse of pack_levels"""
+    if not packed:
+        return []
+    fields = iter(packed.decode().split(' '))
+    return [[price, amount] for price, amount in zip(fields, fields)]
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """Open an existing block without letting this process's exit unlink it"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Before Python 3.13 every attach is registered with the resource
+        # tracker, which unlinks the block when this process exits
+        shm = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(shm._name, 'shared_memory')
+        return shm
+
+
+def _unlink(shm: shared_memory.SharedMemory):
+    """Remove a block and its resource tracker entry"""
+    # A consumer spawned from the creating process shares its tracker, and
+    # its attach-time unregister also drops the creator's entry; registering
+    # again (a no-op if still present) keeps unlink's unregister balanced
+    resource_tracker.register(shm._name, 'shared_memory')
+    shm.unlink()
+
+
+def _create(name: str, size: int) -> shared_memory.SharedMemory:
+    """Create a block, replacing one left behind by a crashed daemon"""
+    try:
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+    except FileExistsError:
+        stale = shared_memory.SharedMemory(name=name)
+        stale.close()
+        _unlink(stale)
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+    return shm
+
+
+class SharedRing:
+    """Fixed-size record ring in a shared-memory block"""
+
+    def __init__(self, name: str, dtype=None, capacity: int = 0, create: bool = False, levels: int = 0):
+        """
+        Create (writer) or attach to (reader) a ring
+
+        Args:
+            name: Shared memory block name
+            dtype: Record dtype (required to create; checked on attach, and
+                   taken from the header for depth rings when None)
+            capacity: Records kept (required to create)
+            create: Create the block instead of attaching
+            levels: Levels per side, for depth rings
+        """
+        if not HAS_NUMPY:
+            raise ImportError("numpy is required for shared-memory fan-out (pip install numpy)")
+        self.name = name
+        self.owner = create
+        header_dtype = _header_dtype()
+        if create:
+            if capacity < 1:
+                raise ValueError("capacity must be at least 1")
+            self.shm = _create(name, HEADER_BYTES + capacity * dtype.itemsize)
+            self.header = np.ndarray((), dtype=header_dtype, buffer=self.shm.buf)
+            self.header['magic'] = FANOUT_MAGIC
+            self.header['write_seq'] = 0
+            self.header['reserve_seq'] = 0
+            self.header['capacity'] = capacity
+            self.header['itemsize'] = dtype.itemsize
+            self.header['levels'] = levels
+            self.header['closed'] = 0
+            self.header['created_ns'] = time.time_ns()
+        else:
+            self.shm = _attach(name)
+            self.header = np.ndarray((), dtype=header_dtype, buffer=self.shm.buf)
+            if self.header['magic'] != FANOUT_MAGIC:
+                self.close()
+                raise ValueError(f"shared memory block {name} is not a fan-out ring")
+            capacity = int(self.header['capacity'])
+            if dtype is None and self.header['levels']:
+                dtype = depth_dtype(int(self.header['levels']))
+            if dtype is None or dtype.itemsize != int(self.header['itemsize']):
+                self.close()
+                raise ValueError(f"{name}: record layout differs from the publisher's")
+        self.capacity = capacity
+        self.records = np.ndarray((capacity,), dtype=dtype, buffer=self.shm.buf, offset=HEADER_BYTES)
+
+    @property
+    def write_seq(self) -> int:
+        """Sequence number of the newest published record"""
+        return int(self.header['write_seq'])
+
+    @property
+    def reserve_seq(self) -> int:
+        """Sequence number of the last record the writer may be writing"""
+        return int(self.header['reserve_seq'])
+
+    @property
+    def closed(self) -> bool:
+        return bool(self.header['closed'])
+
+    def close(self, unlink: bool = False):
+        """Detach (and remove the block, for the owner)"""
+        if self.shm is None:
+            return
+        if self.owner:
+            self.header['closed'] = 1
+        # Views into the buffer must be gone before it can be closed
+        self.header = self.records = None
+        self.shm.close()
+        if unlink:
+            _unlink(self.shm)
+        self.shm = None
+
+
+class MarketTable:
+    """Market id -> name mapping and per-market resync flags in shared memory"""
+
+    def __init__(self, name: str, max_markets: int = 4096, create: bool = False):
+        """
+        Create (writer) or attach to (reader) the table
+
+        Layout: int64 market count, int64 max_markets, names, resync flags.
+        """
+        if not HAS_NUMPY:
+            raise ImportError("numpy is required for shared-memory fan-out (pip install numpy)")
+        if create:
+            self.shm = _create(name, 16 + max_markets * (NAME_WIDTH + 1))
+        else:
+            self.shm = _attach(name)
+        sizes = np.ndarray((2,), dtype='<i8', buffer=self.shm.buf)
+        if create:
+            sizes[:] = (0, max_markets)
+        self.max_markets = max_markets = int(sizes[1])
+        self.count = sizes[:1]
+        self.names = np.ndarray((max_markets,), dtype=f'S{NAME_WIDTH}', buffer=self.shm.buf, offset=16)
+        self.resync = np.ndarray((max_markets,), dtype='u1', buffer=self.shm.buf,
+                                 offset=16 + max_markets * NAME_WIDTH)
+        self.ids = {}
+        self._names = []
+
+    def id_for(self, market: str) -> int:
+        """Id of a market, adding it to the table on first use (writer side)"""
+        market_id = self.ids.get(market)
+        if market_id is None:
+            market_id = len(self._names)
+            if market_id >= self.max_markets:
+                raise ValueError(f"market table full ({self.max_markets} markets)")
+            # The name is in place before any record refers to the id
+            self.names[market_id] = market.encode('utf-8')
+            self.count[0] = market_id + 1
+            self.ids[market] = market_id
+            self._names.append(market)
+        return market_id
+
+    def _refresh(self):
+        """Pick up names the writer added since the last look (reader side)"""
+        for i in range(len(self._names), int(self.count[0])):
+            market = self.names[i].decode('utf-8')
+            self._names.append(market)
+            self.ids[market] = i
+
+    def name(self, market_id: int) -> str:
+        """Market name of an id"""
+        if market_id >= len(self._names):
+            self._refresh()
+        return self._names[market_id]
+
+    def request_resync(self, market: str) -> bool:
+        """Ask the daemon to resubscribe a market (reader side)"""
+        if market not in self.ids:
+            self._refresh()
+        market_id = self.ids.get(market)
+        if market_id is None:
+            return False
+        self.resync[market_id] = 1
+        return True
+
+    def take_resync_requests(self) -> List[str]:
+        """Markets flagged for resync since the last call, clearing the flags (writer side)"""
+        flagged = np.flatnonzero(self.resync[:len(self._names)])
+        if not len(flagged):
+            return []
+        self.resync[flagged] = 0
+        return [self._names[i] for i in flagged]
+
+    def close(self, unlink: bool = False):
+        if self.shm is None:
+            return
+        self.count = self.names = self.resync = None
+        self.shm.close()
+        if unlink:
+            _unlink(self.shm)
+        self.shm = None
+
+
+class FanoutPublisher:
+    """Decode messages once and publish the records to shared-memory rings"""
+
+    def __init__(self, prefix: str = "coinex", capacity: Optional[Dict[str, int]] = None,
+                 max_levels: int = 50, max_markets: int = 4096):
+        """
+        Create the shared-memory blocks
+
+        Args:
+            prefix: Block name prefix (consumers attach with the same prefix)
+            capacity: Records per ring by channel (default DEFAULT_CAPACITY)
+            max_levels: Levels per side in a depth record (at least the
+                        subscribed depth limit)
+            max_markets: Size of the market table
+        """
+        capacity = {**DEFAULT_CAPACITY, **(capacity or {})}
+        self.prefix = prefix
+        self.max_levels = max_levels
+        self._side_bytes = 2 * PRICE_WIDTH * max_levels
+        self.markets = MarketTable(f"{prefix}-markets", max_markets, create=True)
+        self.rings = {
+            'ticker': SharedRing(f"{prefix}-ticker", ticker_dtype(), capacity['ticker'], create=True),
+            'depth': SharedRing(f"{prefix}-depth", depth_dtype(max_levels), capacity['depth'], create=True,
+                                levels=max_levels),
+            'trades': SharedRing(f"{prefix}-trades", trade_dtype(), capacity['trades'], create=True),
+        }
+        self._seq = {channel: 0 for channel in self.rings}
+        self.published = {channel: 0 for channel in self.rings}
+        self.truncated = 0
+        self.errors = 0
+
+    def _reserve(self, channel: str, count: int):
+        # Announce the batch before touching its slots, so readers stop
+        # trusting the records it overwrites
+        self.rings[channel].header['reserve_seq'] = self._seq[channel] + count
+
+    def _slot(self, channel: str):
+        """Next record's (seq, slot index)"""
+        seq = self._seq[channel] = self._seq[channel] + 1
+        return seq, (seq - 1) % self.rings[channel].capacity
+
+    def _commit(self, channel: str, count: int):
+        # Readers see the records once the header moves; records are complete by then
+        self.rings[channel].header['write_seq'] = self._seq[channel]
+        self.published[channel] += count
+
+    def publish_tickers(self, tickers: List[Ticker], ts: int):
+        records = self.rings['ticker'].records
+        self._reserve('ticker', len(tickers))
+        for ticker in tickers:
+            seq, slot = self._slot('ticker')
+            records[slot] = (seq, ts, self.markets.id_for(ticker.market), ticker.period, ticker.last,
+                             ticker.open, ticker.close, ticker.high, ticker.low, ticker.volume, ticker.value)
+        self._commit('ticker', len(tickers))
+
+    def publish_depth(self, depth: DepthUpdate):
+        records = self.rings['depth'].records
+        asks, bids = depth.asks, depth.bids
+        if len(asks) > self.max_levels or len(bids) > self.max_levels:
+            self.truncated += 1
+            asks, bids = asks[:self.max_levels], bids[:self.max_levels]
+        packed_asks, packed_bids = pack_levels(asks), pack_levels(bids)
+        if len(packed_asks) > self._side_bytes or len(packed_bids) > self._side_bytes:
+            # Only with strings longer than PRICE_WIDTH; a cut-off level would corrupt the book
+            raise ValueError(f"depth levels of {depth.market} do not fit a record")
+        self._reserve('depth', 1)
+        seq, slot = self._slot('depth')
+        # One tuple assignment; setting fields one by one costs twice as much
+        records[slot] = (seq, depth.updated_at or 0, depth.checksum or 0, depth.last,
+                         self.markets.id_for(depth.market), len(asks), len(bids), depth.is_full,
+                         depth.checksum is not None, packed_asks, packed_bids)
+        self._commit('depth', 1)
+
+    def publish_trades(self, deals: List[Deal]):
+        records = self.rings['trades'].records
+        self._reserve('trades', len(deals))
+        for deal in deals:
+            seq, slot = self._slot('trades')
+            records[slot] = (seq, deal.created_at, deal.deal_id, self.markets.id_for(deal.market),
+                             SIDE_CODES.get(deal.side, 0), deal.price, deal.amount)
+        self._commit('trades', len(deals))
+
+    def publish(self, message: Dict):
+        """
+        Publish one parsed message (use as the listen() callback)
+
+        Other methods (replies, pongs, account updates) are ignored.
+        """
+        method = message.get('method')
+        try:
+            if method == 'state.update':
+                self.publish_tickers(decode_tickers(message), time.time_ns() // 1_000_000)
+            elif method == 'depth.update':
+                self.publish_depth(decode_depth(message))
+            elif method == 'deals.update':
+                # Oldest first, as a consumer's history expects (the exchange lists the newest first)
+                self.publish_trades(sorted(decode_deals(message), key=lambda deal: deal.created_at))
+        except Exception as e:
+            self.errors += 1
+            print(f"⚠️  Error publishing {method}: {e}")
+
+    __call__ = publish
+
+    def stats(self) -> Dict:
+        return {'published': dict(self.published), 'markets': len(self.markets.ids),
+                'truncated': self.truncated, 'errors': self.errors}
+
+    def close(self):
+        """Mark the rings closed (consumers stop) and remove the shared memory"""
+        for ring in self.rings.values():
+            ring.close(unlink=True)
+        self.markets.close(unlink=True)
+
+
+class RingReader:
+    """One consumer's read position in a SharedRing"""
+
+    def __init__(self, ring: SharedRing, from_start: bool = False):
+        """
+        Args:
+            ring: Attached ring
+            from_start: Read the records still in the ring; otherwise only new ones
+        """
+        self.ring = ring
+        self.next_seq = 1 if from_start else ring.write_seq + 1
+        self._batch_start = None
+        self.read_count = 0
+        self.lost = 0
+
+    def read(self, max_records: Optional[int] = None):
+        """
+        Zero-copy view of the next unread records (oldest first)
+
+        The view stops at the end of the ring; call again for the rest. It
+        is only valid until the writer laps it, see check().
+        """
+        ring = self.ring
+        capacity = ring.capacity
+        write_seq = ring.write_seq
+        start = self.next_seq
+        if start > write_seq:
+            return ring.records[:0]
+        # The writer may be filling records up to reserve_seq (read after
+        # write_seq, so it covers the batch committed at write_seq); record
+        # reserve_seq overwrites the slot of reserve_seq - capacity
+        oldest = ring.reserve_seq + 1 - capacity
+        if start < oldest:
+            self.lost += oldest - start
+            start = oldest
+            if start > write_seq:
+                # A batch longer than the ring is being written: nothing is intact
+                self.next_seq = start
+                self._batch_start = None
+                return ring.records[:0]
+        end = write_seq
+        if max_records is not None:
+            end = min(end, start + max_records - 1)
+        first = (start - 1) % capacity
+        count = min(end - start + 1, capacity - first)
+        self._batch_start = start
+        self.next_seq = start + count
+        self.read_count += count
+        return ring.records[first:first + count]
+
+    def check(self) -> bool:
+        """
+        True if the last batch from read() cannot have been overwritten yet
+
+        When False the batch may hold records from a later lap; it is counted
+        as lost and should be discarded.
+        """
+        if self._batch_start is None:
+            return True
+        if self.ring.reserve_seq - self.ring.capacity < self._batch_start:
+            return True
+        lost = self.next_seq - self._batch_start
+        self.lost += lost
+        self.read_count -= lost
+        return False
+
+    def backlog(self) -> int:
+        """Published records not read yet"""
+        return max(0, self.ring.write_seq - self.next_seq + 1)
+
+
+class FanoutConsumer:
+    """Read the daemon's rings and hand typed records to handlers"""
+
+    def __init__(self, prefix: str = "coinex", on_tickers: Optional[Callable[[List[Ticker]], None]] = None,
+                 on_depth: Optional[Callable[[DepthUpdate], None]] = None,
+                 on_trades: Optional[Callable[[List[Deal]], None]] = None,
+                 on_gap: Optional[Callable[[str, int], None]] = None, from_start: bool = False):
+        """
+        Attach to a running daemon
+
+        Args:
+            prefix: The daemon's block name prefix
+            on_tickers: Called with the tickers of each batch (like a state.update handler)
+            on_depth: Called with each DepthUpdate
+            on_trades: Called with consecutive trades of one market (like a deals.update handler)
+            on_gap: Called as on_gap(channel, lost) when records were lost
+            from_start: Also deliver the records already in the rings
+        """
+        self.markets = MarketTable(f"{prefix}-markets")
+        self.rings = {
+            'ticker': SharedRing(f"{prefix}-ticker", ticker_dtype()),
+            'depth': SharedRing(f"{prefix}-depth"),
+            'trades': SharedRing(f"{prefix}-trades", trade_dtype()),
+        }
+        self.readers = {channel: RingReader(ring, from_start) for channel, ring in self.rings.items()}
+        self.on_tickers = on_tickers
+        self.on_depth = on_depth
+        self.on_trades = on_trades
+        self.on_gap = on_gap
+        self.delivered = {channel: 0 for channel in self.rings}
+
+    def _tickers(self, records) -> List[Ticker]:
+        name = self.markets.name
+        return [Ticker(name(market_id), last, open_, close, high, low, volume, value, period)
+                for _, _, market_id, period, last, open_, close, high, low, volume, value in records.tolist()]
+
+    def _depth(self, records) -> List[DepthUpdate]:
+        name = self.markets.name
+        return [DepthUpdate(name(market_id), bool(is_full), unpack_levels(asks), unpack_levels(bids),
+                            last, ts, checksum if has_checksum else None)
+                for _, ts, checksum, last, market_id, _, _, is_full, has_checksum, asks, bids
+                in records.tolist()]
+
+    def _trades(self, records) -> List[List[Deal]]:
+        """Deals grouped into runs of the same market"""
+        name = self.markets.name
+        groups = []
+        previous = None
+        for _, ts, deal_id, market_id, side, price, amount in records.tolist():
+            if market_id != previous:
+                groups.append([])
+                previous = market_id
+            groups[-1].append(Deal(name(market_id), deal_id, ts, SIDE_NAMES.get(side, 'unknown'), price, amount))
+        return groups
+
+    def _read(self, channel: str, convert, max_records: int):
+        """Read and convert one batch; None if it was lost to the writer"""
+        reader = self.readers[channel]
+        lost_before = reader.lost
+        records = reader.read(max_records)
+        items = convert(records) if len(records) else []
+        valid = reader.check()
+        if reader.lost != lost_before and self.on_gap is not None:
+            self.on_gap(channel, reader.lost - lost_before)
+        return items if valid else None
+
+    def poll(self, max_records: int = 4096) -> int:
+        """
+        Deliver new records to the handlers
+
+        Returns:
+            Records delivered
+        """
+        delivered = 0
+        if self.on_tickers is not None:
+            tickers = self._read('ticker', self._tickers, max_records)
+            if tickers:
+                self.on_tickers(tickers)
+                delivered += len(tickers)
+                self.delivered['ticker'] += len(tickers)
+        if self.on_depth is not None:
+            updates = self._read('depth', self._depth, min(max_records, DEPTH_BATCH))
+            for update in updates or ():
+                self.on_depth(update)
+            if updates:
+                delivered += len(updates)
+                self.delivered['depth'] += len(updates)
+        if self.on_trades is not None:
+            groups = self._read('trades', self._trades, max_records)
+            for deals in groups or ():
+                self.on_trades(deals)
+                delivered += len(deals)
+                self.delivered['trades'] += len(deals)
+        return delivered
+
+    @property
+    def closed(self) -> bool:
+        """True once the daemon has shut down"""
+        return self.rings['ticker'].closed
+
+    def run(self, idle_sleep: float = 0.001, duration: Optional[float] = None):
+        """Poll until the daemon closes (or for duration seconds), sleeping when idle"""
+        deadline = time.monotonic() + duration if duration is not None else None
+        while not self.closed:
+            if not self.poll() and idle_sleep:
+                time.sleep(idle_sleep)
+            if deadline is not None and time.monotonic() > deadline:
+                break
+
+    def request_resync(self, market: str) -> bool:
+        """Ask the daemon for a new depth snapshot of a market"""
+        return self.markets.request_resync(market)
+
+    def stats(self) -> Dict:
+        return {channel: {'delivered': self.delivered[channel], 'lost': reader.lost,
+                          'backlog': reader.backlog()}
+                for channel, reader in self.readers.items()}
+
+    def close(self):
+        """Detach from the shared memory (the daemon's blocks stay)"""
+        for ring in self.rings.values():
+            ring.close()
+        self.markets.close()
+
+
+async def run_daemon(markets: Iterable[str], prefix: str = "coinex", num_connections: int = 2,
+                     depth_limit: int = 20, seconds: Optional[float] = None, stats_interval: float = 10.0,
+                     ws_url: Optional[str] = None):
+    """
+    Ingest daemon: stream tickers, depth and trades into the shared-memory rings
+
+    Args:
+        markets: Market pairs
+        prefix: Shared memory block name prefix
+        num_connections: WebSocket connections in the pool
+        depth_limit: Depth levels subscribed (and kept per depth record)
+        seconds: Stop after this long (None: until interrupted)
+        stats_interval: Seconds between stats prints
+        ws_url: Override the CoinEx endpoint
+    """
+    from .pool import WebSocketPool
+
+    markets = list(markets)
+    publisher = FanoutPublisher(prefix, max_levels=depth_limit)
+    pool = WebSocketPool(num_connections, callback=publisher.publish, ws_url=ws_url)
+    await pool.subscribe_markets('ticker', markets)
+    await pool.subscribe_markets('depth', markets, limit=depth_limit, interval="0")
+    await pool.subscribe_markets('trades', markets)
+    print(f"✓ Publishing {len(markets)} markets to shared memory '{prefix}-*'")
+
+    started = time.monotonic()
+    last_stats = started
+    try:
+        await pool.start()
+        while seconds is None or time.monotonic() - started < seconds:
+            await asyncio.sleep(0.1)
+            resync = publisher.markets.take_resync_requests()
+            if resync:
+                print(f"↻ Resync requested for {', '.join(resync)}")
+                await pool.resubscribe('depth', resync)
+            if time.monotonic() - last_stats >= stats_interval:
+                last_stats = time.monotonic()
+                print(f"{publisher.stats()}")
+    finally:
+        await pool.close()
+        publisher.close()
+
+
+def main():
+    """
+    Usage:
+        python -m coinex_ws.fanout daemon [MARKET ...]
+    """
+    import sys
+
+    args = sys.argv[1:]
+    if not args or args[0] != 'daemon':
+        print(main.__doc__)
+        return
+    try:
+        asyncio.run(run_daemon(args[1:] or ["BTCUSDT", "ETHUSDT", "SOLUSDT"]))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+"""
+WebSocket Heartbeat and Stale-Feed Detection
+
+HeartbeatManager runs next to a client's listen() loop:
+
+- Sends server.ping every `interval` seconds and matches each reply by its
+  request id. The round-trip time goes into a LatencyHistogram, and into the
+  client's IngestLatency (method 'server.ping', stage 'rtt') when one is set.
+- If max_missed pings in a row get no reply within pong_timeout, the socket
+  is closed; listen() returns and the owner's reconnect path takes over
+  (pool.PooledConnection reconnects and replays the subscriptions).
+- Tracks the time since the last update of every subscribed (channel,
+  market). A market silent for longer than its channel's stale_after raises
+  a stale event: on_stale callbacks are called, and the market is
+  resubscribed so the server sends fresh state (and a new depth snapshot).
+
+Trades have no staleness limit by default, since an illiquid market can go
+minutes without a deal.
+"""
+
+import asyncio
+import json
+import time
+from typing import Callable, Dict, List, Optional, Union
+
+from metrics import LatencyHistogram
+
+# Push method -> subscription channel
+UPDATE_CHANNELS = {
+    'state.update': 'ticker',
+    'depth.update': 'depth',
+    'deals.update': 'trades',
+}
+
+# Channel -> seconds without updates before a market is stale (None: never)
+DEFAULT_STALE_AFTER = {
+    'ticker': 120.0,
+    'depth': 120.0,
+    'trades': None,
+}
+
+
+class HeartbeatManager:
+    """Scheduled pings with RTT measurement, and per-market stale-feed detection"""
+
+    def __init__(self, client, interval: float = 20.0, pong_timeout: float = 10.0, max_missed: int = 2,
+                 stale_after: Union[None, float, Dict[str, Optional[float]]] = None,
+                 check_interval: float = 5.0, resubscribe: bool = True):
+        """
+        Initialize the manager (call start() once the client is connected)
+
+        Args:
+            client: CoinExWebSocket (or anything with .websocket, .subscriptions
+                    and resubscribe_markets()); its .latency is used if present
+            interval: Seconds between pings
+            pong_timeout: Seconds to wait for a ping's reply
+            max_missed: Consecutive unanswered pings before the socket is closed
+            stale_after: Seconds without updates before a market is stale, for all
+                         channels or per channel (default DEFAULT_STALE_AFTER)
+            check_interval: Seconds between staleness checks
+            resubscribe: Resubscribe stale markets automatically
+        """
+        if stale_after is None:
+            stale_after = DEFAULT_STALE_AFTER
+        elif not isinstance(stale_after, dict):
+            stale_after = {channel: stale_after for channel in DEFAULT_STALE_AFTER}
+
+        self.client = client
+        self.interval = interval
+        self.pong_timeout = pong_timeout
+        self.max_missed = max_missed
+        self.stale_after = stale_after
+        self.check_interval = check_interval
+        self.resubscribe = resubscribe
+        self.on_stale = []    # Callables (channel, market, age_seconds)
+
+        self.rtt = LatencyHistogram()
+        self.last_rtt = None
+        self.pending = {}     # ping request id -> perf_counter() when sent
+        self.last_seen = {}   # (channel, market) -> monotonic() of its last update
+        self.pings_sent = 0
+        self.pongs = 0
+        self.missed = 0
+        self.consecutive_missed = 0
+        self.dead_connections = 0
+        self.stale_events = 0
+        self.resubscribed = 0
+        self._tasks = []
+
+    def add_stale_handler(self, handler: Callable[[str, str, float], None]):
+        self.on_stale.append(handler)
+
+    def observe(self, message: Dict) -> bool:
+        """
+        Note a received message (called by listen() for every message)
+
+        Returns:
+            True if the message was a reply to one of our pings
+        """
+        request_id = message.get('id')
+        if request_id is not None:
+            sent = self.pending.pop(request_id, None)
+            if sent is not None:
+                self._pong(time.perf_counter() - sent)
+                return True
+            return False
+
+        method = message.get('method')
+        channel = UPDATE_CHANNELS.get(method)
+        if channel is None:
+            if method == 'server.pong' and self.pending:
+                # Pong without an id: answers the oldest outstanding ping
+                oldest = min(self.pending)
+                self._pong(time.perf_counter() - self.pending.pop(oldest))
+                return True
+            return False
+
+        now = time.monotonic()
+        data = message.get('data') or {}
+        if channel == 'ticker':
+            for entry in data.get('state_list', ()):
+                self.last_seen[('ticker', entry.get('market'))] = now
+        else:
+            self.last_seen[(channel, data.get('market'))] = now
+        return False
+
+    def _pong(self, rtt: float):
+        self.pongs += 1
+        self.consecutive_missed = 0
+        self.last_rtt = rtt
+        self.rtt.record(rtt)
+        latency = getattr(self.client, 'latency', None)
+        if latency is not None:
+            latency.record('server.ping', '', 'rtt', rtt)
+
+    async def ping(self):
+        """Send one server.ping now"""
+        request_id = self.client.subscriptions.next_id()
+        self.pending[request_id] = time.perf_counter()
+        await self.client.websocket.send(json.dumps({"method": "server.ping", "params": {}, "id": request_id}))
+        self.pings_sent += 1
+
+    def _expire_pings(self):
+        """Count pings whose reply is overdue"""
+        now = time.perf_counter()
+        for request_id, sent in list(self.pending.items()):
+            if now - sent > self.pong_timeout:
+                del self.pending[request_id]
+                self.missed += 1
+                self.consecutive_missed += 1
+
+    async def _ping_loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            self._expire_pings()
+            if self.consecutive_missed >= self.max_missed:
+                print(f"⚠️  No pong for {self.consecutive_missed} pings, closing the connection")
+                self.dead_connections += 1
+                self.consecutive_missed = 0
+                self.pending.clear()
+                try:
+                    await self.client.websocket.close()
+                except Exception:
+                    pass
+                continue
+            try:
+                await self.ping()
+            except Exception as e:
+                print(f"⚠️  Ping failed: {e}")
+
+    def check_stale(self) -> Dict[str, List[str]]:
+        """
+        Find subscribed markets without recent updates and raise their stale events
+
+        A market that just turned up in the subscriptions gets a full stale_after
+        grace period, and so does a market that was just reported stale.
+
+        Returns:
+            Channel -> stale markets
+        """
+        now = time.monotonic()
+        stale = {}
+        for channel, markets in self.client.subscriptions.requested.items():
+            limit = self.stale_after.get(channel)
+            if not limit:
+                continue
+            for market in markets:
+                key = (channel, market)
+                seen = self.last_seen.get(key)
+                if seen is None:
+                    self.last_seen[key] = now
+                    continue
+                age = now - seen
+                if age > limit:
+                    stale.setdefault(channel, []).append(market)
+                    self.stale_events += 1
+                    self.last_seen[key] = now
+                    for handler in self.on_stale:
+                        try:
+                            handler(channel, market, age)
+                        except Exception as e:
+                            print(f"⚠️  Error in stale handler: {e}")
+        return stale
+
+    async def resubscribe_stale(self, stale: Dict[str, List[str]]):
+        """Resubscribe stale markets with their original params"""
+        for channel, markets in stale.items():
+            shown = ", ".join(markets[:5]) + (f" and {len(markets) - 5} more" if len(markets) > 5 else "")
+            print(f"⚠️  Stale {channel} feed for {shown}, resubscribing")
+            await self.client.resubscribe_markets(channel, markets)
+            self.resubscribed += len(markets)
+
+    async def _stale_loop(self):
+        while True:
+            await asyncio.sleep(self.check_interval)
+            stale = self.check_stale()
+            if stale and self.resubscribe:
+                try:
+                    await self.resubscribe_stale(stale)
+                except Exception as e:
+                    print(f"⚠️  Resubscribe failed: {e}")
+
+    def start(self):
+        """Start the ping and staleness tasks"""
+        if not self._tasks:
+            self._tasks = [asyncio.ensure_future(self._ping_loop()),
+                           asyncio.ensure_future(self._stale_loop())]
+
+    def stop(self):
+        """Cancel the ping and staleness tasks"""
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+
+    def feed_ages(self) -> Dict[str, Dict[str, float]]:
+        """Seconds since the last update per channel and market"""
+        now = time.monotonic()
+        ages = {}
+        for (channel, market), seen in self.last_seen.items():
+            ages.setdefault(channel, {})[market] = now - seen
+        return ages
+
+    def stats(self) -> Dict:
+        rtt = self.rtt.snapshot()
+        return {
+            'pings_sent': self.pings_sent,
+            'pongs': self.pongs,
+            'missed': self.missed,
+            'dead_connections': self.dead_connections,
+            'last_rtt': self.last_rtt,
+            'rtt_p50': rtt.get('p50'),
+            'rtt_p99': rtt.get('p99'),
+            'stale_events': self.stale_events,
+            'resubscribed': self.resubscribed,
+        }
+
+    def render(self) -> str:
+        """One-line heartbeat summary"""
+        stats = self.stats()
+        rtt = f"RTT last {stats['last_rtt'] * 1000:.1f}ms, p99 {stats['rtt_p99'] * 1000:.1f}ms" \
+            if stats['last_rtt'] is not None else "no RTT yet"
+        return (f"💓 {stats['pongs']}/{stats['pings_sent']} pongs ({stats['missed']} missed), {rtt}, "
+                f"{stats['stale_events']} stale events")
@@ -0,0 +1,300 @@
+"""
+Bounded Ingest Queues Between Receive and Processing
+
+Without a queue, CoinExWebSocket.listen runs the callback inline after each
+recv(): a slow callback stops socket reads, the websockets library buffers
+frames until its limits are hit, and eventually the server drops us.
+
+IngestPipeline is a drop-in listen() callback that puts each message on a
+bounded queue for its channel (the message method) and returns at once;
+one worker task per channel runs the real callback. Overflow policies:
+
+- 'block': listen() waits for space (backpressure on the socket, but bursts
+  up to maxsize are absorbed). Right for depth.update, where a lost diff
+  desyncs the local book.
+- 'drop_oldest': the oldest queued message is discarded (trades you can
+  afford to miss under overload).
+- 'conflate': only the latest message per market is kept. Ticker messages
+  (single-market or batch) share one pending state.update per channel,
+  merged market by market, so an older ticker is never delivered after a
+  newer one. Right for tickers.
+
+Each channel tracks its depth, high-water mark, drops, conflations, time
+spent blocked, and queue-wait / handler latency histograms.
+
+With executor set (a ThreadPoolExecutor or ProcessPoolExecutor), workers
+run the callback in the pool and the event loop stays free to receive.
+Messages of one channel are still handled one at a time and in order, but
+different channels may run concurrently, so shared state touched by
+handlers of several channels must be thread-safe. A process pool needs a
+picklable module-level callback; its side effects stay in the worker
+process, so return results and receive them with on_result.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from metrics import LatencyHistogram
+from .latency import message_market
+
+POLICIES = ('block', 'drop_oldest', 'conflate')
+
+# Channel -> policy used when none is given
+DEFAULT_POLICIES = {
+    'state.update': 'conflate',
+    'depth.update': 'block',
+    'deals.update': 'drop_oldest',
+}
+
+
+def merge_state_updates(older: Dict, newer: Dict) -> Dict:
+    """Merge two state.update messages; the newer ticker of each market wins"""
+    tickers = {entry.get('market'): entry for entry in older.get('data', {}).get('state_list', [])}
+    for entry in newer.get('data', {}).get('state_list', []):
+        tickers[entry.get('market')] = entry
+    return {**newer, 'data': {**newer.get('data', {}), 'state_list': list(tickers.values())}}
+
+
+class ChannelQueue:
+    """Bounded message queue for one channel with an overflow policy"""
+
+    def __init__(self, channel: str, maxsize: int = 1000, policy: str = 'block'):
+        """
+        Args:
+            channel: Channel name (message method)
+            maxsize: Messages (or markets, when conflating) held at most
+            policy: 'block', 'drop_oldest' or 'conflate'
+        """
+        if policy not in POLICIES:
+            raise ValueError(f"policy must be one of {POLICIES}")
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+
+        self.channel = channel
+        self.maxsize = maxsize
+        self.policy = policy
+        # FIFO of (message, enqueued_ns); keyed by market when conflating
+        self.items = OrderedDict() if policy == 'conflate' else deque()
+        self._ready = asyncio.Event()
+        self._space = asyncio.Event()
+        self._unkeyed = 0
+
+        self.received = 0
+        self.processed = 0
+        self.dropped = 0
+        self.conflated = 0
+        self.blocked = 0
+        self.blocked_seconds = 0.0
+        self.high_water = 0
+        self.errors = 0
+        self.busy = False
+        self.queue_wait = LatencyHistogram()
+        self.handler_time = LatencyHistogram()
+
+    def __len__(self):
+        return len(self.items)
+
+    def offer(self, message: Dict) -> Optional[Awaitable]:
+        """
+        Enqueue a message
+
+        Returns:
+            None if the message was handled by the policy right away, or an
+            awaitable that completes once there is space ('block' when full)
+        """
+        self.received += 1
+        entry = (message, time.time_ns())
+        if self.policy == 'conflate':
+            self._conflate(message, entry)
+        elif len(self.items) < self.maxsize:
+            self.items.append(entry)
+        elif self.policy == 'drop_oldest':
+            self.items.popleft()
+            self.items.append(entry)
+            self.dropped += 1
+        else:
+            return self._put_blocking(entry)
+        self._added()
+        return None
+
+    def _conflate(self, message: Dict, entry):
+        data = message.get('data')
+        if isinstance(data, dict) and 'state_list' in data:
+            # One slot for all tickers: separate per-market and batch slots
+            # could hand out a newer ticker before an older batch
+            market = '*'
+        else:
+            market = message_market(message)
+        if not market:
+            # Replies and other unkeyed messages are never merged away
+            self._unkeyed += 1
+            market = ('unkeyed', self._unkeyed)
+        key = (message.get('method'), market)
+        pending = self.items.get(key)
+        if pending is not None:
+            older, enqueued_ns = pending
+            if market == '*':
+                message = merge_state_updates(older, message)
+            # Keep the slot's queue position and original enqueue time
+            self.items[key] = (message, enqueued_ns)
+            self.conflated += 1
+            return
+        if len(self.items) >= self.maxsize:
+            self.items.popitem(last=False)
+            self.dropped += 1
+        self.items[key] = entry
+
+    def _added(self):
+        if len(self.items) > self.high_water:
+            self.high_water = len(self.items)
+        self._ready.set()
+
+    async def _put_blocking(self, entry):
+        start = time.perf_counter()
+        self.blocked += 1
+        while len(self.items) >= self.maxsize:
+            self._space.clear()
+            await self._space.wait()
+        self.blocked_seconds += time.perf_counter() - start
+        self.items.append(entry)
+        self._added()
+
+    async def get(self):
+        """Oldest (message, enqueued_ns), waiting until one is queued"""
+        while not self.items:
+            self._ready.clear()
+            await self._ready.wait()
+        if self.policy == 'conflate':
+            _, entry = self.items.popitem(last=False)
+        else:
+            entry = self.items.popleft()
+        self._space.set()
+        return entry
+
+    def stats(self) -> Dict:
+        wait = self.queue_wait.snapshot()
+        return {
+            'policy': self.policy,
+            'depth': len(self.items),
+            'high_water': self.high_water,
+            'received': self.received,
+            'processed': self.processed,
+            'dropped': self.dropped,
+            'conflated': self.conflated,
+            'blocked': self.blocked,
+            'blocked_seconds': self.blocked_seconds,
+            'errors': self.errors,
+            'wait_p99': wait.get('p99'),
+        }
+
+
+class IngestPipeline:
+    """listen() callback that queues messages per channel and handles them in worker tasks"""
+
+    def __init__(self, callback: Callable[[Dict], Any], policies: Optional[Dict[str, str]] = None,
+                 maxsize: int = 1000, default_policy: str = 'block', executor=None,
+                 on_result: Optional[Callable[[Any], None]] = None):
+        """
+        Initialize the pipeline (workers start with the first message of each channel)
+
+        Args:
+            callback: Message handler, e.g. bot.handle_message or dispatcher.dispatch
+            policies: Channel (method) -> policy; merged over DEFAULT_POLICIES
+            maxsize: Queue bound per channel
+            default_policy: Policy for channels not in policies (replies, pongs, ...)
+            executor: Optional concurrent.futures executor to run the callback in
+            on_result: Called in the event loop with each non-None callback result
+        """
+        if default_policy not in POLICIES:
+            raise ValueError(f"default_policy must be one of {POLICIES}")
+        self.callback = callback
+        self.policies = {**DEFAULT_POLICIES, **(policies or {})}
+        self.maxsize = maxsize
+        self.default_policy = default_policy
+        self.executor = executor
+        self.on_result = on_result
+        self.queues = {}
+        self.workers = {}
+
+    def queue(self, channel: str) -> ChannelQueue:
+        """The queue of a channel, creating it and its worker on first use"""
+        queue = self.queues.get(channel)
+        if queue is None:
+            policy = self.policies.get(channel, self.default_policy)
+            queue = self.queues[channel] = ChannelQueue(channel, self.maxsize, policy)
+            self.workers[channel] = asyncio.ensure_future(self._worker(queue))
+        return queue
+
+    def submit(self, message: Dict) -> Optional[Awaitable]:
+        """
+        Queue a message (use as the listen() callback)
+
+        Returns:
+            None, or an awaitable when a 'block' queue is full; listen()
+            awaits it, which pauses socket reads until there is space
+        """
+        channel = message.get('method') or 'reply'
+        return self.queue(channel).offer(message)
+
+    __call__ = submit
+
+    async def _worker(self, queue: ChannelQueue):
+        loop = asyncio.get_running_loop()
+        while True:
+            message, enqueued_ns = await queue.get()
+            queue.busy = True
+            started_ns = time.time_ns()
+            queue.queue_wait.record((started_ns - enqueued_ns) / 1e9)
+            try:
+                if self.executor is not None:
+                    result = await loop.run_in_executor(self.executor, self.callback, message)
+                else:
+                    result = self.callback(message)
+                if result is not None and self.on_result is not None:
+                    self.on_result(result)
+            except Exception as e:
+                queue.errors += 1
+                print(f"⚠️  Error handling {queue.channel}: {e}")
+            queue.handler_time.record((time.time_ns() - started_ns) / 1e9)
+            queue.processed += 1
+            queue.busy = False
+            if self.executor is None:
+                # Inline handlers: give recv() a turn between messages
+                await asyncio.sleep(0)
+
+    def pending(self) -> int:
+        return sum(len(queue) for queue in self.queues.values())
+
+    async def drain(self, timeout: Optional[float] = None):
+        """Wait until every queued message has been handled"""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while any(len(queue) or queue.busy for queue in self.queues.values()):
+            if deadline is not None and time.monotonic() > deadline:
+                break
+            await asyncio.sleep(0.01)
+
+    async def close(self, drain: bool = True, timeout: float = 5.0):
+        """Stop the workers (after handling what is queued, if drain)"""
+        if drain:
+            await self.drain(timeout)
+        for worker in self.workers.values():
+            worker.cancel()
+        await asyncio.gather(*self.workers.values(), return_exceptions=True)
+        self.workers.clear()
+
+    def stats(self) -> Dict[str, Dict]:
+        return {channel: queue.stats() for channel, queue in self.queues.items()}
+
+    def render_stats(self) -> str:
+        """Text table of per-channel queue counters"""
+        lines = [f"   {'Channel':<16} {'Policy':<12} {'Depth':>6} {'High':>6} {'Received':>10} "
+                 f"{'Dropped':>8} {'Conflated':>10} {'Blocked':>8} {'Wait p99':>9}"]
+        for channel, stats in sorted(self.stats().items()):
+            wait = f"{stats['wait_p99'] * 1000:.1f}ms" if stats['wait_p99'] is not None else "-"
+            lines.append(f"   {channel:<16} {stats['policy']:<12} {stats['depth']:>6} {stats['high_water']:>6} "
+                         f"{stats['received']:>10,} {stats['dropped']:>8,} {stats['conflated']:>10,} "
+                         f"{stats['blocked']:>8,} {wait:>9}")
+        return "\n".join(lines)
+
@@ -0,0 +1,234 @@
+"""
+WebSocket Ingest Latency
+
+Per-frame timing of the receive path in CoinExWebSocket.listen:
+
+    frame received -> decompressed -> JSON parsed -> callback returned
+
+listen() takes a time.time_ns() stamp at each point and passes them to
+IngestLatency.observe(). The samples go into metrics.LatencyHistogram
+(HDR-style log-linear buckets; recording is a few microseconds) per
+method, market and stage:
+
+- decompress, parse, callback: time spent in each stage of this process
+- exchange_to_recv: receive time minus the exchange timestamp in the
+  payload (network and exchange-side delay)
+- exchange_to_done: callback return minus the exchange timestamp, i.e. how
+  old the data is once the handler has acted on it
+- rtt: ping round-trip time, recorded by heartbeat.HeartbeatManager (method 'server.ping')
+
+Exchange timestamps are depth.update's updated_at, the newest deal's
+created_at in deals.update, or a data-level updated_at (milliseconds).
+state.update carries no timestamp, so tickers get the stage timings only.
+Exchange-relative stages include the clock difference between this host
+and the exchange; keep the host NTP-synced or set clock_offset.
+
+Snapshots can be exported periodically as JSON or as a Prometheus text
+file (for node_exporter's textfile collector).
+"""
+
+import asyncio
+import json
+import os
+import time
+from typing import Dict, Iterable, Optional
+
+from metrics import LatencyHistogram
+
+
+STAGES = ('decompress', 'parse', 'callback', 'exchange_to_recv', 'exchange_to_done', 'rtt')
+
+PROMETHEUS_QUANTILES = (('0.5', 50), ('0.9', 90), ('0.99', 99), ('0.999', 99.9))
+
+
+def exchange_timestamp_ms(message: Dict) -> Optional[int]:
+    """
+    Exchange-side event time of a push message
+
+    Returns:
+        Milliseconds since the epoch, or None if the message has none
+    """
+    data = message.get('data')
+    if not isinstance(data, dict):
+        return None
+    try:
+        depth = data.get('depth')
+        if depth is not None:
+            return int(depth['updated_at'])
+        deals = data.get('deal_list')
+        if deals:
+            # Newest deal first
+            return int(deals[0]['created_at'])
+        if 'updated_at' in data:
+            return int(data['updated_at'])
+    except (KeyError, TypeError, ValueError):
+        pass
+    return None
+
+
+def message_market(message: Dict) -> str:
+    """Market of a push message ('*' for multi-market batches, '' if none)"""
+    data = message.get('data')
+    if isinstance(data, dict):
+        market = data.get('market')
+        if market:
+            return market
+        states = data.get('state_list')
+        if states:
+            return states[0].get('market', '') if len(states) == 1 else '*'
+    return ''
+
+
+class IngestLatency:
+    """Latency histograms per (method, market, stage) for the WebSocket receive path"""
+
+    def __init__(self, per_market: bool = True, clock_offset: float = 0.0, max_seconds: float = 600.0):
+        """
+        Initialize the collector
+
+        Args:
+            per_market: Keep separate histograms per market (False: per method only)
+            clock_offset: Seconds this host's clock runs ahead of the exchange's;
+                          subtracted from exchange-relative stages
+            max_seconds: Largest latency tracked exactly by the histograms
+        """
+        self.per_market = per_market
+        self.clock_offset = clock_offset
+        self.max_seconds = max_seconds
+        self.series = {}      # (method, market) -> {stage: LatencyHistogram}
+        self.frames = 0
+        self.started_at = time.time()
+
+    def _series(self, method: str, market: str) -> Dict[str, LatencyHistogram]:
+        key = (method, market)
+        series = self.series.get(key)
+        if series is None:
+            series = self.series[key] = {stage: LatencyHistogram(max_seconds=self.max_seconds)
+                                         for stage in STAGES}
+        return series
+
+    def observe(self, message: Dict, received_ns: int, decompressed_ns: int, parsed_ns: int, done_ns: int):
+        """
+        Record one frame's timings
+
+        Args:
+            message: Parsed message
+            received_ns: time.time_ns() when recv() returned the frame
+            decompressed_ns: ... after decompression
+            parsed_ns: ... after JSON parsing
+            done_ns: ... after the callback returned
+        """
+        method = message.get('method') or ('reply' if 'id' in message else 'unknown')
+        market = message_market(message) if self.per_market else ''
+        series = self._series(method, market)
+
+        series['decompress'].record((decompressed_ns - received_ns) / 1e9)
+        series['parse'].record((parsed_ns - decompressed_ns) / 1e9)
+        series['callback'].record((done_ns - parsed_ns) / 1e9)
+
+        exchange_ms = exchange_timestamp_ms(message)
+        if exchange_ms:
+            exchange_ns = exchange_ms * 1_000_000
+            series['exchange_to_recv'].record((received_ns - exchange_ns) / 1e9 - self.clock_offset)
+            series['exchange_to_done'].record((done_ns - exchange_ns) / 1e9 - self.clock_offset)
+        self.frames += 1
+
+    def record(self, method: str, market: str, stage: str, seconds: float):
+        """Record a sample measured outside listen() (e.g. ping RTT)"""
+        self._series(method, market if self.per_market else '')[stage].record(seconds)
+
+    def histogram(self, method: str, market: str = '', stage: str = 'exchange_to_done') -> Optional[LatencyHistogram]:
+        series = self.series.get((method, market))
+        return series[stage] if series else None
+
+    def merged(self, method: Optional[str] = None, stage: str = 'exchange_to_done') -> LatencyHistogram:
+        """One histogram of a stage across all markets (and methods, if method is None)"""
+        total = LatencyHistogram(max_seconds=self.max_seconds)
+        for (series_method, _), series in list(self.series.items()):
+            if method is None or series_method == method:
+                total.merge(series[stage])
+        return total
+
+    def reset(self):
+        """Discard all samples (keeps the series)"""
+        for series in list(self.series.values()):
+            for histogram in series.values():
+                histogram.reset()
+        self.frames = 0
+        self.started_at = time.time()
+
+    def snapshot(self) -> Dict:
+        """All non-empty histograms as a JSON-serializable dict (latencies in seconds)"""
+        rows = []
+        for (method, market), series in sorted(self.series.items()):
+            for stage in STAGES:
+                stats = series[stage].snapshot()
+                if stats['count']:
+                    rows.append({'method': method, 'market': market, 'stage': stage, **stats})
+        return {
+            'generated_at': time.time(),
+            'since': self.started_at,
+            'frames': self.frames,
+            'clock_offset': self.clock_offset,
+            'series': rows,
+        }
+
+    def to_prometheus(self, name: str = 'coinex_ws_ingest_latency_seconds') -> str:
+        """Prometheus text exposition (summary per method, market and stage)"""
+        lines = [
+            f"# HELP {name} CoinEx WebSocket ingest latency by stage",
+            f"# TYPE {name} summary",
+        ]
+        for (method, market), series in sorted(self.series.items()):
+            for stage in STAGES:
+                histogram = series[stage]
+                if not histogram.total:
+                    continue
+                labels = f'method="{method}",market="{market}",stage="{stage}"'
+                for quantile, pct in PROMETHEUS_QUANTILES:
+                    lines.append(f'{name}{{{labels},quantile="{quantile}"}} {histogram.percentile(pct):.6f}')
+                lines.append(f"{name}_sum{{{labels}}} {histogram.sum_us / 1_000_000:.6f}")
+                lines.append(f"{name}_count{{{labels}}} {histogram.total}")
+        lines.append("# TYPE coinex_ws_ingest_frames_total counter")
+        lines.append(f"coinex_ws_ingest_frames_total {self.frames}")
+        return "\n".join(lines) + "\n"
+
+    def write_snapshot(self, path: str):
+        """
+        Write a snapshot file, replaced atomically
+
+        Args:
+            path: '.prom' writes Prometheus text format, anything else JSON
+        """
+        if path.endswith('.prom'):
+            content = self.to_prometheus()
+        else:
+            content = json.dumps(self.snapshot(), indent=2)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w') as f:
+            f.write(content)
+        os.replace(temp_path, path)
+
+    async def run_exporter(self, path: str, period: float = 10.0):
+        """Write a snapshot every period seconds (run as a task next to listen())"""
+        while True:
+            await asyncio.sleep(period)
+            try:
+                self.write_snapshot(path)
+            except OSError as e:
+                print(f"⚠️  Could not write latency snapshot to {path}: {e}")
+
+    def render(self, stages: Iterable[str] = ('exchange_to_done', 'callback')) -> str:
+        """Text table of p50/p99/max per method and market, in milliseconds"""
+        lines = [f"Ingest latency ({self.frames:,} frames)",
+                 f"   {'Method':<16} {'Market':<12} {'Stage':<18} {'Count':>9} "
+                 f"{'p50':>9} {'p99':>9} {'max':>9}"]
+        for (method, market), series in sorted(self.series.items()):
+            for stage in stages:
+                stats = series[stage].snapshot()
+                if not stats['count']:
+                    continue
+                lines.append(f"   {method:<16} {market or '-':<12} {stage:<18} {stats['count']:>9,} "
+                             f"{stats['p50'] * 1000:>7.2f}ms {stats['p99'] * 1000:>7.2f}ms "
+                             f"{stats['max'] * 1000:>7.2f}ms")
+        return "\n".join(lines)
@@ -0,0 +1,353 @@
+"""
+CoinEx WebSocket Connection Pool
+
+Spreads market subscriptions across several WebSocket connections and keeps
+every connection alive:
+
+- Markets are assigned to the least-loaded connection (and stay there), so
+  each socket carries only its share of the feed. A slow or dropped socket
+  only affects its own markets.
+- A dropped connection is reconnected with jittered exponential backoff and
+  its subscription set is replayed from its SubscriptionRegistry.
+- A watchdog closes connections whose feed goes stale (no messages for
+  stale_after seconds), which triggers the same reconnect path.
+- Each connection runs a heartbeat.HeartbeatManager: scheduled pings
+  with RTT measurement (unanswered pings also close the connection), and
+  resubscription of individual markets whose feed goes quiet.
+- Per-connection health counters (messages, reconnects, last message age,
+  live subscriptions) can be printed with render_health().
+"""
+
+import asyncio
+import random
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+from .client import CoinExWebSocket
+
+
+class ConnectionHealth:
+    """Counters for one pooled connection"""
+
+    def __init__(self):
+        self.state = 'idle'
+        self.messages = 0
+        self.connects = 0
+        self.reconnects = 0
+        self.stale_resets = 0
+        self.last_message_at = None
+        self.connected_at = None
+        self.last_error = None
+
+    def record_message(self):
+        self.messages += 1
+        self.last_message_at = time.monotonic()
+
+    def message_age(self) -> Optional[float]:
+        """Seconds since the last message (None if nothing received yet)"""
+        if self.last_message_at is None:
+            return None
+        return time.monotonic() - self.last_message_at
+
+    def snapshot(self) -> Dict:
+        uptime = time.monotonic() - self.connected_at if self.connected_at and self.state == 'connected' else 0.0
+        return {
+            'state': self.state,
+            'messages': self.messages,
+            'connects': self.connects,
+            'reconnects': self.reconnects,
+            'stale_resets': self.stale_resets,
+            'last_message_age': self.message_age(),
+            'uptime': uptime,
+            'last_error': self.last_error,
+        }
+
+
+class PooledConnection:
+    """One WebSocket connection of the pool, with reconnect and watchdog"""
+
+    def __init__(self, index: int, callback: Callable, stale_after: float = 60.0,
+                 base_backoff: float = 1.0, max_backoff: float = 60.0, ws_url: Optional[str] = None,
+                 heartbeat_options: Optional[Dict] = None):
+        """
+        Initialize the pooled connection
+
+        Args:
+            index: Connection number in the pool
+            callback: Called with every parsed message
+            stale_after: Seconds without messages before the connection is recycled
+            base_backoff: First reconnect delay cap in seconds
+            max_backoff: Largest reconnect delay cap in seconds
+            ws_url: Override the CoinEx endpoint
+            heartbeat_options: HeartbeatManager options (interval, stale_after, ...)
+        """
+        self.index = index
+        self.callback = callback
+        self.stale_after = stale_after
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.client = CoinExWebSocket()
+        if ws_url:
+            self.client.ws_url = ws_url
+        self.heartbeat_options = heartbeat_options or {}
+        self.health = ConnectionHealth()
+        self.closing = False
+        self.connected = asyncio.Event()
+
+    def _on_message(self, data: Dict):
+        self.health.record_message()
+        return self.callback(data)
+
+    def backoff_delay(self, attempt: int) -> float:
+        """Full-jitter exponential backoff: uniform in [0, min(max, base * 2^attempt)]"""
+        return random.uniform(0, min(self.max_backoff, self.base_backoff * (2 ** attempt)))
+
+    async def subscribe_markets(self, channel: str, markets: List[str], **params):
+        """Register markets on this connection, sending now if connected"""
+        if self.connected.is_set():
+            try:
+                await self.client.subscribe_markets(channel, markets, **params)
+                return
+            except Exception as e:
+                # The registry already holds them; the next replay sends them
+                self.health.last_error = f"subscribe: {e}"
+        else:
+            self.client.subscriptions.subscribe(channel, markets, **params)
+
+    async def resubscribe_markets(self, channel: str, markets: List[str]):
+        """Subscribe registered markets again if connected (a reconnect replays them anyway)"""
+        if self.connected.is_set():
+            try:
+                await self.client.resubscribe_markets(channel, markets)
+            except Exception as e:
+                self.health.last_error = f"resubscribe: {e}"
+
+    async def _watchdog(self):
+        """Close the socket if the feed goes stale so run() reconnects"""
+        while not self.closing:
+            await asyncio.sleep(max(1.0, self.stale_after / 4))
+            age = self.health.message_age()
+            if (self.connected.is_set() and self.client.subscriptions.count() and
+                    age is not None and age > self.stale_after):
+                print(f"⚠️  Connection {self.index}: no messages for {age:.0f}s, reconnecting")
+                self.health.stale_resets += 1
+                try:
+                    await self.client.websocket.close()
+                except Exception:
+                    pass
+
+    async def run(self):
+        """Connect, replay subscriptions and listen until closed, reconnecting on drops"""
+        attempt = 0
+        watchdog = asyncio.create_task(self._watchdog())
+        try:
+            while not self.closing:
+                # Set once this cycle's connect() succeeds
+                up_since = None
+                try:
+                    self.health.state = 'connecting'
+                    started = time.monotonic()
+                    await self.client.connect()
+                    up_since = started
+                    self.health.connects += 1
+                    if self.health.connects > 1:
+                        self.health.reconnects += 1
+                    self.health.connected_at = time.monotonic()
+                    self.health.last_message_at = time.monotonic()
+                    self.health.state = 'connected'
+                    self.connected.set()
+
+                    # Replay this connection's subscription set
+                    await self.client.resubscribe()
+                    # Pings keep the socket alive and detect dead connections; quiet markets are resubscribed
+                    self.client.start_heartbeat(**self.heartbeat_options)
+
+                    await self.client.listen(callback=self._on_message)
+                except Exception as e:
+                    self.health.last_error = str(e)
+                    print(f"❌ Connection {self.index}: {e}")
+                finally:
+                    self.connected.clear()
+                    if self.client.heartbeat is not None:
+                        self.client.heartbeat.stop()
+
+                if self.closing:
+                    break
+
+                # Reset the backoff only after this cycle's connection stayed up
+                # for a while; failed connects keep growing the delay
+                if up_since is not None and time.monotonic() - up_since > self.max_backoff:
+                    attempt = 0
+                delay = self.backoff_delay(attempt)
+                attempt += 1
+                self.health.state = 'backoff'
+                print(f"↻ Connection {self.index}: reconnecting in {delay:.1f}s (attempt {attempt})")
+                await asyncio.sleep(delay)
+        finally:
+            watchdog.cancel()
+            self.health.state = 'closed'
+
+    async def close(self):
+        self.closing = True
+        try:
+            await self.client.close()
+        except Exception:
+            pass
+
+
+class WebSocketPool:
+    """Shard market subscriptions across several self-healing connections"""
+
+    def __init__(self, num_connections: int = 4, callback: Optional[Callable] = None,
+                 stale_after: float = 60.0, max_backoff: float = 60.0, ws_url: Optional[str] = None,
+                 heartbeat_options: Optional[Dict] = None):
+        """
+        Initialize the pool
+
+        Args:
+            num_connections: Number of WebSocket connections
+            callback: Called with every parsed message from any connection
+                      (defaults to CoinExWebSocket's printing handler)
+            stale_after: Seconds without messages before a connection is recycled
+            max_backoff: Largest reconnect delay cap in seconds
+            ws_url: Override the CoinEx endpoint (e.g. for testing)
+            heartbeat_options: HeartbeatManager options for every connection
+        """
+        if num_connections < 1:
+            raise ValueError("num_connections must be at least 1")
+
+        self.connections = [
+            PooledConnection(i, callback or self._print_message, stale_after=stale_after,
+                             max_backoff=max_backoff, ws_url=ws_url, heartbeat_options=heartbeat_options)
+            for i in range(num_connections)
+        ]
+        self.assignments = {}  # market -> connection index
+        self.tasks = []
+
+    def _print_message(self, data: Dict):
+        self.connections[0].client._default_message_handler(data)
+
+    def connection_for(self, market: str) -> PooledConnection:
+        """Connection that carries a market (assigned to the least-loaded one on first use)"""
+        index = self.assignments.get(market)
+        if index is None:
+            loads = [0] * len(self.connections)
+            for assigned in self.assignments.values():
+                loads[assigned] += 1
+            index = loads.index(min(loads))
+            self.assignments[market] = index
+        return self.connections[index]
+
+    async def subscribe_markets(self, channel: str, markets: Iterable[str], **params):
+        """
+        Subscribe a channel for many markets, spread across the connections
+
+        Args:
+            channel: 'ticker', 'depth' or 'trades'
+            markets: Market pairs
+            **params: Channel params (depth: limit, interval)
+        """
+        by_connection = {}
+        for market in dict.fromkeys(markets):
+            by_connection.setdefault(self.connection_for(market).index, []).append(market)
+
+        for index, group in by_connection.items():
+            await self.connections[index].subscribe_markets(channel, group, **params)
+
+    async def resubscribe(self, channel: str, markets: Iterable[str]):
+        """
+        Subscribe already assigned markets again, e.g. for new depth snapshots
+
+        Args:
+            channel: 'ticker', 'depth' or 'trades'
+            markets: Market pairs (markets never subscribed are skipped)
+        """
+        by_connection = {}
+        for market in dict.fromkeys(markets):
+            index = self.assignments.get(market)
+            if index is not None:
+                by_connection.setdefault(index, []).append(market)
+
+        for index, group in by_connection.items():
+            await self.connections[index].resubscribe_markets(channel, group)
+
+    async def start(self):
+        """Start every connection (returns once they are all connected or retrying)"""
+        if not self.tasks:
+            self.tasks = [asyncio.create_task(connection.run()) for connection in self.connections]
+        await asyncio.wait([asyncio.create_task(c.connected.wait()) for c in self.connections], timeout=30)
+
+    async def run_forever(self):
+        """Start the pool and keep it running until cancelled"""
+        await self.start()
+        await asyncio.gather(*self.tasks)
+
+    async def close(self):
+        """Close every connection and stop reconnecting"""
+        for connection in self.connections:
+            await connection.close()
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    def health(self) -> List[Dict]:
+        """Health snapshot per connection"""
+        snapshots = []
+        for connection in self.connections:
+            snapshot = connection.health.snapshot()
+            snapshot['connection'] = connection.index
+            snapshot['markets'] = sum(1 for i in self.assignments.values() if i == connection.index)
+            snapshot['subscriptions'] = connection.client.subscriptions.summary()
+            heartbeat = connection.client.heartbeat
+            snapshot['rtt'] = heartbeat.last_rtt if heartbeat is not None else None
+            snapshots.append(snapshot)
+        return snapshots
+
+    def render_health(self) -> str:
+        """Text table of per-connection health"""
+        lines = [f"{'Conn':<5} {'State':<11} {'Markets':>7} {'Messages':>10} {'Reconn':>7} "
+                 f"{'Stale':>6} {'Last msg':>9} {'RTT':>8}  Subscriptions"]
+        for h in self.health():
+            age = f"{h['last_message_age']:.1f}s" if h['last_message_age'] is not None else "-"
+            rtt = f"{h['rtt'] * 1000:.0f}ms" if h['rtt'] is not None else "-"
+            lines.append(f"{h['connection']:<5} {h['state']:<11} {h['markets']:>7} {h['messages']:>10} "
+                         f"{h['reconnects']:>7} {h['stale_resets']:>6} {age:>9} {rtt:>8}  {h['subscriptions']}")
+        return "\n".join(lines)
+
+
+async def main():
+    """Example: stream tickers for every USDT market over a small pool"""
+    import requests
+
+    NUM_CONNECTIONS = 4
+    RUN_SECONDS = 60
+
+    print("Fetching USDT markets...")
+    response = requests.get("https://api.coinex.com/v2/spot/market", timeout=30)
+    markets = sorted(m['market'] for m in response.json().get('data', []) if m.get('market', '').endswith('USDT'))
+    print(f"✓ {len(markets)} USDT markets")
+
+    updates = {'count': 0}
+
+    def count_updates(data):
+        if data.get("method") == "state.update":
+            updates['count'] += len(data.get("data", {}).get("state_list", []))
+
+    pool = WebSocketPool(NUM_CONNECTIONS, callback=count_updates)
+    await pool.subscribe_markets('ticker', markets)
+
+    try:
+        await pool.start()
+        for _ in range(RUN_SECONDS // 10):
+            await asyncio.sleep(10)
+            print(f"\n{updates['count']} ticker updates so far")
+            print(pool.render_health())
+    except KeyboardInterrupt:
+        print("\n\nShutting down...")
+    finally:
+        await pool.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
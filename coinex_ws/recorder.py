@@ -0,0 +1,324 @@
+"""
+Raw WebSocket Frame Recorder and Replay
+
+Captures live traffic so bursts can be reproduced offline:
+
+- FrameRecorder appends every frame exactly as received (gzip frames stay
+  compressed) with its receive time to segment files in a directory. A new
+  segment is started once the current one reaches segment_bytes; finished
+  segments are never touched again.
+- ReplayConnection stands in for a client's websocket: recv() returns the
+  recorded frames in order, paced at the original rate, N times faster, or
+  as fast as possible. The client's listen() then runs exactly the decode,
+  dispatch and handler code it runs on a live connection:
+
+      client = CoinExWebSocket()
+      client.websocket = ReplayConnection("captures", speed=10)
+      await client.listen(callback=bot.handle_message)
+
+Segment format (little endian):
+
+    header:  b"CXWSREC" + version byte
+    record:  int64 receive time (ns since epoch), uint32 frame length,
+             uint8 kind (0 binary, 1 text), frame bytes
+
+A segment cut short by a crash is read up to its last complete record.
+"""
+
+import asyncio
+import glob
+import os
+import struct
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from websockets.exceptions import ConnectionClosedOK
+
+
+SEGMENT_MAGIC = b"CXWSREC\x01"
+SEGMENT_SUFFIX = ".cxrec"
+RECORD_HEADER = struct.Struct("<qIB")
+
+KIND_BINARY = 0
+KIND_TEXT = 1
+
+Frame = Union[bytes, str]
+
+
+class FrameRecorder:
+    """Append raw frames with receive timestamps to segmented files"""
+
+    def __init__(self, directory: str, prefix: str = "frames", segment_bytes: int = 64 * 1024 * 1024,
+                 flush_interval: float = 1.0):
+        """
+        Initialize the recorder (the first segment is created on the first frame)
+
+        Args:
+            directory: Directory for the segment files (created if missing)
+            prefix: Segment file name prefix
+            segment_bytes: Size at which a new segment is started
+            flush_interval: Seconds between flushes of the write buffer to disk
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.prefix = prefix
+        self.segment_bytes = segment_bytes
+        self.flush_interval = flush_interval
+        self.file = None
+        self.path = None
+        self.segment_size = 0
+        self.segments = []
+        self.frames = 0
+        self.bytes = 0
+        self._last_flush = time.monotonic()
+
+    def _open_segment(self, received_ns: int):
+        self.close()
+        # Receive time in the name keeps segments of every run sorted and distinct
+        self.path = os.path.join(self.directory, f"{self.prefix}-{received_ns:019d}{SEGMENT_SUFFIX}")
+        self.file = open(self.path, 'xb', buffering=1024 * 1024)
+        self.file.write(SEGMENT_MAGIC)
+        self.segment_size = len(SEGMENT_MAGIC)
+        self.segments.append(self.path)
+
+    def record(self, frame: Frame, received_ns: Optional[int] = None):
+        """
+        Append one frame
+
+        Args:
+            frame: Frame as returned by websocket.recv()
+            received_ns: Receive time from time.time_ns() (default: now)
+        """
+        if received_ns is None:
+            received_ns = time.time_ns()
+        if isinstance(frame, str):
+            payload, kind = frame.encode('utf-8'), KIND_TEXT
+        else:
+            payload, kind = frame, KIND_BINARY
+
+        if self.file is None or self.segment_size >= self.segment_bytes:
+            self._open_segment(received_ns)
+        self.file.write(RECORD_HEADER.pack(received_ns, len(payload), kind))
+        self.file.write(payload)
+        size = RECORD_HEADER.size + len(payload)
+        self.segment_size += size
+        self.bytes += size
+        self.frames += 1
+
+        now = time.monotonic()
+        if now - self._last_flush >= self.flush_interval:
+            self.file.flush()
+            self._last_flush = now
+
+    def flush(self):
+        if self.file is not None:
+            self.file.flush()
+
+    def close(self):
+        """Flush and close the current segment (a later frame opens a new one)"""
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def stats(self) -> Dict:
+        return {'frames': self.frames, 'bytes': self.bytes, 'segments': len(self.segments)}
+
+
+def segment_paths(source: str) -> List[str]:
+    """Segment files of a recording (a directory, or a single segment file)"""
+    if os.path.isdir(source):
+        return sorted(glob.glob(os.path.join(source, f"*{SEGMENT_SUFFIX}")))
+    return [source]
+
+
+def read_segment(path: str) -> Iterator[Tuple[int, Frame]]:
+    """
+    Frames of one segment file
+
+    Yields:
+        (receive time in ns, frame) with frames as bytes or str as received
+
+    Raises:
+        ValueError: The file is not a frame segment
+    """
+    header_size = RECORD_HEADER.size
+    with open(path, 'rb', buffering=1024 * 1024) as f:
+        if f.read(len(SEGMENT_MAGIC)) != SEGMENT_MAGIC:
+            raise ValueError(f"{path} is not a frame recording segment")
+        while True:
+            header = f.read(header_size)
+            if len(header) < header_size:
+                return
+            received_ns, length, kind = RECORD_HEADER.unpack(header)
+            payload = f.read(length)
+            if len(payload) < length:
+                # Partial record at the end of an interrupted segment
+                return
+            yield received_ns, payload.decode('utf-8') if kind == KIND_TEXT else payload
+
+
+def iter_frames(source: str) -> Iterator[Tuple[int, Frame]]:
+    """All frames of a recording in order"""
+    for path in segment_paths(source):
+        yield from read_segment(path)
+
+
+def load_frames(source: str) -> List[Frame]:
+    """All frames of a recording in memory (for benchmarks)"""
+    return [frame for _, frame in iter_frames(source)]
+
+
+class ReplayConnection:
+    """Websocket stand-in that plays back a recording through recv()"""
+
+    def __init__(self, source: str, speed: Optional[float] = 1.0, max_gap: Optional[float] = None):
+        """
+        Initialize the replay
+
+        Args:
+            source: Recording directory or segment file
+            speed: 1.0 for the recorded pace, N for N times faster, None (or 0)
+                   for as fast as the handlers allow
+            max_gap: Cap on recorded pauses in seconds (skips idle periods)
+        """
+        self.source = source
+        self.speed = speed or None
+        self.max_gap_ns = int(max_gap * 1e9) if max_gap is not None else None
+        self._frames = iter_frames(source)
+        self._first_ns = None
+        self._previous_ns = None
+        self._skipped_ns = 0
+        self._start = None
+        self.frames = 0
+        self.sent = []
+        self.closed = False
+        self.started_at = None
+        self.finished_at = None
+
+    async def recv(self) -> Frame:
+        """
+        Next recorded frame, after waiting for its replay time
+
+        Raises:
+            ConnectionClosedOK: The recording is exhausted (ends listen() cleanly)
+        """
+        if self.closed:
+            raise ConnectionClosedOK(None, None)
+        try:
+            received_ns, frame = next(self._frames)
+        except StopIteration:
+            self.closed = True
+            self.finished_at = time.perf_counter()
+            raise ConnectionClosedOK(None, None)
+
+        if self._first_ns is None:
+            self._first_ns = self._previous_ns = received_ns
+            self._start = self.started_at = time.perf_counter()
+        if self.max_gap_ns is not None and received_ns - self._previous_ns > self.max_gap_ns:
+            self._skipped_ns += received_ns - self._previous_ns - self.max_gap_ns
+        self._previous_ns = received_ns
+
+        if self.speed:
+            due = self._start + (received_ns - self._first_ns - self._skipped_ns) / 1e9 / self.speed
+            delay = due - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        elif self.frames % 1000 == 999:
+            # Let other tasks (exporters, closers) run during a max-speed replay
+            await asyncio.sleep(0)
+        self.frames += 1
+        return frame
+
+    async def send(self, message):
+        """Outgoing messages (subscriptions, pings) are kept but not answered"""
+        self.sent.append(message)
+
+    async def close(self):
+        self.closed = True
+
+    def stats(self) -> Dict:
+        """Frames replayed and the achieved rate"""
+        end = self.finished_at or time.perf_counter()
+        elapsed = end - self.started_at if self.started_at else 0.0
+        recorded = (self._previous_ns - self._first_ns) / 1e9 if self._first_ns is not None else 0.0
+        return {
+            'frames': self.frames,
+            'seconds': elapsed,
+            'frames_per_second': self.frames / elapsed if elapsed else 0.0,
+            'recorded_seconds': recorded,
+        }
+
+
+async def record(directory: str, markets: List[str], seconds: float):
+    """Record tickers, depth and trades of markets for a number of seconds"""
+    from .client import CoinExWebSocket
+
+    client = CoinExWebSocket()
+    client.recorder = FrameRecorder(directory)
+    try:
+        await client.connect()
+        await client.subscribe_tickers(markets)
+        await client.subscribe_depths(markets, limit=50)
+        await client.subscribe_trades_batch(markets)
+        print(f"✓ Recording {', '.join(markets)} to {directory}/ ({seconds:.0f}s)")
+        await asyncio.wait_for(client.listen(callback=lambda data: None), timeout=seconds)
+    except asyncio.TimeoutError:
+        pass
+    finally:
+        await client.close()
+        client.recorder.close()
+    print(f"✓ Recorded {client.recorder.stats()}")
+
+
+async def replay(source: str, speed: Optional[float] = None, callback: Optional[Callable] = None):
+    """
+    Replay a recording through listen() and report throughput and latency
+
+    Args:
+        source: Recording directory or segment file
+        speed: Replay speed (None: as fast as possible)
+        callback: listen() callback (default: discard, timing decode and routing only)
+    """
+    from .client import CoinExWebSocket
+    from .latency import IngestLatency
+
+    client = CoinExWebSocket()
+    client.websocket = connection = ReplayConnection(source, speed=speed, max_gap=1.0)
+    client.latency = IngestLatency()
+    await client.listen(callback=callback or (lambda data: None))
+
+    stats = connection.stats()
+    print(f"✓ Replayed {stats['frames']:,} frames ({stats['recorded_seconds']:.1f}s recorded) "
+          f"in {stats['seconds']:.2f}s - {stats['frames_per_second']:,.0f} frames/s")
+    print(client.latency.render(stages=('decompress', 'parse', 'callback')))
+
+
+def main():
+    """
+    Usage:
+        python -m coinex_ws.recorder record DIR [seconds] [MARKET ...]
+        python -m coinex_ws.recorder replay DIR [speed|max]
+    """
+    import sys
+
+    args = sys.argv[1:]
+    if len(args) < 2 or args[0] not in ('record', 'replay'):
+        print(main.__doc__)
+        return
+    if args[0] == 'record':
+        seconds = float(args[2]) if len(args) > 2 else 60.0
+        markets = args[3:] or ["BTCUSDT", "ETHUSDT", "SOLUSDT"]
+        asyncio.run(record(args[1], markets, seconds))
+    else:
+        speed = None if len(args) < 3 or args[2] == 'max' else float(args[2])
+        asyncio.run(replay(args[1], speed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+WebSocket Request/Response Correlation
+
+Every request gets a unique id from the connection's SubscriptionRegistry
+and an asyncio Future. The listen() loop hands each reply (a message with an
+'id') to RequestTracker.resolve(), which completes the matching future:
+
+- success (code 0) -> the reply dict
+- error code      -> RpcError
+- no reply within the timeout -> RpcTimeout
+- connection lost -> ConnectionError
+
+Many requests can be in flight at once, e.g. pipelined subscribe messages
+for hundreds of markets awaited together.
+
+Before listen() runs (authentication, subscribing right after connect), a
+waiting request reads frames itself through the client's pump function,
+one reader at a time. Frames that are not its reply are queued for
+listen(), so no market update is lost.
+"""
+
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+from .subscriptions import is_success
+
+
+class RpcError(Exception):
+    """The server answered a request with an error"""
+
+    def __init__(self, method: str, response: Dict):
+        self.method = method
+        self.response = response
+        self.code = response.get('code')
+        message = response.get('message') or response.get('error')
+        super().__init__(f"{method} failed (code {self.code}): {message}")
+
+
+class RpcTimeout(asyncio.TimeoutError):
+    """No reply arrived within the request timeout"""
+
+
+class RequestTracker:
+    """Pending requests of one connection, matched to replies by id"""
+
+    def __init__(self, default_timeout: float = 10.0):
+        """
+        Args:
+            default_timeout: Seconds to wait for a reply unless a call says otherwise
+        """
+        self.default_timeout = default_timeout
+        self.pending = {}      # request id -> (method, future, sent_at)
+        self.listening = False  # True while a listen() loop routes replies
+        self.recv_lock = asyncio.Lock()
+        self.sent = 0
+        self.replied = 0
+        self.errors = 0
+        self.timed_out = 0
+
+    def __len__(self):
+        return len(self.pending)
+
+    def track(self, message: Dict) -> asyncio.Future:
+        """
+        Register a request about to be sent
+
+        Args:
+            message: Request with a unique 'id'
+
+        Returns:
+            Future completed by resolve() with the reply
+        """
+        future = asyncio.get_running_loop().create_future()
+        self.pending[message['id']] = (message.get('method'), future, time.perf_counter())
+        self.sent += 1
+        return future
+
+    def resolve(self, response: Dict) -> bool:
+        """
+        Complete the future of a reply's request
+
+        Returns:
+            True if the reply belonged to a tracked request
+        """
+        entry = self.pending.pop(response.get('id'), None)
+        if entry is None:
+            return False
+        method, future, _ = entry
+        self.replied += 1
+        if future.done():
+            return True
+        if is_success(response):
+            future.set_result(response)
+        else:
+            self.errors += 1
+            future.set_exception(RpcError(method, response))
+        return True
+
+    def discard(self, request_id):
+        self.pending.pop(request_id, None)
+
+    def fail_all(self, error: Exception):
+        """Fail every pending request (the connection is gone)"""
+        pending, self.pending = self.pending, {}
+        for _, future, _ in pending.values():
+            if not future.done():
+                future.set_exception(error)
+
+    async def wait(self, request_id, future: asyncio.Future, timeout: Optional[float] = None,
+                   pump: Optional[Callable[[], Awaitable]] = None) -> Dict:
+        """
+        Wait for a tracked request's reply
+
+        Args:
+            request_id: Id of the request
+            future: Future returned by track()
+            timeout: Seconds to wait (default_timeout if None)
+            pump: Coroutine function that reads and routes one frame; used
+                  while no listen() loop is running
+
+        Returns:
+            The reply
+
+        Raises:
+            RpcError: The server returned an error
+            RpcTimeout: No reply in time
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + (timeout if timeout is not None else self.default_timeout)
+        try:
+            while pump is not None and not future.done() and not self.listening:
+                async with self.recv_lock:
+                    if future.done() or self.listening:
+                        break
+                    await asyncio.wait_for(pump(), deadline - loop.time())
+            return await asyncio.wait_for(future, max(0.0, deadline - loop.time()))
+        except asyncio.TimeoutError:
+            self.discard(request_id)
+            self.timed_out += 1
+            raise RpcTimeout(f"no reply to request {request_id} within the timeout") from None
+
+    def stats(self) -> Dict:
+        return {'sent': self.sent, 'replied': self.replied, 'errors': self.errors,
+                'timed_out': self.timed_out, 'pending': len(self.pending)}
@@ -0,0 +1,205 @@
+"""
+CoinEx WebSocket Subscriptions
+
+Batch subscription messages and a per-connection subscription registry,
+shared by the WebSocket clients.
+
+A single subscribe message can carry many markets in its market_list, so
+watching every USDT pair needs a handful of messages instead of one per
+market and channel. Large market lists are split into chunks of at most
+MAX_MARKETS_PER_MESSAGE markets.
+
+The registry remembers what each connection asked for and what the server
+confirmed, so a connection's subscription set can be inspected or replayed
+after a reconnect.
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+# Markets per subscribe message (keeps frames well under the server's size limits)
+MAX_MARKETS_PER_MESSAGE = 50
+
+# Channel name -> subscription method prefix
+CHANNELS = {
+    'ticker': 'state',
+    'depth': 'depth',
+    'trades': 'deals',
+}
+
+
+def chunked(items: List, size: int) -> List[List]:
+    """Split a list into consecutive chunks of at most size items"""
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def is_success(response: Dict) -> bool:
+    """True if a request response reports success (v2 code 0 or v1 status)"""
+    if 'code' in response:
+        return response.get('code') == 0
+    result = response.get('result')
+    return response.get('error') is None and isinstance(result, dict) and result.get('status') == 'success'
+
+
+class SubscriptionRegistry:
+    """Track requested and confirmed market subscriptions on one connection"""
+
+    def __init__(self, max_markets_per_message: int = MAX_MARKETS_PER_MESSAGE, first_id: int = 1000):
+        """
+        Initialize the registry
+
+        Args:
+            max_markets_per_message: Chunk size for market_list
+            first_id: First request id used for subscribe messages
+        """
+        self.max_markets_per_message = max_markets_per_message
+        self._next_id = first_id
+        # channel -> market -> extra params (e.g. depth limit/interval)
+        self.requested = {channel: {} for channel in CHANNELS}
+        self.live = {channel: set() for channel in CHANNELS}
+        # request id -> (channel, markets)
+        self.pending = {}
+        self.failed = {channel: set() for channel in CHANNELS}
+
+    def next_id(self) -> int:
+        """Allocate a request id"""
+        request_id = self._next_id
+        self._next_id += 1
+        return request_id
+
+    def _messages(self, channel: str, action: str, markets: List[str], params: Dict) -> List[Dict]:
+        """Build chunked subscribe/unsubscribe messages and record them as pending"""
+        method = f"{CHANNELS[channel]}.{action}"
+        messages = []
+        for chunk in chunked(markets, self.max_markets_per_message):
+            request_id = self.next_id()
+            messages.append({
+                "method": method,
+                "params": dict({"market_list": chunk}, **params),
+                "id": request_id
+            })
+            if action == 'subscribe':
+                self.pending[request_id] = (channel, chunk)
+        return messages
+
+    def subscribe(self, channel: str, markets: Iterable[str], **params) -> List[Dict]:
+        """
+        Register markets on a channel and build the subscribe messages
+
+        Args:
+            channel: 'ticker', 'depth' or 'trades'
+            markets: Market pairs (duplicates are ignored)
+            **params: Extra channel params (depth: limit, interval)
+
+        Returns:
+            Subscribe messages to send, one per chunk
+        """
+        if channel not in CHANNELS:
+            raise ValueError(f"Unknown channel '{channel}' (expected one of {list(CHANNELS)})")
+
+        markets = list(dict.fromkeys(markets))
+        for market in markets:
+            self.requested[channel][market] = params
+            self.failed[channel].discard(market)
+        return self._messages(channel, 'subscribe', markets, params)
+
+    def unsubscribe(self, channel: str, markets: Iterable[str]) -> List[Dict]:
+        """
+        Drop markets from a channel and build the unsubscribe messages
+
+        Returns:
+            Unsubscribe messages to send, one per chunk
+        """
+        markets = [m for m in dict.fromkeys(markets) if m in self.requested[channel]]
+        for market in markets:
+            del self.requested[channel][market]
+            self.live[channel].discard(market)
+        return self._messages(channel, 'unsubscribe', markets, {})
+
+    def acknowledge(self, response: Dict) -> Optional[Tuple[str, List[str], bool]]:
+        """
+        Match a server response to a pending subscribe request
+
+        Args:
+            response: Parsed message with an 'id'
+
+        Returns:
+            (channel, markets, success) if the id was a pending subscription, else None
+        """
+        entry = self.pending.pop(response.get('id'), None)
+        if entry is None:
+            return None
+
+        channel, markets = entry
+        success = is_success(response)
+        # Only markets still requested count (an unsubscribe may have raced the reply)
+        markets = [m for m in markets if m in self.requested[channel]]
+        if success:
+            self.live[channel].update(markets)
+        else:
+            self.failed[channel].update(markets)
+        return channel, markets, success
+
+    def replay(self) -> List[Dict]:
+        """
+        Subscribe messages for everything requested, e.g. after a reconnect
+
+        Live state is reset; markets become live again as the replies arrive.
+        """
+        self.reset_live()
+        for channel in CHANNELS:
+            self.failed[channel].clear()
+        messages = []
+        for channel, markets in self.requested.items():
+            # Group markets that share the same params (e.g. depth limit)
+            groups = {}
+            for market, params in markets.items():
+                groups.setdefault(tuple(sorted(params.items())), []).append(market)
+            for params, group in groups.items():
+                messages.extend(self._messages(channel, 'subscribe', group, dict(params)))
+        return messages
+
+    def resubscribe(self, channel: str, markets: Iterable[str]) -> List[Dict]:
+        """
+        Subscribe messages for some already requested markets (e.g. a stale feed)
+
+        Markets keep their original params and are no longer live until the
+        replies arrive; markets that were never requested are skipped.
+        """
+        groups = {}
+        for market in dict.fromkeys(markets):
+            params = self.requested[channel].get(market)
+            if params is None:
+                continue
+            self.live[channel].discard(market)
+            groups.setdefault(tuple(sorted(params.items())), []).append(market)
+        messages = []
+        for params, group in groups.items():
+            messages.extend(self._messages(channel, 'subscribe', group, dict(params)))
+        return messages
+
+    def reset_live(self):
+        """Forget server confirmations (the connection was lost)"""
+        self.pending.clear()
+        for channel in CHANNELS:
+            self.live[channel].clear()
+
+    def markets(self, channel: str) -> List[str]:
+        """All markets requested on a channel"""
+        return list(self.requested[channel])
+
+    def count(self) -> int:
+        """Total (channel, market) subscriptions requested"""
+        return sum(len(markets) for markets in self.requested.values())
+
+    def summary(self) -> str:
+        """One-line live/requested count per channel"""
+        parts = []
+        for channel in CHANNELS:
+            requested = len(self.requested[channel])
+            if requested:
+                part = f"{channel}: {len(self.live[channel])}/{requested} live"
+                if self.failed[channel]:
+                    part += f" ({len(self.failed[channel])} failed)"
+                parts.append(part)
+        return ", ".join(parts) if parts else "no subscriptions"
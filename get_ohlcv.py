@@ -5,27 +5,105 @@ Fetches historical daily OHLCV (Open, High, Low, Close, Volume) data from CoinEx
 Saves to CSV file.
 """
 
-import requests
 import csv
+import os
 import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 
+from candles import (HAS_NUMPY as HAS_CANDLES, PRICE_FIELDS, CandleSeries, parse_klines,
+                     rejection_summary)
+from coinex_http import TokenBucket, get_shared_session, timed_get
+from metrics import LatencyHistogram
+from mk_cache import MKResultCache, window_hashes
+from mk_engine import (HAS_NUMPY, mann_kendall_batch, rolling_mann_kendall, rolling_mann_kendall_incremental,
+                       rolling_mann_kendall_markets, to_trend_dicts)
+from ohlcv_store import CsvStore, as_list, open_store
+
 try:
     import pymannkendall as mk
     HAS_MK = True
 except ImportError:
     HAS_MK = False
-    print("⚠️  pymannkendall not installed. Trend analysis will be disabled.")
-    print("   Install with: pip install pymannkendall")
+    if not HAS_NUMPY:
+        print("⚠️  Neither pymannkendall nor numpy/scipy installed. Trend analysis will be disabled.")
+        print("   Install with: pip install pymannkendall (or numpy scipy)")
+
+
+def uses_vectorized(engine: str, window_size: int = 3) -> bool:
+    """True if an engine runs on mk_engine (NumPy) rather than pymannkendall"""
+    return engine in ('vectorized', 'rolling') and HAS_NUMPY and window_size >= 3
+
+
 
+_worker_fetcher = None
+
+
+def _analyze_rolling_shard_worker(shard: List, window_size: int, use_modified: bool, engine: str,
+                                  mk_cache_file: Optional[str] = None, mk_cache_entries: int = 2_000_000,
+                                  with_slope: bool = True):
+    """
+    ProcessPoolExecutor entry point: analyze one shard in a per-process fetcher
+    
+    Returns:
+        Tuple of (shard results, cache hits, cache misses) for this shard
+    """
+    global _worker_fetcher
+    if _worker_fetcher is None:
+        _worker_fetcher = CoinExDailyData(max_workers=1, mk_cache_file=mk_cache_file,
+                                          mk_cache_entries=mk_cache_entries)
+    cache = _worker_fetcher.mk_cache
+    hits, misses = (cache.hits, cache.misses) if cache else (0, 0)
+    results = _worker_fetcher.analyze_rolling_shard(shard, window_size, use_modified, engine, with_slope)
+    if cache:
+        hits, misses = cache.hits - hits, cache.misses - misses
+    return results, hits, misses
 
 
 class CoinExDailyData:
     """Fetch daily candlestick data from CoinEx"""
     
-    def __init__(self):
+    def __init__(self, max_workers: int = 8, requests_per_second: float = 20.0,
+                 pool_size: int = 16, mk_cache_file: Optional[str] = None,
+                 mk_cache_entries: int = 2_000_000):
+        """
+        Initialize the fetcher
+        
+        Args:
+            max_workers: Number of concurrent kline requests
+            requests_per_second: Token-bucket rate shared by all REST calls.
+                                 Keep this under CoinEx's per-IP quota for
+                                 public market endpoints.
+            pool_size: Keep-alive connections held open to api.coinex.com
+            mk_cache_file: SQLite file caching per-window Mann-Kendall results
+                           for the rolling analyses (None = no cache)
+            mk_cache_entries: Cached windows kept before LRU eviction
+        """
         self.base_url = "https://api.coinex.com/v2"
+        self.max_workers = max_workers
+        self.rate_limiter = TokenBucket(requests_per_second)
+        self.session = get_shared_session(max(pool_size, max_workers))
+        self.latency = LatencyHistogram()
+        self.mk_cache_file = mk_cache_file
+        self.mk_cache_entries = mk_cache_entries
+        self._mk_cache = None
+    
+    @property
+    def mk_cache(self) -> Optional[MKResultCache]:
+        """Mann-Kendall result cache, opened on first use (None without mk_cache_file)"""
+        if self._mk_cache is None and self.mk_cache_file:
+            self._mk_cache = MKResultCache(self.mk_cache_file, self.mk_cache_entries)
+        return self._mk_cache
+    
+    def _get(self, url: str, **kwargs):
+        """Rate-limited GET on the pooled session, recording request latency"""
+        self.rate_limiter.acquire()
+        return timed_get(self.session, url, self.latency, **kwargs)
+    
+    def display_latency_stats(self):
+        """Print the per-request latency histogram collected so far"""
+        print(self.latency.render("REST request latency"))
     
     def get_all_markets(self) -> List[str]:
         """
@@ -38,7 +116,7 @@ class CoinExDailyData:
             url = f"{self.base_url}/spot/market"
             
             print("Fetching all available markets from CoinEx...")
-            response = requests.get(url, timeout=30)
+            response = self._get(url, timeout=30)
             
             if response.status_code == 200:
                 data = response.json()
@@ -106,18 +184,25 @@ class CoinExDailyData:
         
         print(f"\n{'='*80}\n")
     
+    @staticmethod
+    def close_prices(data) -> List[float]:
+        """Close prices of a CandleSeries (array view) or of parsed row dicts"""
+        if isinstance(data, CandleSeries):
+            return data.close
+        return [float(d['Close']) for d in data]
+    
     def analyze_trend(self, data: List[Dict], use_modified: bool = True) -> Dict:
         """
         Analyze trend using Mann-Kendall test
         
         Args:
-            data: Parsed kline data with Close prices
+            data: CandleSeries or parsed kline rows with Close prices
             use_modified: If True, use Hamed-Rao modified test (better for autocorrelated data)
             
         Returns:
             Dictionary with trend analysis results
         """
-        if not HAS_MK:
+        if not HAS_MK and not HAS_NUMPY:
             return {
                 'error': 'pymannkendall not installed',
                 'trend': 'unknown',
@@ -141,9 +226,12 @@ class CoinExDailyData:
         
         try:
             # Extract close prices
-            close_prices = [float(d['Close']) for d in data]
+            close_prices = self.close_prices(data)
             
             # Run appropriate Mann-Kendall test
+            if not HAS_MK:
+                # Same statistics from the vectorized engine, as a single window
+                return to_trend_dicts(mann_kendall_batch([close_prices], use_modified), use_modified)[0]
             if use_modified:
                 # Hamed-Rao Modified Test - accounts for autocorrelation
                 # Better for financial time series
@@ -198,7 +286,7 @@ class CoinExDailyData:
         print(f"Test Type: {'Hamed-Rao Modified (accounts for autocorrelation)' if use_modified else 'Original Mann-Kendall'}")
         print(f"{'='*100}\n")
         
-        if not HAS_MK:
+        if not HAS_MK and not HAS_NUMPY:
             print("❌ pymannkendall not installed")
             print("   Install with: pip install pymannkendall")
             return []
@@ -239,7 +327,7 @@ class CoinExDailyData:
                     continue
                 
                 # Parse data
-                parsed_data = self.parse_kline_data(klines)
+                parsed_data = self.parse_kline_series(klines, market)
                 if not parsed_data:
                     if i <= 5:
                         print(f"  ⚠️  {market}: Parse failed")
@@ -316,7 +404,7 @@ class CoinExDailyData:
         print(f"MANN-KENDALL TREND ANALYSIS - ALL USDT MARKETS")
         print(f"{'='*100}\n")
         
-        if not HAS_MK:
+        if not HAS_MK and not HAS_NUMPY:
             print("❌ pymannkendall not installed")
             print("   Install with: pip install pymannkendall")
             return []
@@ -357,7 +445,7 @@ class CoinExDailyData:
                     continue
                 
                 # Parse data
-                parsed_data = self.parse_kline_data(klines)
+                parsed_data = self.parse_kline_series(klines, market)
                 if not parsed_data:
                     if i <= 5:
                         print(f"  ⚠️  {market}: Parse failed")
@@ -479,24 +567,46 @@ class CoinExDailyData:
         print(f"\n{'='*100}\n")
     
     def analyze_trend_rolling_window(self, data: List[Dict], window_size: int = 30, 
-                                    use_modified: bool = True) -> List[Dict]:
+                                    use_modified: bool = True, engine: str = 'vectorized',
+                                    with_slope: bool = True) -> List[Dict]:
         """
         Analyze trend using rolling window approach
         
         Args:
-            data: Parsed kline data with Close prices
+            data: CandleSeries or parsed kline rows with Close prices
+                  (CandleSeries windows are zero-copy views)
             window_size: Size of rolling window (default: 30 days)
             use_modified: If True, use Hamed-Rao modified test
+            engine: 'vectorized' runs all windows in one NumPy batch (mk_engine);
+                    'rolling' updates S incrementally as the window slides (Sen's
+                    slope and Hamed-Rao still cost O(w^2) per window, so this is a
+                    constant-factor speedup unless with_slope is off);
+                    'pymannkendall' calls analyze_trend once per window
+            with_slope: Compute Sen's slope. Only the 'rolling' engine skips it:
+                        with use_modified=False that makes each window O(w),
+                        and every window's 'slope' is NaN. The Hamed-Rao
+                        variance needs the slope, so use_modified=True keeps it.
             
         Returns:
             List of trend results for each window
         """
-        if not HAS_MK:
+        use_vectorized = uses_vectorized(engine, window_size)
+        
+        if not HAS_MK and not use_vectorized:
             return []
         
         if not data or len(data) < window_size:
             return []
         
+        if use_vectorized:
+            closes = self.close_prices(data)
+            if engine == 'rolling':
+                result = rolling_mann_kendall_incremental(closes, window_size, use_modified=use_modified,
+                                                          with_slope=with_slope)
+            else:
+                result = rolling_mann_kendall(closes, window_size, use_modified=use_modified)
+            return self._attach_window_meta(data, window_size, to_trend_dicts(result, use_modified))
+        
         rolling_results = []
         
         # Slide window through data
@@ -518,8 +628,247 @@ class CoinExDailyData:
         
         return rolling_results
     
+    def _attach_window_meta(self, data: List[Dict], window_size: int, trend_results: List[Dict]) -> List[Dict]:
+        """Add window_start/window_end/window_size/window_index to per-window results"""
+        date_at = data.date if isinstance(data, CandleSeries) else (lambda i: data[i]['Date'])
+        for i, result in enumerate(trend_results):
+            result['window_start'] = date_at(i)
+            result['window_end'] = date_at(i + window_size - 1)
+            result['window_size'] = window_size
+            result['window_index'] = i
+        return trend_results
+    
+    @staticmethod
+    def mk_variant(use_modified: bool, with_slope: bool = True) -> str:
+        """Result cache variant: what produced a window's result
+        
+        Results computed without Sen's slope get their own variant, so they
+        are never served to a caller that asked for the slope.
+        """
+        variant = 'Hamed-Rao Modified' if use_modified else 'Original'
+        return variant if with_slope or use_modified else variant + ' (no slope)'
+    
+    def _cache_lookup(self, market: str, data: List[Dict], window_size: int, variant: str):
+        """
+        Cached results for every window of a market
+        
+        Returns:
+            Tuple of (window keys, results with None for uncached windows,
+            indexes of the uncached windows)
+        """
+        date_at = data.date if isinstance(data, CandleSeries) else (lambda i: data[i]['Date'])
+        dates = [date_at(i) for i in range(len(data))]
+        keys = [(dates[i], dates[i + window_size - 1], data_hash)
+                for i, data_hash in enumerate(window_hashes(self.close_prices(data), window_size))]
+        
+        cached = self.mk_cache.get_windows(market, window_size, variant)
+        results = [cached.get(key) for key in keys]
+        missing = [i for i, result in enumerate(results) if result is None]
+        self.mk_cache.hits += len(keys) - len(missing)
+        self.mk_cache.misses += len(missing)
+        if len(missing) < len(keys):
+            self.mk_cache.touch(market, window_size, variant)
+        return keys, results, missing
+    
+    def _cache_fill(self, market: str, window_size: int, variant: str, keys: List, results: List,
+                    first: int, computed: List[Dict]) -> List[Dict]:
+        """
+        Store computed windows (of the span starting at window first) and
+        return every window's result with its metadata
+        """
+        new_entries = []
+        for result in computed:
+            i = first + result.pop('window_index')
+            for name in ('window_start', 'window_end', 'window_size'):
+                result.pop(name)
+            if results[i] is None:
+                results[i] = result
+                new_entries.append(keys[i] + (result,))
+        self.mk_cache.put_windows(market, window_size, variant, new_entries)
+        
+        rolling_results = []
+        for i, result in enumerate(results):
+            # Windows the engine could not evaluate stay out, as in analyze_trend_rolling_window
+            if result is not None:
+                result_with_meta = dict(result)
+                result_with_meta['window_start'], result_with_meta['window_end'] = keys[i][:2]
+                result_with_meta['window_size'] = window_size
+                result_with_meta['window_index'] = i
+                rolling_results.append(result_with_meta)
+        return rolling_results
+    
+    def analyze_trend_rolling_window_cached(self, market: str, data: List[Dict], window_size: int = 30,
+                                           use_modified: bool = True, engine: str = 'vectorized',
+                                           with_slope: bool = True) -> List[Dict]:
+        """
+        analyze_trend_rolling_window backed by the Mann-Kendall result cache
+        
+        Windows whose dates and close prices match a cached entry are reused;
+        only the span covering the remaining windows is computed (normally
+        just the newest window on a daily rerun).
+        
+        Args:
+            market: Market symbol (part of the cache key)
+            data: CandleSeries or parsed kline rows in chronological order
+            window_size: Size of rolling window
+            use_modified: If True, use Hamed-Rao modified test
+            engine: Mann-Kendall engine ('vectorized', 'rolling' or 'pymannkendall')
+            with_slope: Compute Sen's slope (see analyze_trend_rolling_window)
+            
+        Returns:
+            List of trend results for each window
+        """
+        if self.mk_cache is None:
+            return self.analyze_trend_rolling_window(data, window_size, use_modified, engine, with_slope)
+        
+        if len(data) < window_size:
+            return []
+        
+        variant = self.mk_variant(use_modified, with_slope)
+        keys, results, missing = self._cache_lookup(market, data, window_size, variant)
+        computed = []
+        first = missing[0] if missing else 0
+        if missing:
+            # Compute the smallest span that covers every missing window
+            computed = self.analyze_trend_rolling_window(
+                data[first:missing[-1] + window_size], window_size, use_modified, engine, with_slope
+            )
+        return self._cache_fill(market, window_size, variant, keys, results, first, computed)
+    
+    def _rolling_batch(self, shard: List, window_size: int, use_modified: bool) -> Dict[str, List[Dict]]:
+        """
+        Vectorized rolling windows of every market in a shard, in one batch
+        
+        With the result cache, each market contributes only the span covering
+        its uncached windows, and the spans of all markets form the batch.
+        
+        Returns:
+            Dictionary mapping market -> per-window results (markets whose
+            cache lookup failed are left out)
+        """
+        if self.mk_cache is None:
+            batch = rolling_mann_kendall_markets(
+                {market: self.close_prices(data) for market, data in shard}, window_size, use_modified=use_modified
+            )
+            return {market: self._attach_window_meta(data, window_size, to_trend_dicts(batch[market], use_modified))
+                    for market, data in shard if market in batch}
+        
+        variant = self.mk_variant(use_modified)
+        lookups = {}
+        spans = {}
+        for market, data in shard:
+            if len(data) < window_size:
+                continue
+            try:
+                lookups[market] = self._cache_lookup(market, data, window_size, variant)
+            except Exception:
+                continue
+            missing = lookups[market][2]
+            if missing:
+                spans[market] = data[missing[0]:missing[-1] + window_size]
+        
+        batch = rolling_mann_kendall_markets(
+            {market: self.close_prices(span) for market, span in spans.items()}, window_size, use_modified=use_modified
+        ) if spans else {}
+        
+        rolling = {}
+        for market, (keys, results, missing) in lookups.items():
+            computed = []
+            if market in batch:
+                computed = self._attach_window_meta(spans[market], window_size,
+                                                    to_trend_dicts(batch[market], use_modified))
+            rolling[market] = self._cache_fill(market, window_size, variant, keys, results,
+                                               missing[0] if missing else 0, computed)
+        return rolling
+    
+    @staticmethod
+    def summarize_rolling_results(market: str, rolling_results: List[Dict]) -> Dict:
+        """
+        Aggregate per-window results into one market summary
+        
+        Args:
+            market: Market symbol
+            rolling_results: Output of analyze_trend_rolling_window (non-empty)
+            
+        Returns:
+            Market summary with latest-window fields, window counts and 'all_windows'
+        """
+        # Calculate aggregate metrics
+        trends = [r['trend'] for r in rolling_results]
+        taus = [r['tau'] for r in rolling_results if r['tau'] is not None]
+        
+        # Most recent window (most important)
+        latest_window = rolling_results[-1]
+        
+        # Trend consistency
+        increasing_count = trends.count('increasing')
+        decreasing_count = trends.count('decreasing')
+        no_trend_count = trends.count('no trend')
+        
+        # Average tau across all windows
+        avg_tau = sum(taus) / len(taus) if taus else 0
+        
+        return {
+            'market': market,
+            'total_windows': len(rolling_results),
+            'latest_trend': latest_window['trend'],
+            'latest_tau': latest_window['tau'],
+            'latest_p_value': latest_window['p_value'],
+            'latest_slope': latest_window['slope'],
+            'latest_significance': latest_window['significance'],
+            'increasing_windows': increasing_count,
+            'decreasing_windows': decreasing_count,
+            'no_trend_windows': no_trend_count,
+            'avg_tau': avg_tau,
+            'trend_consistency': max(increasing_count, decreasing_count) / len(rolling_results) * 100,
+            'all_windows': rolling_results
+        }
+    
+    def analyze_rolling_shard(self, shard: List, window_size: int, use_modified: bool = True,
+                              engine: str = 'vectorized', with_slope: bool = True) -> Dict[str, Dict]:
+        """
+        Rolling-window analysis for a group of markets
+        
+        Args:
+            shard: List of (market, data) with data a CandleSeries (or parsed rows
+                   without NumPy) in chronological order
+            window_size: Size of rolling window
+            use_modified: If True, use Hamed-Rao modified test
+            engine: Mann-Kendall engine ('vectorized', 'rolling' or 'pymannkendall')
+            with_slope: Compute Sen's slope (see analyze_trend_rolling_window)
+            
+        Returns:
+            Dictionary mapping market -> summary, or -> {'error': message} on failure
+        """
+        # Vectorized engine: every window of every market in the shard in one batch
+        # (with a result cache, only each market's uncached windows go into the batch)
+        batch_results = {}
+        if engine == 'vectorized' and HAS_NUMPY and window_size >= 3:
+            batch_results = self._rolling_batch(shard, window_size, use_modified)
+        
+        results = {}
+        for market, data in shard:
+            try:
+                if market in batch_results:
+                    rolling_results = batch_results[market]
+                else:
+                    rolling_results = self.analyze_trend_rolling_window_cached(
+                        market, data, window_size=window_size, use_modified=use_modified, engine=engine,
+                        with_slope=with_slope
+                    )
+                
+                if rolling_results:
+                    results[market] = self.summarize_rolling_results(market, rolling_results)
+                else:
+                    results[market] = {'error': 'no windows'}
+            except Exception as e:
+                results[market] = {'error': str(e)}
+        
+        return results
+    
     def analyze_rolling_window_all_markets(self, days: int = 90, window_size: int = 30, 
-                                          use_modified: bool = True):
+                                          use_modified: bool = True, engine: str = 'vectorized',
+                                          with_slope: bool = True):
         """
         Analyze ALL USDT markets using rolling window approach
         
@@ -527,6 +876,8 @@ class CoinExDailyData:
             days: Total days of historical data to fetch
             window_size: Size of rolling window (e.g., 30 days)
             use_modified: If True, use Hamed-Rao modified test
+            engine: Mann-Kendall engine ('vectorized', 'rolling' or 'pymannkendall')
+            with_slope: Compute Sen's slope (see analyze_trend_rolling_window)
             
         Returns:
             Dictionary with market results
@@ -538,7 +889,7 @@ class CoinExDailyData:
         print(f"Test Type: {'Hamed-Rao Modified' if use_modified else 'Original Mann-Kendall'}")
         print(f"{'='*100}\n")
         
-        if not HAS_MK:
+        if not HAS_MK and not uses_vectorized(engine, window_size):
             print("❌ pymannkendall not installed")
             return {}
         
@@ -578,54 +929,27 @@ class CoinExDailyData:
                     continue
                 
                 # Parse data
-                parsed_data = self.parse_kline_data(klines)
+                parsed_data = self.parse_kline_series(klines, market)
                 if not parsed_data or len(parsed_data) < days:
                     failed += 1
                     continue
                 
-                # Analyze with rolling window
-                rolling_results = self.analyze_trend_rolling_window(
+                # Analyze with rolling window (reusing cached windows)
+                rolling_results = self.analyze_trend_rolling_window_cached(
+                    market,
                     parsed_data, 
                     window_size=window_size, 
-                    use_modified=use_modified
+                    use_modified=use_modified,
+                    engine=engine,
+                    with_slope=with_slope
                 )
                 
                 if rolling_results:
-                    # Calculate aggregate metrics
-                    trends = [r['trend'] for r in rolling_results]
-                    taus = [r['tau'] for r in rolling_results if r['tau'] is not None]
-                    
-                    # Most recent window (most important)
-                    latest_window = rolling_results[-1]
-                    
-                    # Trend consistency
-                    increasing_count = trends.count('increasing')
-                    decreasing_count = trends.count('decreasing')
-                    no_trend_count = trends.count('no trend')
-                    
-                    # Average tau across all windows
-                    avg_tau = sum(taus) / len(taus) if taus else 0
-                    
-                    market_results[market] = {
-                        'market': market,
-                        'total_windows': len(rolling_results),
-                        'latest_trend': latest_window['trend'],
-                        'latest_tau': latest_window['tau'],
-                        'latest_p_value': latest_window['p_value'],
-                        'latest_slope': latest_window['slope'],
-                        'latest_significance': latest_window['significance'],
-                        'increasing_windows': increasing_count,
-                        'decreasing_windows': decreasing_count,
-                        'no_trend_windows': no_trend_count,
-                        'avg_tau': avg_tau,
-                        'trend_consistency': max(increasing_count, decreasing_count) / len(rolling_results) * 100,
-                        'all_windows': rolling_results
-                    }
-                    
+                    market_results[market] = self.summarize_rolling_results(market, rolling_results)
                     successful += 1
                     
                     if i <= 3:
-                        print(f"  ✓ {market}: {len(rolling_results)} windows, latest={latest_window['trend']}")
+                        print(f"  ✓ {market}: {len(rolling_results)} windows, latest={rolling_results[-1]['trend']}")
                 else:
                     failed += 1
                 
@@ -882,7 +1206,9 @@ class CoinExDailyData:
             traceback.print_exc()
     
     def analyze_rolling_window_from_csv(self, csv_file: str, window_size: int = 30, 
-                                       use_modified: bool = True, min_data_points: int = 0):
+                                       use_modified: bool = True, min_data_points: int = 0,
+                                       engine: str = 'vectorized', workers: Optional[int] = None,
+                                       with_slope: bool = True):
         """
         Analyze rolling window trends from a pre-existing CSV file
         
@@ -891,6 +1217,14 @@ class CoinExDailyData:
             window_size: Size of rolling window
             use_modified: If True, use Hamed-Rao modified test
             min_data_points: Minimum data points required (0 = only check window_size)
+            engine: Mann-Kendall engine ('vectorized' evaluates every window of
+                    every market in one batch, 'rolling' updates S incrementally
+                    per market (slope and Hamed-Rao stay O(w^2) per window unless
+                    with_slope and use_modified are off), or
+                    'pymannkendall')
+            workers: Worker processes to shard markets across (default: CPU count,
+                     1 = run in this process)
+            with_slope: Compute Sen's slope (see analyze_trend_rolling_window)
             
         Returns:
             Dictionary with market results
@@ -902,45 +1236,38 @@ class CoinExDailyData:
         print(f"Test Type: {'Hamed-Rao Modified' if use_modified else 'Original Mann-Kendall'}")
         print(f"{'='*100}\n")
         
-        if not HAS_MK:
+        if not HAS_MK and not uses_vectorized(engine, window_size):
             print("❌ pymannkendall not installed")
             return {}
         
-        import os
-        if not os.path.exists(csv_file):
+        store = open_store(csv_file)
+        if not store.exists():
             print(f"❌ CSV file not found: {csv_file}")
             return {}
         
         try:
-            # Load data from CSV
+            # Load data (CSV, Parquet or Arrow IPC depending on extension)
             print(f"Loading data from {csv_file}...")
+            load_start = time.time()
             
-            with open(csv_file, 'r') as f:
-                reader = csv.DictReader(f)
-                all_rows = list(reader)
+            columns_by_market = store.read_markets()
             
-            print(f"✓ Loaded {len(all_rows)} rows from CSV")
-            
-            # Group by market
+            # Columns become one CandleSeries per market (row dicts without NumPy)
             markets_data = {}
-            for row in all_rows:
-                market = row.get('Market', row.get('market', ''))
-                if not market:
+            for market, columns in columns_by_market.items():
+                if HAS_CANDLES:
+                    markets_data[market] = CandleSeries.from_columns(market, columns)
                     continue
-                
-                if market not in markets_data:
-                    markets_data[market] = []
-                
-                # Convert to format expected by analyze_trend
-                markets_data[market].append({
-                    'Date': row.get('Date', ''),
-                    'Timestamp': row.get('Timestamp', ''),
-                    'Close': float(row.get('Close', row.get('close', 0))),
-                    'Open': float(row.get('Open', row.get('open', 0))),
-                    'High': float(row.get('High', row.get('high', 0))),
-                    'Low': float(row.get('Low', row.get('low', 0))),
-                    'Volume': float(row.get('Volume', row.get('volume', 0)))
-                })
+                markets_data[market] = [
+                    {'Date': date, 'Timestamp': timestamp, 'Close': close, 'Open': open_,
+                     'High': high, 'Low': low, 'Volume': volume}
+                    for date, timestamp, close, open_, high, low, volume in zip(
+                        *(as_list(columns[name]) for name in
+                          ('Date', 'Timestamp', 'Close', 'Open', 'High', 'Low', 'Volume')))
+                ]
+            
+            total_rows = sum(len(v) for v in markets_data.values())
+            print(f"✓ Loaded {total_rows} rows in {time.time() - load_start:.2f}s")
             
             # Filter for USDT markets
             usdt_markets = {k: v for k, v in markets_data.items() if k.endswith('USDT')}
@@ -1006,80 +1333,72 @@ class CoinExDailyData:
             # Show data range for first few markets
             print(f"📅 DATA RANGE SAMPLE:")
             for i, (market, data) in enumerate(list(markets_with_enough_data.items())[:3]):
-                sorted_data = sorted(data, key=lambda x: x['Date'])
-                print(f"   {market}: {sorted_data[0]['Date']} to {sorted_data[-1]['Date']} ({len(data)} days)")
+                print(f"   {market}: {data[0]['Date']} to {data[-1]['Date']} ({len(data)} days)")
             print()
             
             proceed = input(f"Analyze {len(markets_with_enough_data)} markets? (y/n): ").strip().lower()
             if proceed != 'y':
                 return {}
             
+            # Stores return candles in timestamp order; keep only the period we're analyzing.
+            # Each market travels to the workers as a CandleSeries view (compact arrays).
+            compact = [(market, data[-total_days:]) for market, data in markets_with_enough_data.items()]
+            
+            workers = min(workers or os.cpu_count() or 1, len(compact))
+            analysis_start = time.time()
+            cache_hits = cache_misses = 0
+            
+            if workers <= 1:
+                if self.mk_cache:
+                    cache_hits, cache_misses = self.mk_cache.hits, self.mk_cache.misses
+                shard_results = self.analyze_rolling_shard(compact, window_size, use_modified, engine, with_slope)
+                if self.mk_cache:
+                    cache_hits = self.mk_cache.hits - cache_hits
+                    cache_misses = self.mk_cache.misses - cache_misses
+            else:
+                # Several shards per worker so a slow shard does not leave cores idle
+                num_shards = min(len(compact), workers * 4)
+                shards = [compact[k::num_shards] for k in range(num_shards)]
+                print(f"Analyzing in {workers} worker processes ({num_shards} shards)...")
+                
+                cache_file = self.mk_cache_file
+                cache_entries = self.mk_cache_entries
+                
+                shard_results = {}
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    futures = [executor.submit(_analyze_rolling_shard_worker, shard, window_size,
+                                               use_modified, engine, cache_file, cache_entries, with_slope)
+                               for shard in shards]
+                    for done, future in enumerate(as_completed(futures), 1):
+                        results, hits, misses = future.result()
+                        shard_results.update(results)
+                        cache_hits += hits
+                        cache_misses += misses
+                        if done % -(-num_shards // 10) == 0 or done == num_shards:
+                            print(f"Progress: {done}/{num_shards} shards... ({len(shard_results)} markets)")
+            
+            print(f"✓ Analyzed {len(compact)} markets in {time.time() - analysis_start:.2f}s")
+            if self.mk_cache:
+                print(f"   Result cache: {cache_hits} windows reused, {cache_misses} computed")
+            print()
+            
+            # Merge in the original market order
             market_results = {}
             successful = 0
             failed = 0
             
-            for i, (market, data) in enumerate(markets_with_enough_data.items(), 1):
-                if i % 50 == 0 or i <= 3:
-                    print(f"Progress: {i}/{len(markets_with_enough_data)} markets... (Success: {successful})")
-                
-                try:
-                    # Sort by date to ensure chronological order
-                    data_sorted = sorted(data, key=lambda x: x['Date'])
-                    
-                    # Use only the period we're analyzing
-                    data_to_analyze = data_sorted[-total_days:]
-                    
-                    # Analyze with rolling window
-                    rolling_results = self.analyze_trend_rolling_window(
-                        data_to_analyze,
-                        window_size=window_size,
-                        use_modified=use_modified
-                    )
-                    
-                    if rolling_results:
-                        # Calculate aggregate metrics
-                        trends = [r['trend'] for r in rolling_results]
-                        taus = [r['tau'] for r in rolling_results if r['tau'] is not None]
-                        
-                        # Most recent window
-                        latest_window = rolling_results[-1]
-                        
-                        # Trend consistency
-                        increasing_count = trends.count('increasing')
-                        decreasing_count = trends.count('decreasing')
-                        no_trend_count = trends.count('no trend')
-                        
-                        # Average tau
-                        avg_tau = sum(taus) / len(taus) if taus else 0
-                        
-                        market_results[market] = {
-                            'market': market,
-                            'total_windows': len(rolling_results),
-                            'latest_trend': latest_window['trend'],
-                            'latest_tau': latest_window['tau'],
-                            'latest_p_value': latest_window['p_value'],
-                            'latest_slope': latest_window['slope'],
-                            'latest_significance': latest_window['significance'],
-                            'increasing_windows': increasing_count,
-                            'decreasing_windows': decreasing_count,
-                            'no_trend_windows': no_trend_count,
-                            'avg_tau': avg_tau,
-                            'trend_consistency': max(increasing_count, decreasing_count) / len(rolling_results) * 100,
-                            'all_windows': rolling_results
-                        }
-                        
-                        successful += 1
-                        
-                        if i <= 3:
-                            print(f"  ✓ {market}: {len(rolling_results)} windows, latest={latest_window['trend']}")
-                    else:
-                        failed += 1
-                        
-                except Exception as e:
+            for i, (market, _) in enumerate(compact, 1):
+                result = shard_results.get(market, {'error': 'missing result'})
+                if 'error' in result:
                     if i <= 3:
-                        print(f"  ❌ {market}: {e}")
+                        print(f"  ❌ {market}: {result['error']}")
                     failed += 1
                     continue
+                
+                market_results[market] = result
+                successful += 1
+                if i <= 3:
+                    print(f"  ✓ {market}: {result['total_windows']} windows, latest={result['latest_trend']}")
             
             print(f"\n✓ Rolling window analysis complete!")
             print(f"   Successfully analyzed: {successful}")
@@ -1191,7 +1510,7 @@ class CoinExDailyData:
             
             if not silent:
                 print(f"Fetching {limit} days of data for {market}...")
-            response = requests.get(url, params=params, timeout=30)
+            response = self._get(url, params=params, timeout=30)
             
             if response.status_code == 200:
                 data = response.json()
@@ -1244,7 +1563,7 @@ class CoinExDailyData:
             }
             
             print(f"Fetching {limit} days of data for {market}...")
-            response = requests.get(url, params=params, timeout=30)
+            response = self._get(url, params=params, timeout=30)
             
             if response.status_code == 200:
                 data = response.json()
@@ -1274,7 +1593,33 @@ class CoinExDailyData:
             import traceback
             traceback.print_exc()
             return []
-    
+
+    def fetch_klines_concurrently(self, markets: List[str], limit: int = 1000,
+                                  limits: Optional[Dict[str, int]] = None):
+        """
+        Fetch daily candlestick data for many markets in parallel
+
+        Requests run on a bounded thread pool and are paced by the shared
+        token bucket, so throughput follows the configured request rate
+        instead of a fixed sleep between markets.
+
+        Args:
+            markets: List of market symbols
+            limit: Number of days to fetch per market (max 1000)
+            limits: Optional per-market overrides of limit (incremental sync)
+
+        Yields:
+            (market, klines) tuples in the same order as markets
+        """
+        limits = limits or {}
+
+        def fetch(market):
+            return self.get_daily_klines(market, limit=limits.get(market, limit), silent=True)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for market, klines in zip(markets, executor.map(fetch, markets)):
+                yield market, klines
+
     def parse_kline_data(self, klines: List) -> List[Dict]:
         """
         Parse kline data into readable format
@@ -1340,6 +1685,42 @@ class CoinExDailyData:
         
         return parsed_data
     
+    def parse_kline_series(self, klines: List, market: str = ''):
+        """
+        Parse klines into a CandleSeries for analysis
+        
+        Falls back to parse_kline_data rows when NumPy is not installed; both
+        support len(), slicing and row access like data[0]['Close'].
+        
+        Args:
+            klines: Kline data as returned by get_daily_klines
+            market: Market symbol
+        """
+        if not HAS_CANDLES:
+            return self.parse_kline_data(klines)
+        
+        # Bulk column-wise parse; malformed klines are reported once, not per row
+        columns, rejected = parse_klines(klines)
+        if rejected:
+            print(f"⚠️  {market}: {rejection_summary(rejected, len(klines))}")
+        return CandleSeries(market or columns['market'], columns['ts'],
+                            *(columns[name] for name in PRICE_FIELDS))
+    
+    def parse_kline_rows(self, klines: List, market: str = '') -> List[Dict]:
+        """
+        Parse klines into parse_kline_data-style rows for saving
+        
+        Uses the bulk parser when NumPy is installed, so malformed klines are
+        reported in one line per market rather than one per row.
+        
+        Args:
+            klines: Kline data as returned by get_daily_klines
+            market: Market symbol written to every row
+        """
+        if not HAS_CANDLES:
+            return self.parse_kline_data(klines)
+        return self.parse_kline_series(klines, market).to_rows()
+    
     def save_to_csv(self, data: List[Dict], filename: str, append: bool = False):
         """
         Save parsed data to CSV
@@ -1349,31 +1730,64 @@ class CoinExDailyData:
             filename: Output filename
             append: If True, append to existing file; if False, overwrite
         """
-        if not data:
-            print("❌ No data to save")
-            return
+        CsvStore(filename).write(data, append=append)
+    
+    def incremental_limits(self, markets: List[str], days: int, last_rows: Dict[str, Dict]) -> Dict[str, int]:
+        """
+        Work out how many candles each market needs to catch up
         
-        import os
-        file_exists = os.path.exists(filename)
+        The newest stored candle is always re-fetched, since it may have been
+        saved while that day was still in progress.
         
-        try:
-            mode = 'a' if append else 'w'
-            with open(filename, mode, newline='') as f:
-                writer = csv.DictWriter(f, fieldnames=data[0].keys())
-                
-                # Only write header if file doesn't exist or we're overwriting
-                if not file_exists or not append:
-                    writer.writeheader()
-                
-                writer.writerows(data)
+        Args:
+            markets: Markets to sync
+            days: Full history length for markets not yet stored
+            last_rows: Output of the store's last_rows()
             
-            if append and file_exists:
-                print(f"✓ Appended {len(data)} records to {filename}")
+        Returns:
+            Dictionary mapping market -> kline limit
+        """
+        now = int(time.time())
+        limits = {}
+        for market in markets:
+            last_row = last_rows.get(market)
+            if last_row is None:
+                limits[market] = days
             else:
-                print(f"✓ Saved {len(data)} records to {filename}")
+                missing_days = max(0, (now - last_row['Unix_Timestamp']) // 86400)
+                limits[market] = min(days, missing_days + 1)
+        return limits
+    
+    def split_incremental(self, parsed_data: List[Dict], last_row: Dict):
+        """
+        Separate freshly fetched candles into new rows and a refreshed last row
+        
+        Args:
+            parsed_data: Parsed candles for one market
+            last_row: Newest stored row for the same market
             
-        except Exception as e:
-            print(f"❌ Error saving CSV: {e}")
+        Returns:
+            Tuple (new_rows, refreshed_row). new_rows are strictly newer than
+            the stored data; refreshed_row is the re-fetched copy of the stored
+            candle if its values changed, otherwise None.
+        """
+        last_timestamp = last_row['Unix_Timestamp']
+        new_rows = [d for d in parsed_data if d['Unix_Timestamp'] > last_timestamp]
+        
+        refreshed_row = None
+        for d in parsed_data:
+            if d['Unix_Timestamp'] == last_timestamp:
+                for field in ('Open', 'Close', 'High', 'Low', 'Volume', 'Value'):
+                    try:
+                        changed = float(last_row.get(field, 0)) != d[field]
+                    except (ValueError, TypeError):
+                        changed = True
+                    if changed:
+                        refreshed_row = d
+                        break
+                break
+        
+        return new_rows, refreshed_row
     
     def fetch_and_save(self, market: str, days: int = 365, filename: Optional[str] = None, append: bool = False):
         """
@@ -1392,7 +1806,7 @@ class CoinExDailyData:
             return
         
         # Parse data
-        parsed_data = self.parse_kline_data(klines)
+        parsed_data = self.parse_kline_rows(klines, market)
         
         # Generate filename if not provided
         if filename is None:
@@ -1416,70 +1830,70 @@ class CoinExDailyData:
             change_pct = ((last_close - first_close) / first_close) * 100
             print(f"   Change:      {change_pct:+.2f}%")
     
-    def fetch_all_usdt_markets(self, days: int = 365, filename: str = "all_usdt_markets_daily.csv",
-                              min_data_points: int = 0):
+    def sync_markets(self, markets: List[str], days: int, filename: str, min_data_points: int = 0,
+                     incremental: bool = False):
         """
-        Fetch data for ALL USDT markets on CoinEx
+        Fetch daily candles for several markets into one file
         
         Args:
+            markets: Market symbols to fetch
             days: Number of days to fetch
-            filename: Output CSV filename
-            min_data_points: Minimum data points required (0 = no filter, markets with fewer points excluded)
+            filename: Output file (.csv, .parquet or .arrow)
+            min_data_points: Minimum data points required for markets not yet
+                             stored (0 = no filter)
+            incremental: If True, keep the existing file and only download candles
+                         newer than the last stored Unix_Timestamp per market
         """
-        print(f"\n{'='*80}")
-        print(f"Fetching ALL USDT Markets")
-        print(f"{'='*80}\n")
-        
-        # Get all markets
-        all_markets = self.get_all_markets()
-        
-        if not all_markets:
-            print("❌ Could not retrieve markets list")
-            return
-        
-        # Filter for USDT markets only
-        usdt_markets = [m for m in all_markets if m.endswith('USDT')]
-        
-        print(f"Found {len(usdt_markets)} USDT markets")
-        print(f"Fetching {days} days of data for each market")
-        if min_data_points > 0:
-            print(f"Filter: Only keeping markets with {min_data_points}+ data points")
-        print(f"Output file: {filename}\n")
-        
-        proceed = input(f"This will fetch {len(usdt_markets)} markets. Continue? (y/n): ").strip().lower()
-        if proceed != 'y':
-            print("❌ Cancelled")
-            return
-        
-        import os
-        # Remove existing file if it exists
-        if os.path.exists(filename):
-            os.remove(filename)
+        # CSV, Parquet or Arrow IPC depending on the file extension
+        store = open_store(filename)
+        last_rows = {}
+        if incremental and store.exists():
+            # Keep existing data and only fetch the missing tail per market
+            last_rows = store.last_rows()
+            print(f"🔄 Incremental sync: {len(last_rows)} markets already stored in {filename}\n")
+        elif store.exists():
+            # Remove existing file if it exists
+            store.remove()
             print(f"🗑️  Removed existing file: {filename}\n")
         
+        limits = self.incremental_limits(markets, days, last_rows)
+        replacements = {}
+        file_has_data = bool(last_rows)
+        
         total_records = 0
         successful = 0
         failed = 0
         filtered_out = 0
         
-        for i, market in enumerate(usdt_markets, 1):
-            print(f"\n[{i}/{len(usdt_markets)}] Processing {market}...")
+        start_time = time.time()
+        fetched = self.fetch_klines_concurrently(markets, limit=days, limits=limits)
+        
+        for i, (market, klines) in enumerate(fetched, 1):
+            print(f"\n[{i}/{len(markets)}] Processing {market}...")
             
             try:
-                klines = self.get_daily_klines(market, limit=days)
-                
                 if klines:
-                    parsed_data = self.parse_kline_data(klines)
+                    parsed_data = self.parse_kline_rows(klines, market)
                     
                     if parsed_data:
-                        # Check minimum data points
-                        if min_data_points > 0 and len(parsed_data) < min_data_points:
+                        if market in last_rows:
+                            # Keep only candles newer than what is stored
+                            parsed_data, refreshed_row = self.split_incremental(parsed_data, last_rows[market])
+                            if refreshed_row:
+                                replacements[(market, refreshed_row['Unix_Timestamp'])] = refreshed_row
+                            if not parsed_data:
+                                print(f"   ✓ Up to date")
+                                successful += 1
+                                continue
+                        elif min_data_points > 0 and len(parsed_data) < min_data_points:
+                            # Check minimum data points
                             print(f"   ⚠️  Filtered: Only {len(parsed_data)} data points (need {min_data_points})")
                             filtered_out += 1
                             continue
                         
-                        # Append to single file (only if we have successful markets already or this is first)
-                        self.save_to_csv(parsed_data, filename, append=(successful > 0))
+                        # Append to single file (first write creates it unless data is already stored)
+                        store.write(parsed_data, append=file_has_data)
+                        file_has_data = True
                         total_records += len(parsed_data)
                         successful += 1
                         
@@ -1496,32 +1910,39 @@ class CoinExDailyData:
                 print(f"   ❌ Error: {e}")
                 failed += 1
             
-            # Rate limiting - be nice to the API
-            if i < len(usdt_markets):
-                time.sleep(0.5)  # Small delay between requests
-            
             # Progress update every 50 markets
             if i % 50 == 0:
-                print(f"\n--- Progress: {i}/{len(usdt_markets)} markets processed ---")
+                print(f"\n--- Progress: {i}/{len(markets)} markets processed ---")
                 print(f"    Successful: {successful} | Failed: {failed} | Filtered: {filtered_out} | Total records: {total_records}\n")
         
+        store.flush()
+        
+        # Overwrite stored candles that were still in progress when last saved
+        store.replace_rows(replacements)
+        
         print(f"\n{'='*80}")
         print(f"✓ Completed! All USDT markets data saved to: {filename}")
-        print(f"   Total markets attempted: {len(usdt_markets)}")
+        print(f"   Total markets attempted: {len(markets)}")
         print(f"   Successful:              {successful}")
         print(f"   Failed:                  {failed}")
         if min_data_points > 0:
             print(f"   Filtered out:            {filtered_out} (< {min_data_points} data points)")
         print(f"   Total records:           {total_records}")
+        print(f"   Elapsed:                 {time.time() - start_time:.1f}s")
         print(f"{'='*80}")
+        self.display_latency_stats()
     
-    def fetch_multiple_markets(self, markets: List[str], days: int = 365, filename: str = "all_markets_daily.csv"):
+    def fetch_all_usdt_markets(self, days: int = 365, filename: str = "all_usdt_markets_daily.csv",
+                              min_data_points: int = 0, incremental: bool = False):
         """
         Fetch data for ALL USDT markets on CoinEx
         
         Args:
             days: Number of days to fetch
             filename: Output CSV filename
+            min_data_points: Minimum data points required (0 = no filter, markets with fewer points excluded)
+            incremental: If True, keep the existing file and only download candles
+                         newer than the last stored Unix_Timestamp per market
         """
         print(f"\n{'='*80}")
         print(f"Fetching ALL USDT Markets")
@@ -1539,6 +1960,8 @@ class CoinExDailyData:
         
         print(f"Found {len(usdt_markets)} USDT markets")
         print(f"Fetching {days} days of data for each market")
+        if min_data_points > 0:
+            print(f"Filter: Only keeping markets with {min_data_points}+ data points")
         print(f"Output file: {filename}\n")
         
         proceed = input(f"This will fetch {len(usdt_markets)} markets. Continue? (y/n): ").strip().lower()
@@ -1546,60 +1969,43 @@ class CoinExDailyData:
             print("❌ Cancelled")
             return
         
-        import os
-        # Remove existing file if it exists
-        if os.path.exists(filename):
-            os.remove(filename)
-            print(f"🗑️  Removed existing file: {filename}\n")
+        self.sync_markets(usdt_markets, days, filename, min_data_points, incremental)
+    
+    def fetch_multiple_markets(self, markets: List[str], days: int = 365, filename: str = "all_markets_daily.csv",
+                               incremental: bool = False):
+        """
+        Fetch data for ALL USDT markets on CoinEx
         
-        total_records = 0
-        successful = 0
-        failed = 0
+        Args:
+            days: Number of days to fetch
+            filename: Output CSV filename
+            incremental: If True, keep the existing file and only download candles
+                         newer than the last stored Unix_Timestamp per market
+        """
+        print(f"\n{'='*80}")
+        print(f"Fetching ALL USDT Markets")
+        print(f"{'='*80}\n")
         
-        for i, market in enumerate(usdt_markets, 1):
-            print(f"\n[{i}/{len(usdt_markets)}] Processing {market}...")
-            
-            try:
-                klines = self.get_daily_klines(market, limit=days)
-                
-                if klines:
-                    parsed_data = self.parse_kline_data(klines)
-                    
-                    if parsed_data:
-                        # Append to single file
-                        self.save_to_csv(parsed_data, filename, append=(i > 1))
-                        total_records += len(parsed_data)
-                        successful += 1
-                        
-                        # Brief summary
-                        print(f"   ✓ Saved {len(parsed_data)} records")
-                    else:
-                        print(f"   ⚠️  No valid data")
-                        failed += 1
-                else:
-                    print(f"   ⚠️  No data returned")
-                    failed += 1
-                
-            except Exception as e:
-                print(f"   ❌ Error: {e}")
-                failed += 1
-            
-            # Rate limiting - be nice to the API
-            if i < len(usdt_markets):
-                time.sleep(0.5)  # Small delay between requests
-            
-            # Progress update every 50 markets
-            if i % 50 == 0:
-                print(f"\n--- Progress: {i}/{len(usdt_markets)} markets processed ---")
-                print(f"    Successful: {successful} | Failed: {failed} | Total records: {total_records}\n")
+        # Get all markets
+        all_markets = self.get_all_markets()
         
-        print(f"\n{'='*80}")
-        print(f"✓ Completed! All USDT markets data saved to: {filename}")
-        print(f"   Total markets attempted: {len(usdt_markets)}")
-        print(f"   Successful:              {successful}")
-        print(f"   Failed:                  {failed}")
-        print(f"   Total records:           {total_records}")
-        print(f"{'='*80}")
+        if not all_markets:
+            print("❌ Could not retrieve markets list")
+            return
+        
+        # Filter for USDT markets only
+        usdt_markets = [m for m in all_markets if m.endswith('USDT')]
+        
+        print(f"Found {len(usdt_markets)} USDT markets")
+        print(f"Fetching {days} days of data for each market")
+        print(f"Output file: {filename}\n")
+        
+        proceed = input(f"This will fetch {len(usdt_markets)} markets. Continue? (y/n): ").strip().lower()
+        if proceed != 'y':
+            print("❌ Cancelled")
+            return
+        
+        self.sync_markets(usdt_markets, days, filename, incremental=incremental)
         """
         Fetch data for multiple markets and save to ONE file
         
@@ -1629,7 +2035,7 @@ class CoinExDailyData:
             klines = self.get_daily_klines(market, limit=days)
             
             if klines:
-                parsed_data = self.parse_kline_data(klines)
+                parsed_data = self.parse_kline_rows(klines, market)
                 
                 if parsed_data:
                     # Append to single file (first market creates file, rest append)
@@ -1662,8 +2068,6 @@ def main():
     print(" " * 25 + "📊 COINEX DAILY DATA FETCHER 📊")
     print("="*80 + "\n")
     
-    fetcher = CoinExDailyData()
-    
     # ============= CONFIGURATION =============
     
     # Option 1: Fetch single market
@@ -1684,8 +2088,30 @@ def main():
     
     ALL_MARKETS_FILE = "all_markets_daily.csv"  # Single file for all markets
     
+    # Concurrent fetching (shared token-bucket rate limit)
+    MAX_WORKERS = 8
+    REQUESTS_PER_SECOND = 20.0
+    
+    # Mann-Kendall engine for rolling windows: 'vectorized', 'rolling' or 'pymannkendall'
+    MK_ENGINE = 'vectorized'
+    
+    # Sen's slope per window. False with the 'rolling' engine and the original
+    # test makes each window O(w); slopes are then NaN
+    MK_WITH_SLOPE = True
+    
+    # Worker processes for rolling analysis from file (None = all CPU cores, 1 = serial)
+    ANALYSIS_WORKERS = None
+    
+    # Cache of per-window Mann-Kendall results for options 7/8, e.g. "mk_cache.sqlite"
+    # (None = disabled; the file is only opened once a rolling analysis runs)
+    MK_CACHE_FILE = None
+    MK_CACHE_MAX_ENTRIES = 2_000_000
+    
     # =========================================
     
+    fetcher = CoinExDailyData(max_workers=MAX_WORKERS, requests_per_second=REQUESTS_PER_SECOND,
+                              mk_cache_file=MK_CACHE_FILE, mk_cache_entries=MK_CACHE_MAX_ENTRIES)
+    
     print("Select option:")
     print("1. Fetch single market")
     print("2. Fetch multiple markets (save to ONE file)")
@@ -1716,7 +2142,9 @@ def main():
         filename_input = input(f"Output filename (default: {ALL_MARKETS_FILE}): ").strip()
         filename = filename_input if filename_input else ALL_MARKETS_FILE
         
-        fetcher.fetch_multiple_markets(MARKETS, days, filename)
+        incremental = input("Only fetch candles missing from the existing file? (y/n, default: n): ").strip().lower() == 'y'
+        
+        fetcher.fetch_multiple_markets(MARKETS, days, filename, incremental=incremental)
         
     elif choice == "3":
         # List all markets
@@ -1758,7 +2186,7 @@ def main():
     elif choice == "5":
         # Fetch ALL USDT markets
         print("\n⚠️  WARNING: This will fetch data for ALL USDT markets on CoinEx")
-        print("   This may take a significant amount of time (10-30 minutes)")
+        print(f"   Requests run {MAX_WORKERS} at a time, paced at {REQUESTS_PER_SECOND:.0f} requests/second")
         print("   Depending on the number of markets (~300-400 USDT pairs)\n")
         
         days_input = input(f"Enter number of days (default: {DAYS}, max: 1000): ").strip()
@@ -1767,10 +2195,12 @@ def main():
         min_points_input = input(f"Minimum data points required (default: 0 = no filter): ").strip()
         min_points = int(min_points_input) if min_points_input else 0
         
-        filename_input = input("Output filename (default: all_usdt_markets_daily.csv): ").strip()
+        filename_input = input("Output filename (.csv, .parquet or .arrow; default: all_usdt_markets_daily.csv): ").strip()
         filename = filename_input if filename_input else "all_usdt_markets_daily.csv"
         
-        fetcher.fetch_all_usdt_markets(days, filename, min_points)
+        incremental = input("Only fetch candles missing from the existing file? (y/n, default: n): ").strip().lower() == 'y'
+        
+        fetcher.fetch_all_usdt_markets(days, filename, min_points, incremental=incremental)
     
     elif choice == "6":
         # Trend analysis
@@ -1833,7 +2263,9 @@ def main():
             results = fetcher.analyze_rolling_window_all_markets(
                 days=days, 
                 window_size=window_size, 
-                use_modified=use_modified
+                use_modified=use_modified,
+                engine=MK_ENGINE,
+                with_slope=MK_WITH_SLOPE
             )
             
             if results:
@@ -1866,7 +2298,7 @@ def main():
         print("   Analyze pre-fetched data (much faster!)")
         print("   Use CSV files from option 2 or option 5\n")
         
-        csv_file = input("Enter CSV filename (e.g., all_markets_daily.csv): ").strip()
+        csv_file = input("Enter data filename (.csv, .parquet or .arrow, e.g., all_markets_daily.csv): ").strip()
         
         if not csv_file:
             print("❌ No filename provided")
@@ -1891,7 +2323,10 @@ def main():
                 csv_file=csv_file,
                 window_size=window_size,
                 use_modified=use_modified,
-                min_data_points=min_points
+                min_data_points=min_points,
+                engine=MK_ENGINE,
+                workers=ANALYSIS_WORKERS,
+                with_slope=MK_WITH_SLOPE
             )
             
             if results:
@@ -4,9 +4,14 @@ CoinEx Market Lister
 Simple script to get all available markets from CoinEx.
 """
 
-import requests
 from typing import List
 
+from coinex_http import get_shared_session, timed_get
+from metrics import LatencyHistogram
+
+# Latency of every request made through this script
+request_latency = LatencyHistogram()
+
 
 def get_all_markets() -> List[dict]:
     """Get all available markets with details"""
@@ -14,7 +19,7 @@ def get_all_markets() -> List[dict]:
         url = "https://api.coinex.com/v2/spot/market"
         
         print("Fetching markets from CoinEx...")
-        response = requests.get(url, timeout=30)
+        response = timed_get(get_shared_session(), url, request_latency, timeout=30)
         
         if response.status_code == 200:
             data = response.json()
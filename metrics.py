@@ -0,0 +1,160 @@
+"""
+Latency Metrics
+
+Low-overhead latency histogram with HDR-style log-linear buckets:
+values are grouped by power-of-two magnitude, and each magnitude is split
+into a fixed number of linear sub-buckets, so relative precision stays
+constant from microseconds to minutes without storing every sample.
+"""
+
+import threading
+from typing import Dict, Optional
+
+
+class LatencyHistogram:
+    """Log-linear latency histogram (values recorded in seconds, stored in microseconds)"""
+
+    def __init__(self, sub_buckets: int = 16, max_seconds: float = 3600.0):
+        """
+        Initialize the histogram
+
+        Args:
+            sub_buckets: Linear sub-buckets per power of two (precision ~1/sub_buckets)
+            max_seconds: Largest value tracked exactly; larger values land in the top bucket
+        """
+        self.sub_buckets = sub_buckets
+        self.sub_bits = sub_buckets.bit_length() - 1
+        if 1 << self.sub_bits != sub_buckets:
+            raise ValueError("sub_buckets must be a power of two")
+
+        max_us = int(max_seconds * 1_000_000)
+        self.num_buckets = self._index(max_us) + 1
+        self.counts = [0] * self.num_buckets
+        self.total = 0
+        self.sum_us = 0
+        self.min_us = None
+        self.max_us = 0
+        self.lock = threading.Lock()
+
+    def _index(self, value_us: int) -> int:
+        """Map a value in microseconds to its bucket index"""
+        if value_us < self.sub_buckets:
+            return value_us
+        magnitude = value_us.bit_length() - 1 - self.sub_bits
+        return ((magnitude + 1) << self.sub_bits) + ((value_us >> magnitude) - self.sub_buckets)
+
+    def _bucket_upper_us(self, index: int) -> int:
+        """Highest value in microseconds that maps to the bucket"""
+        if index < self.sub_buckets:
+            return index
+        magnitude = (index >> self.sub_bits) - 1
+        sub = (index & (self.sub_buckets - 1)) + self.sub_buckets
+        return ((sub + 1) << magnitude) - 1
+
+    def record(self, seconds: float):
+        """
+        Record one latency sample
+
+        Args:
+            seconds: Latency in seconds (negative values are clamped to 0)
+        """
+        value_us = int(seconds * 1_000_000) if seconds > 0 else 0
+        index = min(self._index(value_us), self.num_buckets - 1)
+        with self.lock:
+            self.counts[index] += 1
+            self.total += 1
+            self.sum_us += value_us
+            if self.min_us is None or value_us < self.min_us:
+                self.min_us = value_us
+            if value_us > self.max_us:
+                self.max_us = value_us
+
+    def merge(self, other: "LatencyHistogram"):
+        """Add another histogram's samples into this one (same bucket layout)"""
+        if other.sub_buckets != self.sub_buckets or other.num_buckets != self.num_buckets:
+            raise ValueError("Histogram layouts do not match")
+        with self.lock:
+            for i, count in enumerate(other.counts):
+                self.counts[i] += count
+            self.total += other.total
+            self.sum_us += other.sum_us
+            if other.min_us is not None and (self.min_us is None or other.min_us < self.min_us):
+                self.min_us = other.min_us
+            self.max_us = max(self.max_us, other.max_us)
+
+    def reset(self):
+        """Discard all recorded samples"""
+        with self.lock:
+            self.counts = [0] * self.num_buckets
+            self.total = 0
+            self.sum_us = 0
+            self.min_us = None
+            self.max_us = 0
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """
+        Get the latency at a percentile
+
+        Args:
+            pct: Percentile between 0 and 100
+
+        Returns:
+            Latency in seconds (bucket upper bound), or None if empty
+        """
+        if self.total == 0:
+            return None
+        target = max(1, int(round(self.total * pct / 100.0)))
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return min(self._bucket_upper_us(i), self.max_us) / 1_000_000
+        return self.max_us / 1_000_000
+
+    def snapshot(self) -> Dict:
+        """Summary statistics in seconds"""
+        if self.total == 0:
+            return {'count': 0}
+        return {
+            'count': self.total,
+            'min': self.min_us / 1_000_000,
+            'mean': self.sum_us / self.total / 1_000_000,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+            'p999': self.percentile(99.9),
+            'max': self.max_us / 1_000_000,
+        }
+
+    def render(self, title: str = "Latency", width: int = 40) -> str:
+        """
+        Render a text histogram grouped by power-of-two millisecond ranges
+
+        Args:
+            title: Heading for the output
+            width: Width of the longest bar in characters
+        """
+        lines = [f"{title} ({self.total} samples)"]
+        if self.total == 0:
+            return lines[0]
+
+        stats = self.snapshot()
+        lines.append(f"   p50: {stats['p50']*1000:.1f}ms | p90: {stats['p90']*1000:.1f}ms | "
+                     f"p99: {stats['p99']*1000:.1f}ms | max: {stats['max']*1000:.1f}ms")
+
+        # Collapse sub-buckets into power-of-two ranges for display
+        ranges = {}
+        for i, count in enumerate(self.counts):
+            if count:
+                upper_ms = (self._bucket_upper_us(i) + 1) / 1000
+                edge = 1.0
+                while edge < upper_ms:
+                    edge *= 2
+                ranges[edge] = ranges.get(edge, 0) + count
+
+        peak = max(ranges.values())
+        for edge in sorted(ranges):
+            count = ranges[edge]
+            bar = "#" * max(1, int(count / peak * width))
+            lines.append(f"   <= {edge:>8.0f}ms | {bar} {count}")
+        return "\n".join(lines)
@@ -0,0 +1,165 @@
+"""
+Mann-Kendall Result Cache
+
+Persistent SQLite cache for per-window trend results. Historical daily
+windows never change, so re-running a rolling analysis only needs to
+compute windows that are new (or whose data changed, e.g. the refreshed
+in-progress candle).
+
+Entries are keyed by (market, window_size, variant, window_start,
+window_end, data_hash), where data_hash fingerprints the window's close
+prices and variant names what produced the result (the test type, plus
+anything that changes which fields a result has, such as a slope-less
+rolling run). The cache is bounded to max_entries; the least recently used
+entries are evicted first.
+"""
+
+import hashlib
+import json
+import sqlite3
+import time
+from array import array
+from typing import Dict, List, Tuple
+
+
+def window_hashes(closes, window_size: int) -> List[str]:
+    """
+    Fingerprint every rolling window of a close-price series
+
+    Args:
+        closes: 1-D sequence of close prices
+        window_size: Window length
+
+    Returns:
+        One hex digest per window
+    """
+    buffer = memoryview(array('d', [float(c) for c in closes])).cast('B')
+    step = 8  # bytes per float64
+    return [
+        hashlib.blake2b(buffer[i * step:(i + window_size) * step], digest_size=8).hexdigest()
+        for i in range(len(closes) - window_size + 1)
+    ]
+
+
+def _to_json(value):
+    """json.dumps fallback for NumPy scalars in pymannkendall results"""
+    if hasattr(value, 'item'):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+# Bumped when the table layout changes; an older table is dropped (it is only a cache)
+SCHEMA_VERSION = 2
+
+
+class MKResultCache:
+    """SQLite-backed cache of per-window Mann-Kendall results"""
+
+    def __init__(self, filename: str = "mk_cache.sqlite", max_entries: int = 2_000_000):
+        """
+        Open (or create) the cache database
+
+        Args:
+            filename: SQLite database file
+            max_entries: Entries kept before least-recently-used eviction
+        """
+        self.filename = filename
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        # WAL lets the analysis worker processes read and write concurrently
+        self.conn = sqlite3.connect(filename, timeout=60)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            self.conn.execute("DROP TABLE IF EXISTS mk_results")
+            self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS mk_results (
+                market TEXT NOT NULL,
+                window_size INTEGER NOT NULL,
+                variant TEXT NOT NULL,
+                window_start TEXT NOT NULL,
+                window_end TEXT NOT NULL,
+                data_hash TEXT NOT NULL,
+                result TEXT NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (market, window_size, variant, window_start, window_end, data_hash)
+            ) WITHOUT ROWID
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS mk_results_last_used ON mk_results (last_used)")
+        self.conn.commit()
+
+        self.entries = self.conn.execute("SELECT COUNT(*) FROM mk_results").fetchone()[0]
+
+    def get_windows(self, market: str, window_size: int, variant: str) -> Dict[Tuple[str, str, str], Dict]:
+        """
+        Load every cached window for a market/window size/variant
+
+        Returns:
+            Dictionary mapping (window_start, window_end, data_hash) -> result
+        """
+        rows = self.conn.execute(
+            "SELECT window_start, window_end, data_hash, result FROM mk_results "
+            "WHERE market = ? AND window_size = ? AND variant = ?",
+            (market, window_size, variant)
+        ).fetchall()
+        return {(start, end, data_hash): json.loads(result) for start, end, data_hash, result in rows}
+
+    def touch(self, market: str, window_size: int, variant: str):
+        """Mark a market's cached windows as recently used"""
+        with self.conn:
+            self.conn.execute(
+                "UPDATE mk_results SET last_used = ? WHERE market = ? AND window_size = ? AND variant = ?",
+                (time.time(), market, window_size, variant)
+            )
+
+    def put_windows(self, market: str, window_size: int, variant: str,
+                    entries: List[Tuple[str, str, str, Dict]]):
+        """
+        Store computed windows
+
+        Args:
+            market: Market symbol
+            window_size: Window length
+            variant: What produced the results, e.g. 'Original' or 'Hamed-Rao Modified'
+            entries: List of (window_start, window_end, data_hash, result)
+        """
+        if not entries:
+            return
+
+        now = time.time()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO mk_results VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(market, window_size, variant, start, end, data_hash,
+                  json.dumps(result, default=_to_json), now)
+                 for start, end, data_hash, result in entries]
+            )
+        self.entries += len(entries)
+
+        if self.entries > self.max_entries:
+            self.evict()
+
+    def evict(self):
+        """Drop least recently used entries down to 90% of max_entries"""
+        with self.conn:
+            self.entries = self.conn.execute("SELECT COUNT(*) FROM mk_results").fetchone()[0]
+            excess = self.entries - int(self.max_entries * 0.9)
+            if excess > 0:
+                # Entries sharing the cutoff timestamp go together (a market's windows are touched at once)
+                cutoff = self.conn.execute(
+                    "SELECT last_used FROM mk_results ORDER BY last_used LIMIT 1 OFFSET ?", (excess - 1,)
+                ).fetchone()[0]
+                deleted = self.conn.execute("DELETE FROM mk_results WHERE last_used <= ?", (cutoff,)).rowcount
+                self.entries -= deleted
+
+    def clear(self):
+        """Remove all cached results"""
+        with self.conn:
+            self.conn.execute("DELETE FROM mk_results")
+        self.entries = 0
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,422 @@
+"""
+OHLCV Storage Backends
+
+Pluggable storage for daily candle data written by get_ohlcv.py.
+
+- CsvStore keeps the original text format (one row per candle).
+- ColumnarStore writes a compressed, typed Parquet or Arrow IPC file
+  (float64 prices/volumes, int64 timestamps) sorted by Market and
+  Unix_Timestamp, which loads far faster than parsing CSV text.
+
+Use open_store(filename) to pick the backend from the file extension.
+"""
+
+import csv
+import os
+from typing import Dict, List
+
+try:
+    import numpy as np
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+    HAS_ARROW = True
+except ImportError:
+    HAS_ARROW = False
+
+
+OHLCV_COLUMNS = ['Date', 'Timestamp', 'Unix_Timestamp', 'Open', 'Close', 'High', 'Low',
+                 'Volume', 'Value', 'Market']
+FLOAT_COLUMNS = ['Open', 'Close', 'High', 'Low', 'Volume', 'Value']
+STRING_COLUMNS = ['Date', 'Timestamp', 'Market']
+
+PARQUET_EXTENSIONS = ('.parquet', '.pq')
+ARROW_EXTENSIONS = ('.arrow', '.feather', '.ipc')
+
+
+def open_store(filename: str, compression: str = 'zstd'):
+    """
+    Open the storage backend matching a filename's extension
+
+    Args:
+        filename: Data file (.csv, .parquet/.pq or .arrow/.feather/.ipc)
+        compression: Codec for columnar files
+
+    Returns:
+        CsvStore or ColumnarStore
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    if extension in PARQUET_EXTENSIONS + ARROW_EXTENSIONS:
+        return ColumnarStore(filename, compression=compression)
+    return CsvStore(filename)
+
+
+def as_list(values) -> list:
+    """Return a column as a Python list (NumPy arrays from ColumnarStore or lists from CsvStore)"""
+    return values.tolist() if hasattr(values, 'tolist') else values
+
+
+def _column_index(header: List[str]) -> Dict[str, int]:
+    """Map OHLCV column names to CSV header positions, accepting capitalized or lowercase names"""
+    index = {}
+    for name in OHLCV_COLUMNS:
+        if name in header:
+            index[name] = header.index(name)
+        elif name.lower() in header:
+            index[name] = header.index(name.lower())
+    return index
+
+
+def _market_order(markets_data: Dict[str, Dict[str, list]]) -> Dict[str, Dict[str, list]]:
+    """Sort each market's columns by Unix_Timestamp"""
+    for market, columns in markets_data.items():
+        timestamps = columns['Unix_Timestamp']
+        if any(timestamps[i] > timestamps[i + 1] for i in range(len(timestamps) - 1)):
+            order = sorted(range(len(timestamps)), key=timestamps.__getitem__)
+            markets_data[market] = {name: [values[i] for i in order] for name, values in columns.items()}
+    return markets_data
+
+
+class CsvStore:
+    """Plain CSV storage (original format)"""
+
+    def __init__(self, filename: str):
+        self.filename = filename
+
+    def exists(self) -> bool:
+        return os.path.exists(self.filename)
+
+    def remove(self):
+        if self.exists():
+            os.remove(self.filename)
+
+    def write(self, rows: List[Dict], append: bool = False):
+        """
+        Write parsed candles
+
+        Args:
+            rows: Parsed kline rows or a CandleSeries
+            append: If True, append to the existing file; if False, overwrite
+        """
+        if hasattr(rows, 'to_rows'):
+            rows = rows.to_rows()
+        if not rows:
+            print("❌ No data to save")
+            return
+
+        file_exists = self.exists()
+
+        try:
+            mode = 'a' if append else 'w'
+            with open(self.filename, mode, newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=rows[0].keys())
+
+                # Only write header if file doesn't exist or we're overwriting
+                if not file_exists or not append:
+                    writer.writeheader()
+
+                writer.writerows(rows)
+
+            if append and file_exists:
+                print(f"✓ Appended {len(rows)} records to {self.filename}")
+            else:
+                print(f"✓ Saved {len(rows)} records to {self.filename}")
+
+        except Exception as e:
+            print(f"❌ Error saving CSV: {e}")
+
+    def flush(self):
+        """Rows are written immediately; nothing to flush"""
+
+    def read_markets(self) -> Dict[str, Dict[str, list]]:
+        """
+        Load all candles grouped by market
+
+        Returns:
+            Dictionary mapping market -> column name -> list of values, sorted by Unix_Timestamp
+        """
+        markets_data = {}
+
+        with open(self.filename, 'r', newline='') as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if not header:
+                return {}
+
+            index = _column_index(header)
+            market_idx = index.get('Market')
+            if market_idx is None:
+                return {}
+
+            for row in reader:
+                market = row[market_idx] if market_idx < len(row) else ''
+                if not market:
+                    continue
+
+                columns = markets_data.get(market)
+                if columns is None:
+                    columns = {name: [] for name in OHLCV_COLUMNS}
+                    markets_data[market] = columns
+
+                for name in STRING_COLUMNS:
+                    idx = index.get(name)
+                    columns[name].append(row[idx] if idx is not None else '')
+                ts_idx = index.get('Unix_Timestamp')
+                columns['Unix_Timestamp'].append(int(row[ts_idx]) if ts_idx is not None and row[ts_idx] else 0)
+                for name in FLOAT_COLUMNS:
+                    idx = index.get(name)
+                    columns[name].append(float(row[idx]) if idx is not None and row[idx] else 0.0)
+
+        return _market_order(markets_data)
+
+    def last_rows(self) -> Dict[str, Dict]:
+        """
+        Read the newest stored candle for every market
+
+        Returns:
+            Dictionary mapping market -> row with the highest Unix_Timestamp
+            (keyed by the capitalized column names, as read_markets)
+        """
+        if not self.exists():
+            return {}
+
+        last_rows = {}
+        with open(self.filename, 'r', newline='') as f:
+            reader = csv.reader(f)
+            index = _column_index(next(reader, None) or [])
+            if 'Market' not in index or 'Unix_Timestamp' not in index:
+                return {}
+
+            for values in reader:
+                row = {name: values[idx] for name, idx in index.items() if idx < len(values)}
+                market = row.get('Market', '')
+                if not market:
+                    continue
+                try:
+                    timestamp = int(row['Unix_Timestamp'])
+                except (KeyError, ValueError, TypeError):
+                    continue
+
+                stored = last_rows.get(market)
+                if stored is None or timestamp > stored['Unix_Timestamp']:
+                    row['Unix_Timestamp'] = timestamp
+                    last_rows[market] = row
+
+        return last_rows
+
+    def replace_rows(self, replacements: Dict):
+        """
+        Rewrite the file with some stored candles replaced in place
+
+        Args:
+            replacements: Dictionary mapping (market, unix_timestamp) -> new row
+        """
+        if not replacements:
+            return
+
+        try:
+            with open(self.filename, 'r', newline='') as f:
+                reader = csv.reader(f)
+                header = next(reader)
+                rows = list(reader)
+
+            index = _column_index(header)
+            market_idx, ts_idx = index['Market'], index['Unix_Timestamp']
+            # Header position -> OHLCV column name (the file may use lowercase names)
+            names = [None] * len(header)
+            for name, idx in index.items():
+                names[idx] = name
+
+            for i, row in enumerate(rows):
+                try:
+                    key = (row[market_idx], int(row[ts_idx]))
+                except (IndexError, ValueError):
+                    continue
+                replacement = replacements.get(key)
+                if replacement is not None:
+                    rows[i] = [replacement.get(name, '') if name else '' for name in names]
+
+            with open(self.filename, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(header)
+                writer.writerows(rows)
+
+            print(f"✓ Refreshed {len(replacements)} in-progress candles in {self.filename}")
+        except Exception as e:
+            print(f"❌ Error refreshing candles: {e}")
+
+
+class ColumnarStore:
+    """
+    Compressed columnar storage (Parquet or Arrow IPC)
+
+    Writes are buffered in memory and committed by flush(), which merges
+    them with the existing file, drops duplicate (Market, Unix_Timestamp)
+    rows keeping the newest, and rewrites the file sorted by market.
+    """
+
+    def __init__(self, filename: str, compression: str = 'zstd'):
+        if not HAS_ARROW:
+            raise ImportError("pyarrow is required for Parquet/Arrow storage (pip install pyarrow)")
+
+        self.filename = filename
+        self.compression = compression
+        extension = os.path.splitext(filename)[1].lower()
+        self.format = 'parquet' if extension in PARQUET_EXTENSIONS else 'arrow'
+        self.schema = pa.schema(
+            [('Date', pa.string()), ('Timestamp', pa.string()), ('Unix_Timestamp', pa.int64())] +
+            [(name, pa.float64()) for name in FLOAT_COLUMNS] +
+            [('Market', pa.string())]
+        )
+        self._pending = []
+        self._truncate = False
+
+    def exists(self) -> bool:
+        return os.path.exists(self.filename)
+
+    def remove(self):
+        self._pending = []
+        self._truncate = False
+        if self.exists():
+            os.remove(self.filename)
+
+    def write(self, rows: List[Dict], append: bool = False):
+        """
+        Buffer parsed candles for the next flush()
+
+        Args:
+            rows: Parsed kline rows or a CandleSeries
+            append: If True, merge with the stored data; if False, replace it
+        """
+        if hasattr(rows, 'to_rows'):
+            rows = rows.to_rows()
+        if not rows:
+            print("❌ No data to save")
+            return
+
+        if not append:
+            self._pending = []
+            self._truncate = True
+        self._pending.extend(rows)
+
+    def flush(self):
+        """Merge buffered rows into the file"""
+        if not self._pending and not self._truncate:
+            return
+
+        try:
+            table = self._rows_to_table(self._pending)
+            if not self._truncate and self.exists():
+                table = pa.concat_tables([self.read_table(), table])
+
+            table = self._sort_dedupe(table)
+            self._write_table(table)
+            print(f"✓ Saved {table.num_rows} records to {self.filename}")
+        except Exception as e:
+            print(f"❌ Error saving {self.format} file: {e}")
+        finally:
+            self._pending = []
+            self._truncate = False
+
+    def _rows_to_table(self, rows: List[Dict]):
+        """Convert parsed kline rows into a typed Arrow table"""
+        columns = {}
+        for name in STRING_COLUMNS:
+            columns[name] = [str(r.get(name, '')) for r in rows]
+        columns['Unix_Timestamp'] = [int(r.get('Unix_Timestamp', 0)) for r in rows]
+        for name in FLOAT_COLUMNS:
+            columns[name] = [float(r.get(name, 0)) for r in rows]
+        return pa.table(columns, schema=self.schema)
+
+    def _sort_dedupe(self, table):
+        """Sort by (Market, Unix_Timestamp), keeping the last-written duplicate"""
+        table = table.append_column('_row', pa.array(np.arange(table.num_rows, dtype=np.int64)))
+        table = table.sort_by([('Market', 'ascending'), ('Unix_Timestamp', 'ascending'), ('_row', 'ascending')])
+
+        if table.num_rows > 1:
+            codes = pc.dictionary_encode(table['Market']).combine_chunks().indices.to_numpy()
+            timestamps = table['Unix_Timestamp'].to_numpy()
+            keep = np.ones(table.num_rows, dtype=bool)
+            keep[:-1] = (codes[:-1] != codes[1:]) | (timestamps[:-1] != timestamps[1:])
+            table = table.filter(pa.array(keep))
+
+        return table.drop_columns(['_row'])
+
+    def _write_table(self, table):
+        if self.format == 'parquet':
+            pq.write_table(table, self.filename, compression=self.compression)
+        else:
+            feather.write_feather(table, self.filename, compression=self.compression)
+
+    def read_table(self):
+        """Read the stored file as an Arrow table"""
+        if self.format == 'parquet':
+            table = pq.read_table(self.filename)
+        else:
+            table = feather.read_table(self.filename)
+        return table.cast(self.schema)
+
+    def read_markets(self) -> Dict[str, Dict]:
+        """
+        Load all candles grouped by market
+
+        The file is kept sorted by (Market, Unix_Timestamp) by flush(), so each
+        market is one contiguous run and its columns are zero-copy slices.
+
+        Returns:
+            Dictionary mapping market -> column name -> NumPy array, sorted by Unix_Timestamp
+        """
+        table = self.read_table()
+        if table.num_rows == 0:
+            return {}
+
+        encoded = pc.dictionary_encode(table['Market']).combine_chunks()
+        codes = encoded.indices.to_numpy()
+        names = encoded.dictionary.to_pylist()
+
+        columns = {name: table[name].to_numpy() for name in ['Unix_Timestamp'] + FLOAT_COLUMNS}
+        for name in STRING_COLUMNS:
+            columns[name] = table[name].to_numpy(zero_copy_only=False)
+
+        # Start offsets of each contiguous market run
+        starts = np.concatenate(([0], np.flatnonzero(codes[1:] != codes[:-1]) + 1))
+        ends = np.append(starts[1:], len(codes))
+
+        markets_data = {}
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            market = names[codes[start]]
+            if market:
+                markets_data[market] = {name: values[start:end] for name, values in columns.items()}
+
+        return markets_data
+
+    def last_rows(self) -> Dict[str, Dict]:
+        """
+        Read the newest stored candle for every market
+
+        Returns:
+            Dictionary mapping market -> row with the highest Unix_Timestamp
+        """
+        if not self.exists():
+            return {}
+
+        last_rows = {}
+        for market, columns in self.read_markets().items():
+            last_rows[market] = {name: values[-1].item() if hasattr(values[-1], 'item') else values[-1]
+                                 for name, values in columns.items()}
+        return last_rows
+
+    def replace_rows(self, replacements: Dict):
+        """
+        Replace stored candles with re-fetched copies
+
+        Args:
+            replacements: Dictionary mapping (market, unix_timestamp) -> new row
+        """
+        if not replacements:
+            return
+
+        self.write(list(replacements.values()), append=True)
+        self.flush()
+        print(f"✓ Refreshed {len(replacements)} in-progress candles in {self.filename}")
@@ -0,0 +1,333 @@
+"""
+CoinEx Local Order Book
+
+Keeps a per-market order book from depth.update messages:
+
+- Full snapshots (is_full=True) replace the book; incremental updates set
+  or remove (amount "0") individual price levels.
+- Price levels are kept sorted: a SortedList when sortedcontainers is
+  installed (O(log n) insert/delete), otherwise a plain list maintained
+  with bisect (O(log n) search, memmove insert; fine for a few hundred levels).
+- After each update the book is checked against the exchange checksum: CRC32
+  of "bid1_price:bid1_amount:...:ask1_price:ask1_amount:..." built from the
+  exchange's own price/amount strings. A mismatch marks the book out of sync
+  and asks for a resync (resubscribing makes the server send a new snapshot).
+- Queries: best bid/ask, spread/mid, amount at a price, cumulative volume up
+  to a price, and the cost of filling an amount or notional.
+"""
+
+import bisect
+import zlib
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+try:
+    from sortedcontainers import SortedList
+    HAS_SORTEDCONTAINERS = True
+except ImportError:
+    HAS_SORTEDCONTAINERS = False
+
+from coinex_ws.dispatch import DepthUpdate
+
+
+class BookSide:
+    """One side of the book: price levels sorted best-first"""
+
+    def __init__(self, descending: bool):
+        """
+        Args:
+            descending: True for bids (best = highest), False for asks
+        """
+        self.descending = descending
+        # Sort key -> (price_str, amount_str, price, amount); bids use -price as key
+        self.levels = {}
+        self.keys = SortedList() if HAS_SORTEDCONTAINERS else []
+
+    def __len__(self):
+        return len(self.levels)
+
+    def _key(self, price: float) -> float:
+        return -price if self.descending else price
+
+    def set(self, price_str: str, amount_str: str):
+        """Set a level from the exchange's strings (amount 0 removes it)"""
+        price = float(price_str)
+        amount = float(amount_str)
+        key = self._key(price)
+        if amount == 0:
+            if self.levels.pop(key, None) is not None:
+                if HAS_SORTEDCONTAINERS:
+                    self.keys.remove(key)
+                else:
+                    del self.keys[bisect.bisect_left(self.keys, key)]
+            return
+        if key not in self.levels:
+            if HAS_SORTEDCONTAINERS:
+                self.keys.add(key)
+            else:
+                bisect.insort(self.keys, key)
+        self.levels[key] = (price_str, amount_str, price, amount)
+
+    def clear(self):
+        self.levels.clear()
+        self.keys = SortedList() if HAS_SORTEDCONTAINERS else []
+
+    def truncate(self, depth: int):
+        """Keep only the best depth levels"""
+        if len(self.keys) > depth:
+            for key in self.keys[depth:]:
+                del self.levels[key]
+            if HAS_SORTEDCONTAINERS:
+                del self.keys[depth:]
+            else:
+                self.keys = self.keys[:depth]
+
+    def best(self) -> Optional[Tuple[float, float]]:
+        """(price, amount) of the best level, or None if empty"""
+        if not self.keys:
+            return None
+        level = self.levels[self.keys[0]]
+        return level[2], level[3]
+
+    def iter_levels(self, limit: Optional[int] = None) -> Iterator[Tuple[str, str, float, float]]:
+        """(price_str, amount_str, price, amount) best-first"""
+        keys = self.keys if limit is None else self.keys[:limit]
+        levels = self.levels
+        for key in keys:
+            yield levels[key]
+
+    def top(self, n: int = 5) -> List[Tuple[float, float]]:
+        """Best n levels as (price, amount)"""
+        return [(level[2], level[3]) for level in self.iter_levels(n)]
+
+    def amount_at(self, price: float) -> float:
+        """Amount resting at exactly this price (0 if no level)"""
+        level = self.levels.get(self._key(price))
+        return level[3] if level else 0.0
+
+    def volume_through(self, price: float) -> float:
+        """Cumulative amount on levels at or better than price"""
+        limit_key = self._key(price)
+        end = self.keys.bisect_right(limit_key) if HAS_SORTEDCONTAINERS else bisect.bisect_right(self.keys, limit_key)
+        levels = self.levels
+        return sum(levels[key][3] for key in self.keys[:end])
+
+    def fill(self, amount: Optional[float] = None, notional: Optional[float] = None) -> Dict:
+        """
+        Walk the levels best-first until an amount or notional is filled
+
+        Args:
+            amount: Base amount to fill
+            notional: Quote amount (price * amount) to fill
+
+        Returns:
+            Dict with filled amount, notional, average price, worst price,
+            levels used and whether the book had enough depth
+        """
+        if (amount is None) == (notional is None):
+            raise ValueError("pass exactly one of amount or notional")
+
+        filled = cost = 0.0
+        worst = None
+        levels_used = 0
+        for _, _, price, size in self.iter_levels():
+            if amount is not None:
+                take = min(size, amount - filled)
+            else:
+                take = min(size, (notional - cost) / price)
+            if take <= 0:
+                break
+            filled += take
+            cost += take * price
+            worst = price
+            levels_used += 1
+            if (amount is not None and filled >= amount) or (notional is not None and cost >= notional * (1 - 1e-12)):
+                break
+
+        target = amount if amount is not None else notional
+        done = filled if amount is not None else cost
+        return {
+            'amount': filled,
+            'notional': cost,
+            'avg_price': cost / filled if filled else None,
+            'worst_price': worst,
+            'levels': levels_used,
+            'complete': done >= target * (1 - 1e-12),
+        }
+
+
+def checksum_string(bids: BookSide, asks: BookSide) -> str:
+    """The string CoinEx checksums: bids then asks, price:amount joined by ':'"""
+    parts = []
+    for side in (bids, asks):
+        for price_str, amount_str, _, _ in side.iter_levels():
+            parts.append(price_str)
+            parts.append(amount_str)
+    return ":".join(parts)
+
+
+def crc32_signed(text: str) -> int:
+    """CRC32 as a signed 32-bit integer (the form CoinEx sends)"""
+    value = zlib.crc32(text.encode('utf-8'))
+    return value - (1 << 32) if value >= (1 << 31) else value
+
+
+class LocalOrderBook:
+    """Local copy of one market's order book, kept in sync from depth.update"""
+
+    def __init__(self, market: str, depth_limit: Optional[int] = None, verify_checksum: bool = True):
+        """
+        Initialize the book
+
+        Args:
+            market: Market pair
+            depth_limit: Levels per side to keep (the subscribed depth limit)
+            verify_checksum: Check the exchange checksum after each update
+        """
+        self.market = market
+        self.depth_limit = depth_limit
+        self.verify_checksum = verify_checksum
+        self.bids = BookSide(descending=True)
+        self.asks = BookSide(descending=False)
+        self.synced = False
+        self.updated_at = 0
+        self.snapshots = 0
+        self.updates = 0
+        self.checksum_failures = 0
+
+    def apply(self, update) -> bool:
+        """
+        Apply a depth update
+
+        Args:
+            update: DepthUpdate, or the 'data' dict of a depth.update message
+
+        Returns:
+            True if the book is in sync after the update; False if the
+            checksum failed or an incremental update arrived before a snapshot
+        """
+        if isinstance(update, dict):
+            update = DepthUpdate.from_data(update)
+
+        if update.is_full:
+            self.bids.clear()
+            self.asks.clear()
+            self.snapshots += 1
+            self.synced = True
+        elif not self.synced:
+            # Diffs are meaningless without a snapshot to apply them to
+            return False
+        else:
+            self.updates += 1
+
+        for price_str, amount_str in update.bids:
+            self.bids.set(price_str, amount_str)
+        for price_str, amount_str in update.asks:
+            self.asks.set(price_str, amount_str)
+        if self.depth_limit:
+            self.bids.truncate(self.depth_limit)
+            self.asks.truncate(self.depth_limit)
+        self.updated_at = update.updated_at
+
+        if self.verify_checksum and update.checksum is not None:
+            if (self.checksum() - update.checksum) % (1 << 32) != 0:
+                self.checksum_failures += 1
+                self.synced = False
+                return False
+        return True
+
+    def checksum(self) -> int:
+        """Signed CRC32 of the current book in the exchange's format"""
+        return crc32_signed(checksum_string(self.bids, self.asks))
+
+    def best_bid(self) -> Optional[Tuple[float, float]]:
+        return self.bids.best()
+
+    def best_ask(self) -> Optional[Tuple[float, float]]:
+        return self.asks.best()
+
+    def spread(self) -> Optional[float]:
+        bid, ask = self.bids.best(), self.asks.best()
+        return ask[0] - bid[0] if bid and ask else None
+
+    def mid(self) -> Optional[float]:
+        bid, ask = self.bids.best(), self.asks.best()
+        return (ask[0] + bid[0]) / 2 if bid and ask else None
+
+    def depth_at(self, price: float) -> Dict[str, float]:
+        """Amount resting at exactly this price on each side"""
+        return {'bid': self.bids.amount_at(price), 'ask': self.asks.amount_at(price)}
+
+    def cumulative_volume(self, side: str, price: float) -> float:
+        """
+        Amount available at prices at or better than price
+
+        Args:
+            side: 'bids' (prices >= price) or 'asks' (prices <= price)
+        """
+        return getattr(self, side).volume_through(price)
+
+    def cost_to_buy(self, notional: Optional[float] = None, amount: Optional[float] = None) -> Dict:
+        """Walk the asks to buy a quote notional (or base amount)"""
+        return self.asks.fill(amount=amount, notional=notional)
+
+    def cost_to_sell(self, notional: Optional[float] = None, amount: Optional[float] = None) -> Dict:
+        """Walk the bids to sell a quote notional (or base amount)"""
+        return self.bids.fill(amount=amount, notional=notional)
+
+    def snapshot(self, levels: int = 5) -> Dict:
+        """Top levels per side as floats"""
+        return {'market': self.market, 'bids': self.bids.top(levels), 'asks': self.asks.top(levels),
+                'synced': self.synced, 'updated_at': self.updated_at}
+
+    def __repr__(self):
+        return (f"LocalOrderBook({self.market} bid={self.best_bid()} ask={self.best_ask()} "
+                f"levels={len(self.bids)}/{len(self.asks)} synced={self.synced})")
+
+
+class OrderBookManager:
+    """Order books for many markets, with resync on checksum failures"""
+
+    def __init__(self, depth_limit: Optional[int] = None, on_resync: Optional[Callable[[str], None]] = None,
+                 verify_checksum: bool = True):
+        """
+        Initialize the manager
+
+        Args:
+            depth_limit: Levels per side to keep (the subscribed depth limit)
+            on_resync: Called with a market whose book went out of sync;
+                       typically resubscribes its depth to get a new snapshot
+                       (resyncs counts these requests)
+            verify_checksum: Check exchange checksums
+        """
+        self.depth_limit = depth_limit
+        self.on_resync = on_resync
+        self.verify_checksum = verify_checksum
+        self.books = {}
+        self.resyncs = 0
+
+    def book(self, market: str) -> LocalOrderBook:
+        book = self.books.get(market)
+        if book is None:
+            book = self.books[market] = LocalOrderBook(market, self.depth_limit, self.verify_checksum)
+        return book
+
+    def handle_depth(self, update) -> Optional[LocalOrderBook]:
+        """
+        Apply a DepthUpdate (dispatcher handler for depth.update)
+
+        Returns:
+            The market's book if it is in sync, else None (resync requested)
+        """
+        book = self.book(update.market)
+        was_synced = book.synced
+        if book.apply(update):
+            return book
+        # Ask once per loss of sync; diffs before the new snapshot are ignored
+        if was_synced or update.is_full:
+            self.resyncs += 1
+            if self.on_resync:
+                self.on_resync(update.market)
+        return None
+
+    def get(self, market: str) -> Optional[LocalOrderBook]:
+        return self.books.get(market)
@@ -0,0 +1,168 @@
+"""
+Batched Output Sink for Live Feeds
+
+Handlers call emit() instead of print(). emit() only stores the update and
+returns; a background thread renders and writes everything pending in one
+write() per batch (every `interval` seconds). A slow terminal or pipe
+blocks only that thread, never the WebSocket receive loop.
+
+- Keyed updates (e.g. ('ticker', market)) are coalesced: only the latest
+  update per key is rendered in each batch.
+- Unkeyed updates (key=None, e.g. individual trades) are events, written
+  in order. If more than max_events are waiting, the drop policy decides:
+  'drop_oldest' keeps the newest events, 'drop_newest' refuses new ones.
+- An update can be a ready string, or a function plus arguments that is
+  only called (formatted) in the writer thread, so coalesced-away updates
+  are never formatted at all.
+"""
+
+import sys
+import threading
+from collections import deque
+from typing import Any, Dict, Hashable, Optional, TextIO
+
+DROP_POLICIES = ('drop_oldest', 'drop_newest')
+
+
+class OutputSink:
+    """Queue updates and write them in batches from a background thread"""
+
+    def __init__(self, interval: float = 0.25, coalesce: bool = True, max_events: int = 10_000,
+                 drop_policy: str = 'drop_oldest', stream: Optional[TextIO] = None):
+        """
+        Initialize the sink and start its writer thread
+
+        Args:
+            interval: Seconds between batches
+            coalesce: Keep only the latest update per key (False: keyed updates
+                      are queued like events)
+            max_events: Unkeyed updates held between batches before dropping
+            drop_policy: 'drop_oldest' or 'drop_newest'
+            stream: Output stream (default sys.stdout)
+        """
+        if drop_policy not in DROP_POLICIES:
+            raise ValueError(f"drop_policy must be one of {DROP_POLICIES}")
+
+        self.interval = interval
+        self.coalesce = coalesce
+        self.max_events = max_events
+        self.drop_policy = drop_policy
+        self.stream = stream or sys.stdout
+
+        self._lock = threading.Lock()
+        self._events = deque()
+        self._latest = {}
+        self._stop = threading.Event()
+
+        self.emitted = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.written = 0
+        self.batches = 0
+        self.render_errors = 0
+
+        self._thread = threading.Thread(target=self._run, name="output-sink", daemon=True)
+        self._thread.start()
+
+    def emit(self, key: Optional[Hashable], update: Any, *args):
+        """
+        Queue an update (never blocks on output)
+
+        Args:
+            key: Coalescing key (latest update per key wins), or None for an event
+            update: Text, or a function called as update(*args) in the writer
+                    thread that returns the text (or None to skip)
+            *args: Arguments for a deferred update
+        """
+        entry = (update, args)
+        with self._lock:
+            self.emitted += 1
+            if key is not None and self.coalesce:
+                if key in self._latest:
+                    self.coalesced += 1
+                self._latest[key] = entry
+                return
+            if len(self._events) >= self.max_events:
+                self.dropped += 1
+                if self.drop_policy == 'drop_newest':
+                    return
+                self._events.popleft()
+            self._events.append(entry)
+
+    def _take(self):
+        """Swap out everything pending"""
+        with self._lock:
+            events, self._events = self._events, deque()
+            latest, self._latest = self._latest, {}
+        return events, latest
+
+    def _render(self, entry) -> Optional[str]:
+        update, args = entry
+        if isinstance(update, str) and not args:
+            return update
+        try:
+            return update(*args)
+        except Exception as e:
+            self.render_errors += 1
+            return f"⚠️  Render error: {e}"
+
+    def flush(self):
+        """Render and write everything pending (called by the writer thread)"""
+        events, latest = self._take()
+        if not events and not latest:
+            return
+        lines = []
+        for entry in events:
+            text = self._render(entry)
+            if text is not None:
+                lines.append(text)
+        for entry in latest.values():
+            text = self._render(entry)
+            if text is not None:
+                lines.append(text)
+        if lines:
+            try:
+                self.stream.write("\n".join(lines) + "\n")
+                self.stream.flush()
+            except Exception:
+                pass
+        self.written += len(lines)
+        self.batches += 1
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    def close(self, timeout: float = 2.0):
+        """Stop the writer thread after a final flush"""
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        self.flush()
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._events) + len(self._latest)
+
+    def stats(self) -> Dict[str, int]:
+        return {'emitted': self.emitted, 'coalesced': self.coalesced, 'dropped': self.dropped,
+                'written': self.written, 'batches': self.batches, 'pending': self.pending()}
+
+
+class DirectSink:
+    """Same interface as OutputSink but writes immediately (for scripts and debugging)"""
+
+    def __init__(self, stream: Optional[TextIO] = None):
+        self.stream = stream or sys.stdout
+
+    def emit(self, key: Optional[Hashable], update: Any, *args):
+        text = update if isinstance(update, str) and not args else update(*args)
+        if text is not None:
+            print(text, file=self.stream)
+
+    def flush(self):
+        self.stream.flush()
+
+    def close(self, timeout: float = 0.0):
+        self.flush()
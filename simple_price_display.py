@@ -6,154 +6,152 @@ Perfect for monitoring prices in real-time.
 """
 
 import asyncio
-import json
-import websockets
-import hashlib
-import hmac
 import time
-import gzip
-from typing import Optional
+from typing import Dict, Iterable
 from datetime import datetime
 
+from coinex_ws import CoinExWebSocket, HeartbeatManager, MessageDispatcher, Ticker
+from coinex_ws.dispatch import to_float
+from output_sink import OutputSink
+from ticker_table import TableView, TickerTable
+
 
 class SimplePriceMonitor:
-    """Simple WebSocket client for displaying last traded prices"""
+    """Display last traded prices from a CoinExWebSocket ticker feed"""
     
-    def __init__(self):
-        self.ws_url = "wss://socket.coinex.com/v2/spot"
-        self.websocket = None
+    def __init__(self, display: str = "table", refresh_interval: float = 0.25):
+        """
+        Args:
+            display: "table" - one in-place row per market, redrawn at a fixed
+                     frame rate (practical for hundreds of markets);
+                     "lines" - a scrolling line per market update
+            refresh_interval: Seconds between redraws
+        """
+        self.client = CoinExWebSocket(verbose=False)
         self.prices = {}  # Store current prices for each market
+        self.display = display
+        if display == "table":
+            # Latest state per market, updated in place; only changed cells are redrawn
+            self.table = TickerTable()
+            self.view = TableView(self.table, fps=1.0 / refresh_interval)
+            self.output = None
+        else:
+            # Latest update per market is printed every refresh_interval by a writer thread
+            self.table = None
+            self.view = None
+            self.output = OutputSink(interval=refresh_interval)
+        self.dispatcher = MessageDispatcher()
+        self.dispatcher.register("state.update", self.handle_price_update)
         
     async def connect(self):
         """Connect to CoinEx WebSocket with deflate compression"""
         print("Connecting to CoinEx...")
-        # CoinEx v2 requires deflate compression
-        self.websocket = await websockets.connect(
-            self.ws_url,
-            compression='deflate'
-        )
+        await self.client.connect()
         print("✓ Connected!\n")
         
+    async def subscribe_tickers(self, markets: Iterable[str]):
+        """Subscribe to ticker updates for many markets (several per message)"""
+        await self.client.subscribe_markets('ticker', markets, send_interval=0)
+    
     async def subscribe_ticker(self, market: str):
         """Subscribe to ticker updates for a market"""
-        subscribe_message = {
-            "method": "state.subscribe",
-            "params": {
-                "market_list": [market]
-            },
-            "id": int(time.time())
-        }
-        await self.websocket.send(json.dumps(subscribe_message))
+        await self.subscribe_tickers([market])
         
+    def start_heartbeat(self, **kwargs) -> HeartbeatManager:
+        """
+        Ping on a schedule and watch subscribed markets for stale feeds
+        
+        Args:
+            **kwargs: HeartbeatManager options (interval, pong_timeout, stale_after, ...)
+            
+        Returns:
+            The running HeartbeatManager (also self.heartbeat)
+        """
+        return self.client.start_heartbeat(**kwargs)
+    
+    @property
+    def heartbeat(self):
+        return self.client.heartbeat
+    
     async def listen(self):
         """Listen for price updates and display them"""
         try:
-            while True:
-                message = await self.websocket.recv()
-                
-                # Handle compression - CoinEx may send gzip despite deflate connection
-                if isinstance(message, bytes):
-                    # Check if it's gzip compressed (starts with 0x1f 0x8b)
-                    if len(message) > 1 and message[0] == 0x1f and message[1] == 0x8b:
-                        try:
-                            message = gzip.decompress(message).decode('utf-8')
-                        except Exception as e:
-                            print(f"⚠️  Gzip decompression error: {e}")
-                            continue
-                    else:
-                        # Try regular decode
-                        try:
-                            message = message.decode('utf-8')
-                        except Exception as e:
-                            print(f"⚠️  Decode error: {e}")
-                            continue
-                
-                # Parse JSON
-                try:
-                    data = json.loads(message)
-                except Exception as e:
-                    print(f"⚠️  JSON parse error: {e}")
-                    continue
-                
-                # Handle ticker updates
-                if data.get("method") == "state.update":
-                    self.handle_price_update(data)
-                    
-        except websockets.exceptions.ConnectionClosed:
+            # Ticker updates go to handle_price_update as raw messages
+            await self.client.listen(callback=self.dispatcher.dispatch)
             print("\n❌ Connection closed")
         except KeyboardInterrupt:
             print("\n\n👋 Shutting down...")
-        except Exception as e:
-            print(f"\n❌ Error: {e}")
     
-    def handle_price_update(self, data):
+    def handle_price_update(self, data: Dict):
         """Handle and display price updates"""
-        try:
-            # CoinEx v2 uses data.state_list, not params
-            state_list = data.get("data", {}).get("state_list", [])
-            if not state_list:
-                return
-            
-            ticker = state_list[0]
-            market = ticker.get("market", "")
-            
-            # Parse price data
-            try:
-                last = float(ticker.get("last", 0))
-                volume = float(ticker.get("volume", 0))
-                open_price = float(ticker.get("open", 0))
-                high = float(ticker.get("high", 0))
-                low = float(ticker.get("low", 0))
-                
-                # Calculate 24h change percentage
-                if open_price > 0:
-                    change_24h = ((last - open_price) / open_price) * 100
-                else:
-                    change_24h = 0
-                    
-            except (ValueError, TypeError):
-                return
-            
-            # Get previous price for this market
-            prev_price = self.prices.get(market, last)
-            
-            # Determine if price went up or down
-            if last > prev_price:
-                trend = "📈"
-                change_color = "\033[92m"  # Green
-            elif last < prev_price:
-                trend = "📉"
-                change_color = "\033[91m"  # Red
-            else:
-                trend = "━"
-                change_color = "\033[93m"  # Yellow
-            
-            reset_color = "\033[0m"
-            
-            # Update stored price
-            self.prices[market] = last
-            
-            # Get current time
-            timestamp = datetime.now().strftime("%H:%M:%S")
-            
-            # Display the price update
-            print(f"{trend} [{timestamp}] {market:12s} | "
-                  f"{change_color}${last:>12,.2f}{reset_color} | "
-                  f"24h: {change_24h:>+6.2f}% | "
-                  f"Vol: {volume:>12,.2f}")
-            
-        except Exception as e:
-            pass  # Silently ignore errors to keep display clean
+        # One update can carry several markets when subscribed in batches
+        for entry in (data.get("data") or {}).get("state_list") or ():
+            self.display_ticker(entry)
+    
+    def display_ticker(self, entry: Dict):
+        """Queue one market's ticker entry for display (latest per market wins)"""
+        market = entry.get("market", "")
+        last = to_float(entry.get("last"))
+        if self.table is not None:
+            self.table.update(market, last, to_float(entry.get("open")), to_float(entry.get("high")),
+                              to_float(entry.get("low")), to_float(entry.get("volume")))
+            return
+        
+        # Get previous price for this market
+        prev_price = self.prices.get(market, last)
+        
+        # Update stored price
+        self.prices[market] = last
+        
+        # The other fields are converted in the output thread, only for the update it shows
+        self.output.emit(market, self.format_ticker, entry, prev_price, time.time())
+    
+    @staticmethod
+    def format_ticker(entry: Dict, prev_price: float, received_at: float) -> str:
+        """One display line for a ticker entry (runs in the output thread)"""
+        ticker = Ticker.from_dict(entry)
+        last = ticker.last
+        
+        # Determine if price went up or down
+        if last > prev_price:
+            trend = "📈"
+            change_color = "\033[92m"  # Green
+        elif last < prev_price:
+            trend = "📉"
+            change_color = "\033[91m"  # Red
+        else:
+            trend = "━"
+            change_color = "\033[93m"  # Yellow
+        
+        reset_color = "\033[0m"
+        
+        # Time the update was received
+        timestamp = datetime.fromtimestamp(received_at).strftime("%H:%M:%S")
+        
+        return (f"{trend} [{timestamp}] {ticker.market:12s} | "
+                f"{change_color}${last:>12,.2f}{reset_color} | "
+                f"24h: {ticker.change_pct:>+6.2f}% | "
+                f"Vol: {ticker.volume:>12,.2f}")
     
     async def close(self):
-        """Close the WebSocket connection"""
-        if self.websocket:
-            await self.websocket.close()
+        """Close the WebSocket connection and write out pending display output"""
+        await self.client.close()
+        if self.view:
+            self.view.stop()
+        if self.output:
+            self.output.close()
 
 
 async def main():
     """Main function to run the price monitor"""
     
+    # "table": one in-place row per market (use with many markets)
+    # "lines": a scrolling line per update
+    DISPLAY = "table"
+    
+    # Watch every USDT market instead of the list below
+    WATCH_ALL_USDT = False
+    
     # Configure markets to monitor
     markets = [
         "BTCUSDT",   # Bitcoin
@@ -166,7 +164,13 @@ async def main():
         "TRXUSDT",   # Tron
     ]
     
-    monitor = SimplePriceMonitor()
+    if WATCH_ALL_USDT:
+        from coinex_http import get_shared_session
+        response = get_shared_session().get("https://api.coinex.com/v2/spot/market", timeout=30)
+        markets = sorted(m['market'] for m in response.json().get('data', [])
+                         if m.get('market', '').endswith('USDT'))
+    
+    monitor = SimplePriceMonitor(display=DISPLAY)
     
     try:
         # Connect
@@ -174,15 +178,19 @@ async def main():
         
         # Subscribe to all markets
         print("Subscribing to markets...")
-        for market in markets:
-            await monitor.subscribe_ticker(market)
-            await asyncio.sleep(0.3)
+        await monitor.subscribe_tickers(markets)
+        
+        # Ping every 20s so idle sockets aren't cut; resubscribe silent markets
+        monitor.start_heartbeat()
         
         print(f"✓ Monitoring {len(markets)} markets\n")
-        print("=" * 90)
-        print(f"{'TREND':<3} {'TIME':<10} {'MARKET':<12} | {'LAST PRICE':>14} | "
-              f"{'24H CHANGE':>10} | {'VOLUME':>14}")
-        print("=" * 90)
+        if monitor.view:
+            monitor.view.start()
+        else:
+            print("=" * 90)
+            print(f"{'TREND':<3} {'TIME':<10} {'MARKET':<12} | {'LAST PRICE':>14} | "
+                  f"{'24H CHANGE':>10} | {'VOLUME':>14}")
+            print("=" * 90)
         
         # Listen for updates
         await monitor.listen()
@@ -203,4 +211,4 @@ if __name__ == "__main__":
     print(" " * 30 + "📊 COINEX PRICE MONITOR 📊")
     print("=" * 90 + "\n")
     
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
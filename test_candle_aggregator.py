@@ -0,0 +1,120 @@
+"""
+Tests for the streaming candle aggregator (candle_aggregator)
+
+Covers bucket rollover, late and out-of-order deals, duplicate deals from
+a resubscribe snapshot, and StoreSink flushing.
+
+Run with pytest, or directly: python test_candle_aggregator.py
+"""
+
+import os
+import tempfile
+
+from candle_aggregator import CandleAggregator, StoreSink
+from coinex_ws.dispatch import Deal
+from ohlcv_store import open_store
+
+T0 = 1_699_999_200  # an hour boundary (seconds)
+
+
+def deal(deal_id: int, seconds: float, price: float, amount: float = 1.0, market: str = 'BTCUSDT') -> Deal:
+    return Deal(market, deal_id, int((T0 + seconds) * 1000), 'buy', price, amount)
+
+
+def test_bucket_rollover():
+    aggregator = CandleAggregator(intervals=['1m'])
+    aggregator.handle_deals([deal(1, 1, 100.0), deal(2, 20, 105.0, 2.0), deal(3, 50, 98.0)])
+    assert aggregator.bars('BTCUSDT', '1m') == {}
+
+    # The first deal of the next minute closes the bar
+    aggregator.handle_deals([deal(4, 61, 99.0)])
+    bars = aggregator.bars('BTCUSDT', '1m')
+    assert bars['ts'].tolist() == [T0]
+    assert (bars['open'][0], bars['high'][0], bars['low'][0], bars['close'][0]) == (100.0, 105.0, 98.0, 98.0)
+    assert bars['volume'][0] == 4.0
+    assert bars['value'][0] == 100.0 + 210.0 + 98.0
+    assert bars['trades'][0] == 3
+
+    live = aggregator.live_bar('BTCUSDT', '1m')
+    assert live.start == T0 + 60 and live.open == 99.0
+
+
+def test_intervals_close_independently():
+    aggregator = CandleAggregator(intervals=['1m', '5m'])
+    aggregator.handle_deals([deal(1, 0, 100.0)])
+    aggregator.handle_deals([deal(2, 61, 101.0)])
+    assert len(aggregator.bars('BTCUSDT', '1m')['ts']) == 1
+    assert aggregator.bars('BTCUSDT', '5m') == {}
+    assert aggregator.live_bar('BTCUSDT', '5m').trades == 2
+
+
+def test_out_of_order_deals_in_one_message():
+    aggregator = CandleAggregator(intervals=['1m'])
+    # A deals.update lists the newest deal first
+    aggregator.handle_deals([deal(3, 30, 103.0), deal(2, 20, 102.0), deal(1, 10, 101.0)])
+    live = aggregator.live_bar('BTCUSDT', '1m')
+    assert (live.open, live.close, live.trades) == (101.0, 103.0, 3)
+
+
+def test_late_deal_after_close_is_counted_not_applied():
+    aggregator = CandleAggregator(intervals=['1m'])
+    aggregator.add_deal('BTCUSDT', T0 + 5, 100.0, 1.0)
+    aggregator.add_deal('BTCUSDT', T0 + 65, 101.0, 1.0)
+    aggregator.add_deal('BTCUSDT', T0 + 30, 50.0, 1.0)
+    assert aggregator.late == 1
+    assert aggregator.bars('BTCUSDT', '1m')['low'].tolist() == [100.0]
+    assert aggregator.live_bar('BTCUSDT', '1m').low == 101.0
+
+    # Also late once no bar is open: the bucket already closed
+    aggregator.close_due(T0 + 200)
+    aggregator.add_deal('BTCUSDT', T0 + 70, 50.0, 1.0)
+    assert aggregator.late == 2
+    assert aggregator.live_bar('BTCUSDT', '1m') is None
+
+
+def test_duplicate_deals_are_skipped():
+    aggregator = CandleAggregator(intervals=['1m'])
+    aggregator.handle_deals([deal(2, 2, 101.0), deal(1, 1, 100.0)])
+    # Resubscribe snapshot repeats recent deals
+    aggregator.handle_deals([deal(3, 3, 102.0), deal(2, 2, 101.0), deal(1, 1, 100.0)])
+    assert aggregator.duplicates == 2
+    assert aggregator.live_bar('BTCUSDT', '1m').trades == 3
+
+
+def test_feed_clock_closes_quiet_markets():
+    aggregator = CandleAggregator(intervals=['1m'])
+    aggregator.handle_deals([deal(1, 5, 100.0, market='QUIETUSDT')])
+    aggregator.handle_deals([deal(1, 70, 200.0, market='BTCUSDT')])
+    # BTC's deal moved the feed clock past QUIET's bar end
+    assert aggregator.bars('QUIETUSDT', '1m')['close'].tolist() == [100.0]
+    assert aggregator.live_bar('QUIETUSDT', '1m') is None
+
+
+def test_store_sink_flushes_per_interval():
+    pattern = os.path.join(tempfile.mkdtemp(), "live_{interval}.csv")
+    sink = StoreSink(pattern, flush_every=2, intervals=['1m'])
+    aggregator = CandleAggregator(intervals=['1m', '5m'], sinks=[sink])
+
+    for minute in range(3):
+        aggregator.add_deal('BTCUSDT', T0 + minute * 60 + 1, 100.0 + minute, 1.0)
+    aggregator.add_deal('BTCUSDT', T0 + 3 * 60 + 1, 103.0, 1.0)
+
+    # Three 1m bars closed: two written, one buffered; 5m is not stored
+    filename = pattern.format(interval='1m')
+    assert open_store(filename).read_markets()['BTCUSDT']['Close'] == [100.0, 101.0]
+    assert len(sink.pending['1m']) == 1
+    assert not os.path.exists(pattern.format(interval='5m'))
+
+    aggregator.close_due(T0 + 3600)
+    sink.flush()
+    columns = open_store(filename).read_markets()['BTCUSDT']
+    assert columns['Close'] == [100.0, 101.0, 102.0, 103.0]
+    assert columns['Unix_Timestamp'] == [T0 + minute * 60 for minute in range(4)]
+    assert sink.pending['1m'] == []
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"✓ {name}")
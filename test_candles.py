@@ -0,0 +1,102 @@
+"""
+Tests for the bulk kline parser (candles.parse_klines) and the fetch/save
+path that uses it (get_ohlcv.parse_kline_rows)
+
+Run with pytest, or directly: python test_candles.py
+"""
+
+import contextlib
+import io
+
+import numpy as np
+
+from candles import CandleSeries, parse_klines, rejection_summary
+from get_ohlcv import CoinExDailyData
+
+START_MS = 1_700_006_400_000
+
+
+def array_kline(day: int, close: float, market: str = 'BTCUSDT') -> list:
+    return [START_MS + day * 86_400_000, str(close - 1), str(close), str(close + 1), str(close - 2),
+            '10', str(10 * close), market]
+
+
+def dict_kline(day: int, close: float, market: str = 'BTCUSDT') -> dict:
+    return {'created_at': START_MS + day * 86_400_000, 'open': str(close - 1), 'close': str(close),
+            'high': str(close + 1), 'low': str(close - 2), 'volume': '10', 'value': str(10 * close),
+            'market': market}
+
+
+def test_array_fast_path():
+    columns, rejected = parse_klines([array_kline(day, 100.0 + day) for day in range(3)])
+    assert rejected == []
+    # Millisecond timestamps become seconds
+    assert columns['ts'].tolist() == [1_700_006_400 + day * 86_400 for day in range(3)]
+    assert columns['close'].tolist() == [100.0, 101.0, 102.0]
+    assert columns['open'].dtype == np.float64
+    assert columns['market'] == 'BTCUSDT'
+
+
+def test_dict_fast_path_matches_array_form():
+    arrays, _ = parse_klines([array_kline(day, 50.0 + day) for day in range(4)])
+    dicts, rejected = parse_klines([dict_kline(day, 50.0 + day) for day in range(4)])
+    assert rejected == []
+    for name in ('ts', 'open', 'high', 'low', 'close', 'volume', 'value'):
+        assert dicts[name].tolist() == arrays[name].tolist()
+
+
+def test_mixed_payload_is_parsed_row_by_row():
+    klines = [array_kline(0, 100.0), dict_kline(1, 101.0), array_kline(2, 102.0)]
+    columns, rejected = parse_klines(klines)
+    assert rejected == []
+    assert columns['close'].tolist() == [100.0, 101.0, 102.0]
+
+
+def test_malformed_rows_are_rejected():
+    klines = [
+        array_kline(0, 100.0),
+        [START_MS, '1', '2'],                   # too short
+        array_kline(2, 102.0)[:1] + ['abc'] + array_kline(2, 102.0)[2:],
+        'garbage',
+        dict_kline(4, 104.0),
+        dict_kline(5, 105.0) | {'close': None},
+    ]
+    columns, rejected = parse_klines(klines)
+    assert columns['close'].tolist() == [100.0, 104.0]
+    assert [item['index'] for item in rejected] == [1, 2, 3, 5]
+    assert rejected[0]['reason'] == 'too short'
+    assert rejected[1]['kline'] is klines[2]
+    assert rejection_summary(rejected, len(klines)).startswith("Rejected 4 of 6 klines")
+
+
+def test_missing_value_in_uniform_payload_falls_back():
+    klines = [array_kline(day, 100.0 + day) for day in range(3)]
+    klines[1][2] = None
+    columns, rejected = parse_klines(klines)
+    assert columns['close'].tolist() == [100.0, 102.0]
+    assert [item['index'] for item in rejected] == [1]
+
+
+def test_parse_kline_rows_reports_rejections_once():
+    fetcher = CoinExDailyData(max_workers=1)
+    klines = [array_kline(day, 100.0 + day, market='') for day in range(5)] + [['x'], ['y'], 'z']
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        rows = fetcher.parse_kline_rows(klines, 'BTCUSDT')
+    assert output.getvalue().count('\n') == 1
+    assert 'Rejected 3 of 8 klines' in output.getvalue()
+
+    assert [row['Close'] for row in rows] == [100.0, 101.0, 102.0, 103.0, 104.0]
+    # The market is filled in even when the klines omit it
+    assert {row['Market'] for row in rows} == {'BTCUSDT'}
+    # Same rows as the per-row parser
+    expected = fetcher.parse_kline_data([array_kline(day, 100.0 + day) for day in range(5)])
+    assert rows == expected
+    assert CandleSeries.from_rows(rows).close.tolist() == [row['Close'] for row in expected]
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"✓ {name}")
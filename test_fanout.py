@@ -0,0 +1,111 @@
+"""
+Tests for the shared-memory fan-out rings (coinex_ws.fanout)
+
+Covers a reader that is lapped while the writer has a multi-record batch in
+flight: records the writer may be overwriting must never be handed out.
+
+Run with pytest, or directly: python test_fanout.py
+"""
+
+import os
+
+from coinex_ws.dispatch import Ticker
+from coinex_ws.fanout import FanoutConsumer, FanoutPublisher, RingReader
+
+CAPACITY = 8
+
+
+def make_publisher(name: str) -> FanoutPublisher:
+    prefix = f"cxtest-{os.getpid()}-{name}"
+    return FanoutPublisher(prefix, capacity={'ticker': CAPACITY, 'depth': 4, 'trades': 4}, max_markets=64)
+
+
+def tickers(names):
+    return [Ticker(market, float(i), 1.0, 1.0, 1.0, 1.0, 1.0, 1.0) for i, market in enumerate(names)]
+
+
+def write_uncommitted(publisher: FanoutPublisher, names):
+    """Write a ticker batch the way publish_tickers does, stopping before the commit"""
+    commit = publisher._commit
+    publisher._commit = lambda channel, count: None
+    try:
+        publisher.publish_tickers(tickers(names), 0)
+    finally:
+        publisher._commit = commit
+
+
+def test_in_flight_batch_is_skipped():
+    publisher = make_publisher('inflight')
+    try:
+        publisher.publish_tickers(tickers([f"M{i}" for i in range(CAPACITY)]), 0)
+        reader = RingReader(publisher.rings['ticker'], from_start=True)
+        # Records 9-11 overwrite the slots of 1-3 but are not committed yet
+        write_uncommitted(publisher, ["NEW9", "NEW10", "NEW11"])
+
+        batch = reader.read()
+        assert batch['seq'].tolist() == [4, 5, 6, 7, 8]
+        assert reader.check()
+        assert reader.lost == 3
+    finally:
+        publisher.close()
+
+
+def test_batch_lapped_while_handled_is_rejected():
+    publisher = make_publisher('lapped')
+    try:
+        publisher.publish_tickers(tickers([f"M{i}" for i in range(CAPACITY)]), 0)
+        reader = RingReader(publisher.rings['ticker'], from_start=True)
+        batch = reader.read()
+        assert batch['seq'].tolist() == list(range(1, CAPACITY + 1))
+
+        # A multi-record batch starts over the slots just read, still uncommitted
+        write_uncommitted(publisher, ["NEW9", "NEW10", "NEW11"])
+        assert not reader.check()
+        assert reader.lost == CAPACITY
+        assert reader.read_count == 0
+    finally:
+        publisher.close()
+
+
+def test_consumer_never_mislabels_records():
+    publisher = make_publisher('consumer')
+    received = []
+    consumer = None
+    try:
+        publisher.publish_tickers(tickers([f"M{i}" for i in range(CAPACITY)]), 0)
+        consumer = FanoutConsumer(publisher.prefix, on_tickers=received.extend, from_start=True)
+        write_uncommitted(publisher, ["NEW9", "NEW10", "NEW11"])
+        consumer.poll()
+        assert [ticker.market for ticker in received] == ["M3", "M4", "M5", "M6", "M7"]
+
+        publisher._commit('ticker', 3)
+        consumer.poll()
+        assert [ticker.market for ticker in received[5:]] == ["NEW9", "NEW10", "NEW11"]
+    finally:
+        if consumer is not None:
+            consumer.close()
+        publisher.close()
+
+
+def test_batch_longer_than_ring():
+    publisher = make_publisher('long')
+    try:
+        reader = RingReader(publisher.rings['ticker'])
+        write_uncommitted(publisher, [f"M{i}" for i in range(CAPACITY + 3)])
+        assert len(reader.read()) == 0
+        assert reader.check()
+
+        publisher._commit('ticker', CAPACITY + 3)
+        # The view stops at the end of the ring, the rest comes next read
+        seqs = reader.read()['seq'].tolist() + reader.read()['seq'].tolist()
+        assert seqs == list(range(4, CAPACITY + 4))
+        assert reader.lost == 3
+    finally:
+        publisher.close()
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"✓ {name}")
@@ -0,0 +1,87 @@
+"""
+Tests for pings and stale-feed resubscription (coinex_ws.heartbeat)
+
+Run with pytest, or directly: python test_heartbeat.py
+"""
+
+import asyncio
+import json
+import time
+
+from coinex_ws.client import CoinExWebSocket
+from coinex_ws.heartbeat import HeartbeatManager
+
+
+class FakeSocket:
+    """Records sent messages"""
+
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, text: str):
+        self.sent.append(json.loads(text))
+
+
+def make_client() -> CoinExWebSocket:
+    client = CoinExWebSocket(verbose=False)
+    client.websocket = FakeSocket()
+    return client
+
+
+def ticker(market: str) -> dict:
+    return {'method': 'state.update', 'data': {'state_list': [{'market': market, 'last': '1'}]}}
+
+
+def test_ping_reply_records_rtt():
+    async def run():
+        client = make_client()
+        heartbeat = HeartbeatManager(client)
+        await heartbeat.ping()
+        request_id = client.websocket.sent[0]['id']
+        assert heartbeat.observe({'id': request_id, 'code': 0, 'data': {}})
+        assert heartbeat.pongs == 1 and heartbeat.last_rtt is not None
+        # Replies to other requests are not ours
+        assert not heartbeat.observe({'id': request_id + 100, 'code': 0})
+    asyncio.run(run())
+
+
+def test_stale_markets_resubscribed_through_client():
+    async def run():
+        client = make_client()
+        client.subscriptions.subscribe('depth', ['BTCUSDT'], limit=20, interval='0')
+        client.subscriptions.subscribe('ticker', ['BTCUSDT', 'ETHUSDT'])
+
+        calls = []
+        resubscribe_markets = client.resubscribe_markets
+
+        async def record(channel, markets):
+            calls.append((channel, list(markets)))
+            await resubscribe_markets(channel, markets)
+
+        client.resubscribe_markets = record
+
+        heartbeat = HeartbeatManager(client, stale_after=0.01)
+        stale_events = []
+        heartbeat.add_stale_handler(lambda channel, market, age: stale_events.append((channel, market)))
+        assert heartbeat.check_stale() == {}  # first sighting starts the grace period
+
+        time.sleep(0.02)
+        heartbeat.observe(ticker('ETHUSDT'))
+        stale = heartbeat.check_stale()
+        assert stale == {'depth': ['BTCUSDT'], 'ticker': ['BTCUSDT']}
+        assert sorted(stale_events) == [('depth', 'BTCUSDT'), ('ticker', 'BTCUSDT')]
+
+        await heartbeat.resubscribe_stale(stale)
+        assert sorted(calls) == [('depth', ['BTCUSDT']), ('ticker', ['BTCUSDT'])]
+        assert heartbeat.resubscribed == 2
+        # Depth keeps its original params
+        depth_message = next(m for m in client.websocket.sent if m['method'] == 'depth.subscribe')
+        assert depth_message['params'] == {'market_list': ['BTCUSDT'], 'limit': 20, 'interval': '0'}
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"✓ {name}")
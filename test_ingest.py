@@ -0,0 +1,115 @@
+"""
+Tests for the bounded ingest queues (coinex_ws.ingest)
+
+Covers the three overflow policies: backpressure for 'block', drop
+counters for 'drop_oldest', and ordering and merging for 'conflate'.
+
+Run with pytest, or directly: python test_ingest.py
+"""
+
+import asyncio
+
+from coinex_ws.ingest import ChannelQueue, IngestPipeline
+
+
+def ticker(*markets_and_prices) -> dict:
+    return {'method': 'state.update',
+            'data': {'state_list': [{'market': market, 'last': last} for market, last in markets_and_prices]}}
+
+
+def deal(deal_id: int) -> dict:
+    return {'method': 'deals.update', 'data': {'market': 'BTCUSDT', 'deal_list': [{'deal_id': deal_id}]}}
+
+
+def drain_now(queue: ChannelQueue) -> list:
+    """Messages queued right now, in delivery order"""
+    async def run():
+        return [(await queue.get())[0] for _ in range(len(queue))]
+    return asyncio.run(run())
+
+
+def test_block_applies_backpressure():
+    async def run():
+        queue = ChannelQueue('depth.update', maxsize=2, policy='block')
+        assert queue.offer({'n': 1}) is None
+        assert queue.offer({'n': 2}) is None
+        waiter = queue.offer({'n': 3})
+        assert waiter is not None
+
+        put = asyncio.ensure_future(waiter)
+        await asyncio.sleep(0.01)
+        assert not put.done() and len(queue) == 2
+
+        first, _ = await queue.get()
+        await asyncio.wait_for(put, 1)
+        rest = [(await queue.get())[0] for _ in range(2)]
+        assert [first] + rest == [{'n': 1}, {'n': 2}, {'n': 3}]
+        assert queue.blocked == 1 and queue.dropped == 0
+        assert queue.high_water == 2
+    asyncio.run(run())
+
+
+def test_drop_oldest_counts_drops():
+    queue = ChannelQueue('deals.update', maxsize=3, policy='drop_oldest')
+    for deal_id in range(5):
+        assert queue.offer(deal(deal_id)) is None
+    assert queue.dropped == 2
+    assert queue.received == 5
+    assert [message['data']['deal_list'][0]['deal_id'] for message in drain_now(queue)] == [2, 3, 4]
+
+
+def test_conflate_merges_per_market():
+    queue = ChannelQueue('state.update', maxsize=10, policy='conflate')
+    queue.offer(ticker(('BTCUSDT', '1'), ('ETHUSDT', '10')))
+    queue.offer(ticker(('BTCUSDT', '2')))
+    queue.offer(ticker(('SOLUSDT', '100'), ('ETHUSDT', '11')))
+    assert len(queue) == 1
+    assert queue.conflated == 2
+
+    [merged] = drain_now(queue)
+    assert {entry['market']: entry['last'] for entry in merged['data']['state_list']} == \
+        {'BTCUSDT': '2', 'ETHUSDT': '11', 'SOLUSDT': '100'}
+
+
+def test_conflate_never_reorders_tickers():
+    queue = ChannelQueue('state.update', maxsize=10, policy='conflate')
+    queue.offer(ticker(('BTCUSDT', '1')))
+    queue.offer(ticker(('BTCUSDT', '2'), ('ETHUSDT', '10')))
+    queue.offer(ticker(('BTCUSDT', '3')))
+
+    # The last BTC ticker delivered must be the newest one
+    latest = {}
+    for message in drain_now(queue):
+        for entry in message['data']['state_list']:
+            latest[entry['market']] = entry['last']
+    assert latest == {'BTCUSDT': '3', 'ETHUSDT': '10'}
+
+
+def test_conflate_keeps_unkeyed_messages():
+    queue = ChannelQueue('reply', maxsize=10, policy='conflate')
+    queue.offer({'id': 1, 'result': 'ok'})
+    queue.offer({'id': 2, 'result': 'ok'})
+    assert [message['id'] for message in drain_now(queue)] == [1, 2]
+    assert queue.conflated == 0
+
+
+def test_pipeline_handles_in_order_per_channel():
+    async def run():
+        handled = []
+        pipeline = IngestPipeline(handled.append)
+        for deal_id in range(3):
+            assert pipeline.submit(deal(deal_id)) is None
+        pipeline.submit(ticker(('BTCUSDT', '1')))
+        await pipeline.close()
+        deals = [message['data']['deal_list'][0]['deal_id'] for message in handled
+                 if message['method'] == 'deals.update']
+        assert deals == [0, 1, 2]
+        assert pipeline.stats()['state.update']['processed'] == 1
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"✓ {name}")
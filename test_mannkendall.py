@@ -34,6 +34,36 @@ try:
     print("Full result object:")
     print(result)
     
+    # Compare the vectorized engine against pymannkendall on rolling windows
+    import numpy as np
+    from mk_engine import rolling_mann_kendall
+    
+    print("\n" + "=" * 60)
+    print("Vectorized engine vs pymannkendall (rolling windows):")
+    print("=" * 60)
+    
+    rng = np.random.default_rng(42)
+    series = np.round(np.cumsum(rng.normal(size=120)), 2)  # rounded to include ties
+    window_size = 30
+    
+    for use_modified, mk_test in [(False, mk.original_test), (True, mk.hamed_rao_modification_test)]:
+        batch = rolling_mann_kendall(series, window_size, use_modified=use_modified)
+        max_diff = 0.0
+        trend_mismatches = 0
+        
+        for i in range(len(series) - window_size + 1):
+            ref = mk_test(series[i:i + window_size])
+            for ours, theirs in [(batch['p'][i], ref.p), (batch['tau'][i], ref.Tau),
+                                 (batch['z'][i], ref.z), (batch['slope'][i], ref.slope)]:
+                if not (np.isnan(ours) and np.isnan(theirs)):
+                    max_diff = max(max_diff, abs(ours - theirs))
+            if batch['trend'][i] != ref.trend:
+                trend_mismatches += 1
+        
+        name = 'Hamed-Rao Modified' if use_modified else 'Original'
+        status = "✓" if max_diff < 1e-9 and trend_mismatches == 0 else "❌"
+        print(f"{status} {name:<20} max |diff| = {max_diff:.2e}, trend mismatches = {trend_mismatches}")
+    
 except ImportError:
     print("❌ pymannkendall not installed")
     print("   Install with: pip install pymannkendall")
@@ -0,0 +1,140 @@
+"""
+Tests for the Mann-Kendall result cache (mk_cache) and the cached rolling
+analysis in get_ohlcv
+
+Run with pytest, or directly: python test_mk_cache.py
+"""
+
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from candles import CandleSeries
+from get_ohlcv import CoinExDailyData
+from mk_cache import MKResultCache, window_hashes
+
+DAY_SECONDS = 86_400
+
+
+def temp_cache(max_entries: int = 1000) -> MKResultCache:
+    path = os.path.join(tempfile.mkdtemp(), "mk_cache.sqlite")
+    return MKResultCache(path, max_entries)
+
+
+def make_series(closes, market: str = 'BTCUSDT') -> CandleSeries:
+    closes = np.asarray(closes, dtype=np.float64)
+    ts = 1_700_000_000 + np.arange(len(closes), dtype=np.int64) * DAY_SECONDS
+    return CandleSeries(market, ts, closes, closes, closes, closes, np.ones(len(closes)), closes)
+
+
+def closes(n: int, seed: int = 7):
+    return np.round(100 + np.cumsum(np.random.default_rng(seed).normal(size=n)), 2)
+
+
+def strip_meta(results):
+    return [{key: value for key, value in result.items() if key != 'window_size'} for result in results]
+
+
+def test_window_hashes_change_with_data():
+    values = [1.0, 2.0, 3.0, 4.0, 5.0]
+    hashes = window_hashes(values, 3)
+    assert len(hashes) == 3
+    changed = window_hashes([1.0, 2.0, 3.0, 4.0, 5.5], 3)
+    assert changed[:2] == hashes[:2]
+    assert changed[2] != hashes[2]
+
+
+def test_put_get_keyed_by_variant():
+    cache = temp_cache()
+    try:
+        cache.put_windows('BTCUSDT', 3, 'Original', [('d1', 'd3', 'h1', {'tau': 0.5})])
+        assert cache.get_windows('BTCUSDT', 3, 'Original') == {('d1', 'd3', 'h1'): {'tau': 0.5}}
+        assert cache.get_windows('BTCUSDT', 3, 'Hamed-Rao Modified') == {}
+        assert cache.get_windows('BTCUSDT', 4, 'Original') == {}
+    finally:
+        cache.close()
+
+
+def test_lru_eviction_to_90_percent():
+    cache = temp_cache(max_entries=10)
+    try:
+        for i in range(10):
+            cache.put_windows(f'M{i}', 3, 'Original', [('s', 'e', 'h', {'i': i})])
+            time.sleep(0.002)
+        # Using the oldest market keeps it over the ones written after it
+        cache.touch('M0', 3, 'Original')
+        time.sleep(0.002)
+        cache.put_windows('N', 3, 'Original', [('s', 'e', 'h', {'i': 'new'})])
+        assert cache.entries == 9
+        kept = [market for market in ['N'] + [f'M{i}' for i in range(10)]
+                if cache.get_windows(market, 3, 'Original')]
+        assert kept == ['N', 'M0'] + [f'M{i}' for i in range(3, 10)]
+    finally:
+        cache.close()
+
+
+def test_hits_misses_and_invalidation():
+    fetcher = CoinExDailyData(max_workers=1, mk_cache_file=temp_cache().filename)
+    values = closes(40)
+    window = 10
+    num_windows = len(values) - window + 1
+
+    first = fetcher.analyze_trend_rolling_window_cached('BTCUSDT', make_series(values), window)
+    assert (fetcher.mk_cache.hits, fetcher.mk_cache.misses) == (0, num_windows)
+
+    again = fetcher.analyze_trend_rolling_window_cached('BTCUSDT', make_series(values), window)
+    assert (fetcher.mk_cache.hits, fetcher.mk_cache.misses) == (num_windows, num_windows)
+    assert strip_meta(again) == strip_meta(first)
+
+    # A refreshed last close changes only the last window's data hash
+    values[-1] += 1.0
+    fetcher.analyze_trend_rolling_window_cached('BTCUSDT', make_series(values), window)
+    assert fetcher.mk_cache.misses == num_windows + 1
+    assert fetcher.mk_cache.hits == 2 * num_windows - 1
+
+
+def test_cache_is_opened_lazily():
+    path = os.path.join(tempfile.mkdtemp(), "mk_cache.sqlite")
+    fetcher = CoinExDailyData(max_workers=1, mk_cache_file=path)
+    assert not os.path.exists(path)
+    assert fetcher.mk_cache is not None
+    assert os.path.exists(path)
+
+
+def test_cached_shard_batch_matches_uncached():
+    shard = [(f'M{k}USDT', make_series(closes(50, seed=k), f'M{k}USDT')) for k in range(4)]
+    plain = CoinExDailyData(max_workers=1)
+    cached = CoinExDailyData(max_workers=1, mk_cache_file=temp_cache().filename)
+
+    expected = plain.analyze_rolling_shard(shard, 20)
+    assert cached.analyze_rolling_shard(shard, 20) == expected
+    # Second run comes from the cache only
+    misses = cached.mk_cache.misses
+    assert cached.analyze_rolling_shard(shard, 20) == expected
+    assert cached.mk_cache.misses == misses
+
+
+def test_rolling_without_slope_is_cached_separately():
+    fetcher = CoinExDailyData(max_workers=1, mk_cache_file=temp_cache().filename)
+    series = make_series(closes(40))
+    plain = fetcher.analyze_trend_rolling_window(series, 10, use_modified=False, engine='rolling')
+    fast = fetcher.analyze_trend_rolling_window_cached('BTCUSDT', series, 10, use_modified=False,
+                                                       engine='rolling', with_slope=False)
+    assert all(np.isnan(result['slope']) for result in fast)
+    assert [result['tau'] for result in fast] == [result['tau'] for result in plain]
+
+    # A caller asking for the slope must not get the slope-less entries
+    misses = fetcher.mk_cache.misses
+    with_slope = fetcher.analyze_trend_rolling_window_cached('BTCUSDT', series, 10, use_modified=False,
+                                                             engine='rolling')
+    assert fetcher.mk_cache.misses == misses + len(plain)
+    assert [result['slope'] for result in with_slope] == [result['slope'] for result in plain]
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"✓ {name}")
@@ -0,0 +1,133 @@
+"""
+Tests for incremental sync (get_ohlcv) and the OHLCV storage backends
+(ohlcv_store)
+
+Run with pytest, or directly: python test_ohlcv_store.py
+"""
+
+import csv
+import os
+import tempfile
+import time
+from datetime import datetime
+
+from get_ohlcv import CoinExDailyData
+from ohlcv_store import HAS_ARROW, OHLCV_COLUMNS, CsvStore, open_store
+
+DAY = 86_400
+START = 1_700_006_400  # a UTC midnight
+
+
+def make_row(market: str, day: int, close: float) -> dict:
+    timestamp = START + day * DAY
+    dt = datetime.fromtimestamp(timestamp)
+    return {
+        'Date': dt.strftime('%Y-%m-%d'),
+        'Timestamp': dt.strftime('%Y-%m-%d %H:%M:%S'),
+        'Unix_Timestamp': timestamp,
+        'Open': close - 1.0,
+        'Close': close,
+        'High': close + 1.0,
+        'Low': close - 2.0,
+        'Volume': 10.0,
+        'Value': 10.0 * close,
+        'Market': market,
+    }
+
+
+def temp_file(name: str) -> str:
+    return os.path.join(tempfile.mkdtemp(), name)
+
+
+def test_incremental_limits():
+    fetcher = CoinExDailyData(max_workers=1)
+    now = int(time.time())
+    last_rows = {
+        'BTCUSDT': {'Unix_Timestamp': now - 3 * DAY - 60},
+        'ETHUSDT': {'Unix_Timestamp': now - 60},
+        'OLDUSDT': {'Unix_Timestamp': now - 5000 * DAY},
+    }
+    limits = fetcher.incremental_limits(['BTCUSDT', 'ETHUSDT', 'OLDUSDT', 'NEWUSDT'], 365, last_rows)
+    # The stored last candle is always fetched again
+    assert limits == {'BTCUSDT': 4, 'ETHUSDT': 1, 'OLDUSDT': 365, 'NEWUSDT': 365}
+
+
+def test_split_incremental():
+    fetcher = CoinExDailyData(max_workers=1)
+    stored = make_row('BTCUSDT', 2, 102.0)
+    fetched = [make_row('BTCUSDT', day, 100.0 + day) for day in range(5)]
+
+    new_rows, refreshed = fetcher.split_incremental(fetched, stored)
+    assert [row['Unix_Timestamp'] for row in new_rows] == [START + 3 * DAY, START + 4 * DAY]
+    assert refreshed is None
+
+    # Stored while the day was in progress: the re-fetched copy replaces it
+    fetched[2]['Close'] = 105.5
+    _, refreshed = fetcher.split_incremental(fetched, stored)
+    assert refreshed is fetched[2]
+
+    # CSV rows come back as strings
+    text_row = {name: str(value) for name, value in stored.items()}
+    text_row['Unix_Timestamp'] = stored['Unix_Timestamp']
+    _, refreshed = fetcher.split_incremental([make_row('BTCUSDT', 2, 102.0)], text_row)
+    assert refreshed is None
+
+
+def check_round_trip(filename: str):
+    store = open_store(filename)
+    store.write([make_row('BTCUSDT', day, 100.0 + day) for day in range(3)])
+    store.write([make_row('ETHUSDT', day, 10.0 + day) for day in range(2)], append=True)
+    store.flush()
+
+    last_rows = store.last_rows()
+    assert {market: row['Unix_Timestamp'] for market, row in last_rows.items()} == \
+        {'BTCUSDT': START + 2 * DAY, 'ETHUSDT': START + DAY}
+
+    store.replace_rows({('BTCUSDT', START + 2 * DAY): make_row('BTCUSDT', 2, 150.0)})
+    markets = open_store(filename).read_markets()
+    assert list(markets['BTCUSDT']['Close']) == [100.0, 101.0, 150.0]
+    assert list(markets['ETHUSDT']['Close']) == [10.0, 11.0]
+    return store
+
+
+def test_csv_round_trip_and_replace_rows():
+    check_round_trip(temp_file('candles.csv'))
+
+
+def test_columnar_round_trip_dedupe_and_replace_rows():
+    if not HAS_ARROW:
+        return
+    for name in ('candles.parquet', 'candles.arrow'):
+        filename = temp_file(name)
+        store = check_round_trip(filename)
+        # A re-written candle replaces the stored one instead of duplicating it
+        store.write([make_row('ETHUSDT', 1, 12.5), make_row('ETHUSDT', 2, 13.0)], append=True)
+        store.flush()
+        markets = open_store(filename).read_markets()
+        assert list(markets['ETHUSDT']['Close']) == [10.0, 12.5, 13.0]
+        assert len(markets['BTCUSDT']['Close']) == 3
+
+
+def test_csv_lowercase_header():
+    filename = temp_file('lower.csv')
+    with open(filename, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow([name.lower() for name in OHLCV_COLUMNS])
+        for day in range(3):
+            row = make_row('BTCUSDT', day, 100.0 + day)
+            writer.writerow([row[name] for name in OHLCV_COLUMNS])
+
+    store = CsvStore(filename)
+    last_row = store.last_rows()['BTCUSDT']
+    assert last_row['Unix_Timestamp'] == START + 2 * DAY
+    assert float(last_row['Close']) == 102.0
+
+    store.replace_rows({('BTCUSDT', START + 2 * DAY): make_row('BTCUSDT', 2, 150.0)})
+    assert store.read_markets()['BTCUSDT']['Close'] == [100.0, 101.0, 150.0]
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"✓ {name}")
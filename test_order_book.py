@@ -0,0 +1,97 @@
+"""
+Tests for the local order book (order_book): the CRC32 checksum and the
+resync after a mismatch
+
+Run with pytest, or directly: python test_order_book.py
+"""
+
+import zlib
+
+from coinex_ws.dispatch import DepthUpdate
+from order_book import LocalOrderBook, OrderBookManager, checksum_string, crc32_signed
+
+BIDS = [["100.5", "1.2"], ["100.1", "3"], ["99.9", "0.5"]]
+ASKS = [["100.7", "2"], ["101", "0.25"]]
+EXPECTED_STRING = "100.5:1.2:100.1:3:99.9:0.5:100.7:2:101:0.25"
+
+
+def depth(bids, asks, is_full=False, checksum=None, market='BTCUSDT') -> DepthUpdate:
+    return DepthUpdate(market, is_full, asks, bids, checksum=checksum)
+
+
+def snapshot_book() -> LocalOrderBook:
+    book = LocalOrderBook('BTCUSDT')
+    # Levels arrive unsorted; the checksum follows book order
+    assert book.apply(depth(BIDS[::-1], ASKS[::-1], is_full=True))
+    return book
+
+
+def test_checksum_string_is_bids_then_asks():
+    book = snapshot_book()
+    assert checksum_string(book.bids, book.asks) == EXPECTED_STRING
+
+
+def test_checksum_keeps_exchange_strings():
+    book = LocalOrderBook('BTCUSDT')
+    book.apply(depth([["100.50", "1.200"]], [["101.0", "2"]], is_full=True))
+    assert checksum_string(book.bids, book.asks) == "100.50:1.200:101.0:2"
+
+
+def test_crc32_signed():
+    unsigned = zlib.crc32(EXPECTED_STRING.encode())
+    signed = crc32_signed(EXPECTED_STRING)
+    assert -(1 << 31) <= signed < (1 << 31)
+    assert signed % (1 << 32) == unsigned
+    # A value with the top bit set comes out negative
+    text = next(t for t in (f"x{i}" for i in range(100)) if zlib.crc32(t.encode()) >= 1 << 31)
+    assert crc32_signed(text) == zlib.crc32(text.encode()) - (1 << 32)
+
+
+def test_signed_and_unsigned_checksums_match():
+    unsigned = zlib.crc32(EXPECTED_STRING.encode())
+    for checksum in (unsigned, crc32_signed(EXPECTED_STRING)):
+        book = LocalOrderBook('BTCUSDT')
+        assert book.apply(depth(BIDS, ASKS, is_full=True, checksum=checksum))
+        assert book.synced and book.checksum_failures == 0
+
+
+def test_incremental_update_checksum():
+    book = snapshot_book()
+    update = depth([["100.1", "0"], ["100.6", "1"]], [["101", "0.5"]])
+    bids = [["100.6", "1"], ["100.5", "1.2"], ["99.9", "0.5"]]
+    asks = [["100.7", "2"], ["101", "0.5"]]
+    update.checksum = crc32_signed(":".join(value for level in bids + asks for value in level))
+    assert book.apply(update)
+    assert book.best_bid() == (100.6, 1.0)
+    assert len(book.bids) == 3
+
+
+def test_mismatch_requests_one_resync():
+    resyncs = []
+    manager = OrderBookManager(on_resync=resyncs.append)
+    assert manager.handle_depth(depth(BIDS, ASKS, is_full=True, checksum=crc32_signed(EXPECTED_STRING)))
+
+    # Wrong checksum: the book goes out of sync and a resync is requested once
+    assert manager.handle_depth(depth([["100.5", "2"]], [], checksum=12345)) is None
+    assert manager.get('BTCUSDT').checksum_failures == 1
+    assert manager.handle_depth(depth([["100.5", "3"]], [])) is None
+    assert resyncs == ['BTCUSDT']
+    assert manager.resyncs == 1
+
+    # The new snapshot brings it back
+    book = manager.handle_depth(depth(BIDS, ASKS, is_full=True, checksum=crc32_signed(EXPECTED_STRING)))
+    assert book is not None and book.synced
+    assert resyncs == ['BTCUSDT']
+
+
+def test_diff_before_snapshot_is_ignored():
+    book = LocalOrderBook('BTCUSDT')
+    assert not book.apply(depth([["100", "1"]], []))
+    assert len(book.bids) == 0 and book.checksum_failures == 0
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"✓ {name}")
@@ -0,0 +1,99 @@
+"""
+Tests for the pooled connection's reconnect backoff (coinex_ws.pool)
+
+A fake connect() fails a given number of times; the backoff must grow
+with each failed or short-lived cycle and reset only after a connection
+stayed up longer than max_backoff.
+
+Run with pytest, or directly: python test_pool.py
+"""
+
+import asyncio
+import random
+
+from coinex_ws.pool import PooledConnection
+
+BASE = 0.001
+MAX = 0.05
+
+
+def make_connection(outcomes):
+    """
+    Connection whose cycles follow outcomes: 'fail' (connect raises),
+    'short' (listen returns at once) or 'long' (up for longer than MAX)
+    """
+    connection = PooledConnection(0, callback=lambda message: None, stale_after=3600.0,
+                                  base_backoff=BASE, max_backoff=MAX)
+    client = connection.client
+    outcomes = list(outcomes)
+    current = []
+
+    async def connect():
+        if not outcomes:
+            connection.closing = True
+            raise ConnectionError("done")
+        current[:] = [outcomes.pop(0)]
+        if current[0] == 'fail':
+            raise ConnectionError("refused")
+
+    async def listen(callback=None):
+        if current[0] == 'long':
+            await asyncio.sleep(MAX * 1.5)
+
+    async def resubscribe():
+        pass
+
+    client.connect = connect
+    client.listen = listen
+    client.resubscribe = resubscribe
+    client.start_heartbeat = lambda **options: None
+
+    attempts = []
+    backoff_delay = connection.backoff_delay
+
+    def record(attempt):
+        attempts.append(attempt)
+        return backoff_delay(attempt)
+
+    connection.backoff_delay = record
+    return connection, attempts
+
+
+def test_backoff_is_jittered_and_capped():
+    connection = PooledConnection(0, callback=lambda message: None, base_backoff=1.0, max_backoff=60.0)
+    random.seed(1)
+    for attempt, cap in [(0, 1.0), (1, 2.0), (3, 8.0), (5, 32.0), (6, 60.0), (20, 60.0)]:
+        delays = [connection.backoff_delay(attempt) for _ in range(200)]
+        assert all(0 <= delay <= cap for delay in delays)
+        # Full jitter spreads delays over the whole range
+        assert min(delays) < cap * 0.1 and max(delays) > cap * 0.9
+
+
+def test_failed_connects_grow_the_backoff():
+    connection, attempts = make_connection(['fail', 'fail', 'fail'])
+    asyncio.run(connection.run())
+    assert attempts == [0, 1, 2]
+    assert connection.health.connects == 0
+    assert connection.health.state == 'closed'
+
+
+def test_short_connection_does_not_reset_backoff():
+    connection, attempts = make_connection(['fail', 'fail', 'short', 'fail'])
+    asyncio.run(connection.run())
+    assert attempts == [0, 1, 2, 3]
+    assert connection.health.connects == 1
+
+
+def test_backoff_resets_after_uptime_exceeds_max_backoff():
+    connection, attempts = make_connection(['fail', 'fail', 'fail', 'long', 'fail', 'short'])
+    asyncio.run(connection.run())
+    assert attempts == [0, 1, 2, 0, 1, 2]
+    assert connection.health.connects == 2
+    assert connection.health.reconnects == 1
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"✓ {name}")
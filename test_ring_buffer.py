@@ -0,0 +1,109 @@
+"""
+Tests for the array-backed ring buffers (ring_buffer)
+
+Covers wrap-around past capacity and the 2x-capacity compaction, after
+which the zero-copy views must still hold the newest rows in order.
+
+Run with pytest, or directly: python test_ring_buffer.py
+"""
+
+import numpy as np
+
+from ring_buffer import BUY, SELL, TRADE_FIELDS, MarketHistory, RingBuffer
+
+
+def test_fills_up_to_capacity():
+    buffer = RingBuffer(4)
+    assert len(buffer) == 0 and buffer.last() is None
+    for i in range(3):
+        buffer.append(i, float(i))
+    assert len(buffer) == 3
+    assert buffer['ts'].tolist() == [0, 1, 2]
+    assert buffer.last() == {'ts': 2, 'price': 2.0}
+
+
+def test_wrap_around_keeps_newest_rows_in_order():
+    buffer = RingBuffer(4)
+    for i in range(7):
+        buffer.append(i, i * 10.0)
+    assert len(buffer) == 4 and buffer.total == 7
+    assert buffer['ts'].tolist() == [3, 4, 5, 6]
+    assert buffer.column('price', 2).tolist() == [50.0, 60.0]
+
+
+def test_compaction_at_twice_capacity():
+    capacity = 5
+    buffer = RingBuffer(capacity)
+    backing = buffer.columns['ts']
+    for i in range(2 * capacity):
+        buffer.append(i, float(i))
+    assert buffer.end == 2 * capacity
+
+    # The next append moves the newest rows to the front first
+    buffer.append(2 * capacity, float(2 * capacity))
+    assert buffer.end == capacity + 1
+    view = buffer['ts']
+    assert view.tolist() == list(range(capacity + 1, 2 * capacity + 1))
+    # Still a view of the same backing array, not a copy
+    assert np.shares_memory(view, backing)
+    assert buffer['price'].tolist() == [float(i) for i in range(capacity + 1, 2 * capacity + 1)]
+
+
+def test_many_compactions_match_a_list():
+    capacity = 7
+    buffer = RingBuffer(capacity)
+    expected = []
+    for i in range(10 * capacity + 3):
+        buffer.append(i, i * 0.5)
+        expected.append(i)
+        assert buffer['ts'].tolist() == expected[-capacity:]
+    assert buffer.total == 10 * capacity + 3
+
+
+def test_extend_across_compaction_and_longer_than_capacity():
+    buffer = RingBuffer(4)
+    buffer.extend(ts=[0, 1, 2], price=[0.0, 1.0, 2.0])
+    buffer.extend(ts=[3, 4, 5], price=[3.0, 4.0, 5.0])
+    buffer.extend(ts=[6, 7, 8], price=[6.0, 7.0, 8.0])
+    assert buffer['ts'].tolist() == [5, 6, 7, 8]
+
+    buffer.extend(ts=list(range(100, 110)), price=[float(i) for i in range(10)])
+    assert buffer['ts'].tolist() == [106, 107, 108, 109]
+    assert buffer.total == 19
+
+
+def test_since_after_wrap():
+    buffer = RingBuffer(5)
+    for i in range(12):
+        buffer.append(i * 1000, float(i))
+    rows = buffer.since(9000)
+    assert rows['ts'].tolist() == [9000, 10000, 11000]
+    # Older than everything kept: all kept rows
+    assert len(buffer.since(0)['ts']) == 5
+
+
+def test_market_history_stats_after_wrap():
+    history = MarketHistory(tick_capacity=3, trade_capacity=4)
+    for i in range(10):
+        history.add_tick('BTCUSDT', i, 100.0 + i)
+        history.add_trade('BTCUSDT', i, 100.0 + i, 1.0 + i, 'buy' if i % 2 else 'sell')
+
+    ticks = history.tick_stats('BTCUSDT')
+    assert ticks['count'] == 3 and ticks['low'] == 107.0 and ticks['high'] == 109.0
+
+    trades = history.trade_buffer('BTCUSDT')
+    assert trades['side'].tolist() == [SELL, BUY, SELL, BUY]
+    stats = history.trade_stats('BTCUSDT', since_ts=8)
+    assert stats['count'] == 2
+    assert stats['buy_volume'] == 10.0 and stats['sell_volume'] == 9.0
+    assert abs(stats['vwap'] - (108.0 * 9 + 109.0 * 10) / 19) < 1e-9
+    assert history.trade_stats('ETHUSDT') is None
+    assert history.nbytes() > 0
+    assert trades.fields == tuple(name for name, _ in TRADE_FIELDS)
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"✓ {name}")
@@ -0,0 +1,174 @@
+"""
+Tests for request/reply correlation (coinex_ws.rpc) and the client's
+early-reply backlog (CoinExWebSocket._receive_early)
+
+Run with pytest, or directly: python test_rpc.py
+"""
+
+import asyncio
+import gzip
+import json
+
+from websockets.exceptions import ConnectionClosedOK
+
+from coinex_ws.client import CoinExWebSocket
+from coinex_ws.rpc import RequestTracker, RpcError, RpcTimeout
+
+CLOSE = object()
+
+
+def frame(message: dict) -> bytes:
+    """Gzip frame as CoinEx sends it"""
+    return gzip.compress(json.dumps(message).encode())
+
+
+def reply(request_id, code: int = 0) -> dict:
+    return {'id': request_id, 'code': code, 'data': {}, 'message': 'OK' if code == 0 else 'failed'}
+
+
+def ticker(market: str = 'BTCUSDT') -> dict:
+    return {'method': 'state.update', 'data': {'state_list': [{'market': market, 'last': '1'}]}}
+
+
+class FakeSocket:
+    """In-memory websocket: frames queued with push(), replies made by a responder"""
+
+    def __init__(self, responder=None):
+        self.incoming = asyncio.Queue()
+        self.sent = []
+        self.responder = responder
+
+    def push(self, item):
+        self.incoming.put_nowait(item)
+
+    async def send(self, text: str):
+        message = json.loads(text)
+        self.sent.append(message)
+        if self.responder:
+            self.responder(self, message)
+
+    async def recv(self):
+        item = await self.incoming.get()
+        if item is CLOSE:
+            raise ConnectionClosedOK(None, None)
+        return item
+
+
+def make_client(responder=None) -> CoinExWebSocket:
+    client = CoinExWebSocket(verbose=False)
+    client.websocket = FakeSocket(responder)
+    return client
+
+
+def test_replies_matched_by_id():
+    async def run():
+        tracker = RequestTracker()
+        futures = {request_id: tracker.track({'id': request_id, 'method': 'server.ping'})
+                   for request_id in (1, 2, 3)}
+        # Replies come back in any order
+        assert tracker.resolve(reply(3))
+        assert tracker.resolve(reply(1))
+        assert tracker.resolve(reply(2, code=10))
+        assert not tracker.resolve(reply(99))
+
+        assert futures[1].result()['id'] == 1
+        assert futures[3].result()['id'] == 3
+        error = futures[2].exception()
+        assert isinstance(error, RpcError) and error.code == 10 and error.method == 'server.ping'
+        assert tracker.stats() == {'sent': 3, 'replied': 3, 'errors': 1, 'timed_out': 0, 'pending': 0}
+    asyncio.run(run())
+
+
+def test_timeout_discards_request():
+    async def run():
+        tracker = RequestTracker()
+        future = tracker.track({'id': 7, 'method': 'server.ping'})
+        try:
+            await tracker.wait(7, future, timeout=0.02)
+            assert False, "expected RpcTimeout"
+        except RpcTimeout:
+            pass
+        assert len(tracker) == 0 and tracker.timed_out == 1
+        # A reply arriving after the timeout is not matched
+        assert not tracker.resolve(reply(7))
+    asyncio.run(run())
+
+
+def test_fail_all_on_connection_loss():
+    async def run():
+        tracker = RequestTracker()
+        futures = [tracker.track({'id': request_id}) for request_id in (1, 2)]
+        tracker.fail_all(ConnectionError("gone"))
+        assert len(tracker) == 0
+        assert all(isinstance(future.exception(), ConnectionError) for future in futures)
+    asyncio.run(run())
+
+
+def test_early_reply_backlog():
+    async def run():
+        client = make_client(lambda socket, message: socket.push(frame(reply(message['id']))))
+        # A market update arrives before the reply
+        client.websocket.push(frame(ticker()))
+
+        response = await client.request('server.ping')
+        assert response['id'] == client.websocket.sent[0]['id']
+        assert len(client._backlog) == 2
+        assert len(client.rpc) == 0
+
+        # listen() still sees both frames, in order
+        received = []
+        client.websocket.push(CLOSE)
+        await client.listen(callback=received.append)
+        assert [message.get('method') for message in received] == ['state.update', None]
+        assert received[1]['id'] == response['id']
+    asyncio.run(run())
+
+
+def test_early_request_timeout_keeps_frames():
+    async def run():
+        client = make_client()
+        client.websocket.push(frame(ticker('ETHUSDT')))
+        try:
+            await client.request('server.ping', timeout=0.05)
+            assert False, "expected RpcTimeout"
+        except RpcTimeout:
+            pass
+        assert len(client.rpc) == 0
+        assert len(client._backlog) == 1
+    asyncio.run(run())
+
+
+def test_pipelined_requests_during_listen():
+    async def run():
+        sent_ids = []
+
+        def respond_in_reverse(socket, message):
+            sent_ids.append(message['id'])
+            if len(sent_ids) == 2:
+                for request_id in reversed(sent_ids):
+                    socket.push(frame(reply(request_id)))
+
+        client = make_client(respond_in_reverse)
+        listener = asyncio.ensure_future(client.listen(callback=lambda message: None))
+        await asyncio.sleep(0)
+        first, second = await asyncio.gather(client.request('server.ping'), client.request('server.time'))
+        assert (first['id'], second['id']) == tuple(sent_ids)
+
+        # Closing the connection fails what is still pending
+        pending = asyncio.ensure_future(client.request('server.ping'))
+        await asyncio.sleep(0)
+        client.websocket.push(CLOSE)
+        await listener
+        try:
+            await pending
+            assert False, "expected ConnectionError"
+        except ConnectionError:
+            pass
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"✓ {name}")
@@ -0,0 +1,232 @@
+"""
+Conflated Ticker Table
+
+Latest-state view for many markets:
+
+- TickerTable keeps one preallocated slot per market (NumPy columns for
+  last/previous price, open, high, low, volume and update time). A ticker
+  update overwrites its market's slot in place and marks it dirty; a burst
+  of updates for the same market costs one redraw.
+- TableView redraws at a fixed frame rate from a background thread. A frame
+  only rewrites the cells of dirty markets (ANSI cursor positioning), so
+  rendering cost is bounded by fps x changed markets, not by message rate.
+  Markets are laid out in as many columns as the terminal width allows.
+  When the output is not a terminal, each frame prints the changed markets
+  as plain lines instead.
+"""
+
+import shutil
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, TextIO
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+
+TABLE_FIELDS = ('last', 'prev', 'open', 'high', 'low', 'volume', 'updated_at')
+
+GREEN = "\033[92m"
+RED = "\033[91m"
+YELLOW = "\033[93m"
+RESET = "\033[0m"
+
+
+class TickerTable:
+    """One in-place slot per market plus a dirty set"""
+
+    def __init__(self, capacity: int = 512):
+        """
+        Args:
+            capacity: Initial number of market slots (grows by doubling)
+        """
+        if not HAS_NUMPY:
+            raise ImportError("numpy is required for TickerTable (pip install numpy)")
+
+        self.capacity = capacity
+        self.columns = {name: np.zeros(capacity, dtype=np.float64) for name in TABLE_FIELDS}
+        self.markets = []      # slot -> market
+        self.slots = {}        # market -> slot
+        self.dirty = set()
+        self.updates = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.markets)
+
+    def _grow(self):
+        for name, column in self.columns.items():
+            grown = np.zeros(2 * self.capacity, dtype=np.float64)
+            grown[:self.capacity] = column
+            self.columns[name] = grown
+        self.capacity *= 2
+
+    def slot(self, market: str) -> int:
+        """Slot of a market (allocated on first use)"""
+        slot = self.slots.get(market)
+        if slot is None:
+            with self._lock:
+                if len(self.markets) == self.capacity:
+                    self._grow()
+                slot = self.slots[market] = len(self.markets)
+                self.markets.append(market)
+        return slot
+
+    def update(self, market: str, last: float, open: float = 0.0, high: float = 0.0,
+               low: float = 0.0, volume: float = 0.0):
+        """Overwrite a market's slot with its latest ticker"""
+        slot = self.slot(market)
+        columns = self.columns
+        previous = columns['last'][slot]
+        columns['prev'][slot] = previous if previous else last
+        columns['last'][slot] = last
+        columns['open'][slot] = open
+        columns['high'][slot] = high
+        columns['low'][slot] = low
+        columns['volume'][slot] = volume
+        columns['updated_at'][slot] = time.time()
+        with self._lock:
+            self.dirty.add(slot)
+        self.updates += 1
+
+    def update_ticker(self, ticker):
+        """Overwrite a slot from a coinex_ws.dispatch.Ticker"""
+        self.update(ticker.market, ticker.last, ticker.open, ticker.high, ticker.low, ticker.volume)
+
+    def take_dirty(self) -> List[int]:
+        """Slots changed since the last call (and clear the set)"""
+        with self._lock:
+            dirty, self.dirty = self.dirty, set()
+        return sorted(dirty)
+
+    def row(self, slot: int) -> Dict:
+        """Current values of a slot as a dict"""
+        row = {name: float(self.columns[name][slot]) for name in TABLE_FIELDS}
+        row['market'] = self.markets[slot]
+        row['change_pct'] = (row['last'] - row['open']) / row['open'] * 100 if row['open'] > 0 else 0.0
+        return row
+
+    def price(self, market: str) -> Optional[float]:
+        slot = self.slots.get(market)
+        return float(self.columns['last'][slot]) if slot is not None else None
+
+    def change_pct(self):
+        """24h change of every slot as an array (0 where there is no open)"""
+        n = len(self.markets)
+        last, open_ = self.columns['last'][:n], self.columns['open'][:n]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(open_ > 0, (last - open_) / open_ * 100, 0.0)
+
+
+class TableView:
+    """Redraw a TickerTable's changed cells at a fixed frame rate"""
+
+    CELL_WIDTH = 36
+
+    def __init__(self, table: TickerTable, fps: float = 4.0, stream: Optional[TextIO] = None,
+                 title: str = "COINEX TICKERS"):
+        """
+        Args:
+            table: Table to display
+            fps: Frames per second
+            stream: Output stream (default sys.stdout)
+            title: Header line
+        """
+        self.table = table
+        self.fps = fps
+        self.stream = stream or sys.stdout
+        self.title = title
+        self.ansi = hasattr(self.stream, 'isatty') and self.stream.isatty()
+        self._layout = None
+        self._stop = threading.Event()
+        self._thread = None
+        self.frames = 0
+        self.cells_drawn = 0
+
+    def format_cell(self, slot: int) -> str:
+        """One market's cell: name, last price and 24h change, colored by last move"""
+        columns = self.table.columns
+        last = columns['last'][slot]
+        prev = columns['prev'][slot]
+        open_ = columns['open'][slot]
+        change = (last - open_) / open_ * 100 if open_ > 0 else 0.0
+        color = GREEN if last > prev else RED if last < prev else YELLOW
+        text = f"{self.table.markets[slot]:<12} {last:>12.6g} {change:>+7.2f}%"
+        return f"{color}{text:<{self.CELL_WIDTH - 1}}{RESET}" if self.ansi else text
+
+    def _compute_layout(self):
+        size = shutil.get_terminal_size((120, 40))
+        per_row = max(1, size.columns // self.CELL_WIDTH)
+        visible_rows = max(1, size.lines - 4)
+        return len(self.table), per_row, visible_rows, size
+
+    def _position(self, slot: int, per_row: int) -> str:
+        """ANSI cursor position of a slot's cell (rows start below the header)"""
+        row, col = divmod(slot, per_row)
+        return f"\033[{row + 3};{col * self.CELL_WIDTH + 1}H"
+
+    def frame(self) -> int:
+        """Draw one frame; returns the number of cells written"""
+        dirty = self.table.take_dirty()
+        if not self.ansi:
+            # Plain output: print changed markets as lines (already conflated)
+            if dirty:
+                self.stream.write("\n".join(self.format_cell(slot) for slot in dirty) + "\n")
+                self.stream.flush()
+            self.frames += 1
+            self.cells_drawn += len(dirty)
+            return len(dirty)
+
+        layout = self._compute_layout()
+        count, per_row, visible_rows, _ = layout
+        limit = per_row * visible_rows
+        parts = []
+        if layout != self._layout:
+            # New markets or terminal resize: full redraw
+            self._layout = layout
+            dirty = range(min(count, limit))
+            parts.append("\033[2J\033[H")
+            parts.append(f"{self.title} - {count} markets")
+            if count > limit:
+                parts.append(f" (showing {limit}; enlarge the terminal for more)")
+        for slot in dirty:
+            if slot < limit:
+                parts.append(self._position(slot, per_row))
+                parts.append(self.format_cell(slot))
+        drawn = sum(1 for slot in dirty if slot < limit)
+        footer_row = -(-min(count, limit) // per_row) + 3
+        parts.append(f"\033[{footer_row};1H{self.table.updates:,} updates, frame {self.frames + 1}\033[K")
+        self.stream.write("".join(parts))
+        self.stream.flush()
+        self.frames += 1
+        self.cells_drawn += drawn
+        return drawn
+
+    def _run(self):
+        period = 1.0 / self.fps
+        while not self._stop.wait(period):
+            try:
+                self.frame()
+            except Exception:
+                pass
+
+    def start(self):
+        """Start redrawing in a background thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="ticker-view", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop redrawing (after one final frame)"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(2.0)
+            self._thread = None
+        self.frame()
+        if self.ansi:
+            self.stream.write("\n")
+            self.stream.flush()